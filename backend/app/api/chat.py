@@ -3,10 +3,12 @@ Chat API Endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator, Dict
 from datetime import datetime
+import json
 
 from ..database import get_db
 from ..models.models import Analysis, ChatMessage
@@ -84,6 +86,62 @@ async def ask_question(
         )
 
 
+def _sse(event: str, data: dict) -> str:
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            yield _sse(event["event"], event["data"])
+    except Exception as e:
+        print(f"Error in ask_question_stream: {e}")
+        yield _sse("error", {"detail": "שגיאה בשליחת השאלה. נסה שוב."})
+
+
+@router.post("/analyses/{analysis_id}/chat/stream")
+async def ask_question_stream(
+    analysis_id: int,
+    request: ChatQuestionRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    ⚡ Ask a question and stream the answer as Server-Sent Events
+    
+    Events: `delta` ({"text"}) as the answer is generated, then `done`
+    (same fields as POST /chat) once the message is saved, or `error`
+    (with "incomplete": true if the answer broke off mid-stream; it is not saved).
+    """
+    try:
+        events = await chat_service.ask_question_stream(
+            analysis_id=analysis_id,
+            user_id=request.user_id,
+            question=request.question,
+            db=db
+        )
+    
+    except QuotaExceededError as e:
+        # Re-raise quota errors with proper status code
+        raise e
+    
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    except Exception as e:
+        print(f"Error in ask_question_stream: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="שגיאה בשליחת השאלה. נסה שוב."
+        )
+    
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/analyses/{analysis_id}/chat", response_model=ChatHistoryResponse)
 async def get_chat_history(
     analysis_id: int,
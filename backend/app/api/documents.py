@@ -39,6 +39,7 @@ async def upload_documents(
     print(f"✅ Startup ID: {startup.id}")
     
     uploaded_docs = []
+    documents = []
     texts_for_rag = []
     metadatas_for_rag = []
     
@@ -74,15 +75,21 @@ async def upload_documents(
                 meta_data=processed["metadata"]
             )
             db.add(doc)
+            db.flush()  # assigns doc.id for the chunk metadata
+            documents.append(doc)
             
-            # Prepare for RAG
-            texts_for_rag.append(processed["text"])
-            metadatas_for_rag.append({
+            # Prepare for RAG: one text per page/slide/sheet/section, its
+            # location merged into the document metadata of every chunk
+            document_metadata = {
                 "document_id": doc.id,
                 "filename": file.filename,
                 "file_type": doc.file_type,
                 "startup_name": startup_name
-            })
+            }
+            segments = processed.get("segments") or [{"text": processed["text"], "metadata": {}}]
+            for segment in segments:
+                texts_for_rag.append(segment["text"])
+                metadatas_for_rag.append({**document_metadata, **segment["metadata"]})
             
             uploaded_docs.append({
                 "filename": file.filename,
@@ -103,12 +110,19 @@ async def upload_documents(
     print(f"   Total chars: {sum(len(t) for t in texts_for_rag)}")
     
     try:
+        ids_by_document = {}
         vector_ids = await rag_service.add_documents(
             startup.id,
             texts_for_rag,
-            metadatas_for_rag
+            metadatas_for_rag,
+            ids_by_document=ids_by_document
         )
         print(f"✅ Added {len(vector_ids)} chunks to vector store")
+        
+        # Remember each file's chunk ids (per-document deletion)
+        for doc in documents:
+            doc.vector_ids = ids_by_document.get(doc.id, [])
+        db.commit()
     except Exception as e:
         print(f"❌ FAISS indexing failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to index documents: {str(e)}")
@@ -123,4 +137,62 @@ async def upload_documents(
         "uploaded_documents": uploaded_docs,
         "total_documents": len(uploaded_docs),
         "vector_chunks": len(vector_ids)
-    }
\ No newline at end of file
+    }
+
+
+@router.delete("/{document_id}")
+async def delete_document(document_id: int, db: Session = Depends(get_db)):
+    """Delete one document: its vectors, cached search results and file"""
+    try:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        # Uploaded before per-document chunk ids: its chunks only carry the filename
+        legacy = doc.vector_ids is None
+        if legacy:
+            same_name = db.query(Document).filter(
+                Document.startup_id == doc.startup_id,
+                Document.filename == doc.filename,
+                Document.id != doc.id
+            ).all()
+            if any(other.vector_ids is None for other in same_name):
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Cannot tell the chunks of '{doc.filename}' apart from another upload "
+                           f"with the same name - re-index this startup's documents first"
+                )
+        
+        # Remove only this file's chunks (the rest of the index is untouched)
+        removed = await rag_service.delete_document(
+            doc.startup_id,
+            doc.id,
+            doc.vector_ids,
+            legacy_filename=doc.filename if legacy else None
+        )
+        warning = None
+        if legacy and not removed:
+            warning = "No indexed chunks found for this document; nothing was removed from the vector store"
+            print(f"⚠️ Document {doc.id} ('{doc.filename}'): {warning}")
+        
+        if doc.file_path and os.path.exists(doc.file_path):
+            try:
+                os.remove(doc.file_path)
+            except Exception as e:
+                print(f"Failed to delete file {doc.file_path}: {e}")
+        
+        db.delete(doc)
+        db.commit()
+        
+        return {
+            "message": f"Document '{doc.filename}' deleted successfully",
+            "deleted_id": document_id,
+            "vector_chunks_removed": removed,
+            "warning": warning
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
@@ -11,6 +11,57 @@ import shutil
 router = APIRouter()
 
 
+def _startup_names(db: Session, startup_ids: List[int]) -> dict:
+    """id -> name for the startups that still exist"""
+    rows = db.query(Startup.id, Startup.name).filter(Startup.id.in_(startup_ids)).all()
+    return {row.id: row.name for row in rows}
+
+
+@router.get("/search")
+async def portfolio_search(q: str, k: int = 10, db: Session = Depends(get_db)):
+    """Search across all startups' documents (nearest startups by centroid, then their chunks)"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    try:
+        results = await rag_service.portfolio_search(q, k=k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Portfolio search failed: {str(e)}")
+    
+    names = _startup_names(db, [r["startup_id"] for r in results])
+    return {
+        "query": q,
+        "results": [
+            {**r, "name": names[r["startup_id"]]}
+            for r in results
+            if r["startup_id"] in names
+        ]
+    }
+
+
+@router.get("/{startup_id}/similar")
+async def similar_startups(startup_id: int, k: int = 5, db: Session = Depends(get_db)):
+    """Startups most similar to this one (centroid of their document embeddings)"""
+    startup = db.query(Startup).filter(Startup.id == startup_id).first()
+    if not startup:
+        raise HTTPException(status_code=404, detail="Startup not found")
+    
+    try:
+        # Over-fetch a little: results are filtered to startups still in the DB
+        results = await rag_service.similar_startups(startup_id, k=k + 5)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+    
+    names = _startup_names(db, [r["startup_id"] for r in results])
+    return {
+        "startup_id": startup_id,
+        "similar": [
+            {**r, "name": names[r["startup_id"]]}
+            for r in results
+            if r["startup_id"] in names
+        ][:k]
+    }
+
+
 @router.delete("/{startup_id}")
 async def delete_startup(startup_id: int, db: Session = Depends(get_db)):
     """Delete a startup and all its related data"""
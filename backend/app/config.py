@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 
 
 class Settings(BaseSettings):
@@ -9,6 +9,24 @@ class Settings(BaseSettings):
     # Google Gemini
     GOOGLE_API_KEY: str = ""
     GEMINI_MODEL: str = "models/gemini-2.5-flash"
+    LLM_MAX_CONCURRENCY: int = 16         # Gemini calls in flight at once (async gRPC, no thread pool)
+    LLM_MODEL_CACHE_FILE: str = "data/llm_model.json"  # Last discovered working model
+    LLM_MODEL_CACHE_TTL_HOURS: float = 24.0  # Revalidate the cached model after this
+    LLM_RPM_LIMIT: int = 300              # Requests/min ceiling (token bucket)
+    LLM_TPM_LIMIT: int = 1000000          # Prompt tokens/min ceiling (token bucket)
+    LLM_MIN_RPM: int = 10                 # AIMD floor after repeated quota errors
+    LLM_AIMD_INCREASE_RPM: float = 5.0    # Rate regained per successful call
+    LLM_AIMD_DECREASE_FACTOR: float = 0.5  # Rate multiplier on a quota error (429)
+    LLM_CACHE_ENABLED: bool = True        # Response cache for opted-in low-temperature calls
+    LLM_CACHE_PATH: str = "data/llm_cache/responses.sqlite3"
+    LLM_CACHE_MAX_MB: int = 64            # LRU eviction beyond this much response text
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.5  # Hotter calls are never cached
+    LLM_CACHE_BYPASS: bool = False        # Global bypass: always call the model (still refreshes)
+    LLM_ROUTING_ENABLED: bool = True      # Route call sites to lite/flash/pro tiers (off: all on flash)
+    LLM_ROUTE_OVERRIDES: Dict[str, str] = {}  # e.g. {"reasoning": "flash"} (JSON in env)
+    LLM_LITE_MAX_TOKENS: int = 16000      # Output cap per tier (thinking tokens count against it)
+    LLM_FLASH_MAX_TOKENS: int = 16000
+    LLM_PRO_MAX_TOKENS: int = 16000
     
     # ✅ Tavily Search API - NEW
     TAVILY_API_KEY: str = ""
@@ -16,6 +34,52 @@ class Settings(BaseSettings):
     # Storage
     UPLOAD_DIR: str = "data/uploads"
     VECTOR_STORE_DIR: str = "data/vector_store"
+    VECTOR_STORE_MEMORY_BUDGET_MB: int = 192  # RAM budget for resident vector stores
+    SEGMENT_COMPACTION_THRESHOLD: int = 8     # Merge a startup's segments beyond this count
+    SEGMENT_TOMBSTONE_COMPACTION_RATIO: float = 0.2  # ...or once this share of a segment is deleted
+    PREWARM_STARTUPS: int = 10                # Recently active startups loaded at boot (0 = off)
+    PORTFOLIO_SEARCH_STARTUPS: int = 8        # Stores probed per portfolio search (nearest centroids)
+    PORTFOLIO_SAVE_DELAY_SECONDS: float = 5.0  # Debounce for persisting the portfolio index
+    
+    # Vector index (per segment): flat | fp16 | sq8 | ivfpq
+    VECTOR_INDEX_TYPE: str = "flat"            # Exact search; quantized types are opt-in (see index_recall_benchmark)
+    VECTOR_INDEX_SQ_MIN_VECTORS: int = 256     # Smaller segments stay flat (too few to train sq8)
+    VECTOR_INDEX_IVF_MIN_VECTORS: int = 20000  # ivfpq only for segments at least this large
+    VECTOR_INDEX_PQ_M: int = 96                # PQ bytes per vector (must divide the dimension)
+    VECTOR_INDEX_NPROBE: int = 16              # IVF lists probed per query
+    EMBEDDING_TRUNCATE_DIM: int = 0            # Matryoshka: index the first N dims (renormalized); 0 = full
+    TWO_STAGE_RESCORE: bool = False            # Rescore coarse hits with exact full-dim vectors (vectors.npy)
+    RESCORE_CANDIDATES: int = 50               # Coarse hits per query that get rescored
+    
+    # Hybrid retrieval (BM25 + dense, reciprocal-rank fusion)
+    HYBRID_SEARCH: bool = True
+    HYBRID_CANDIDATES: int = 20                # Candidates per retriever before fusion
+    RRF_K: int = 60
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    QUERY_EMBEDDING_TIMEOUT_SECONDS: float = 8.0  # Slower than this -> lexical-only results
+    QUERY_EMBEDDING_MEMORY_ENTRIES: int = 1024    # Ad-hoc query vectors kept in RAM (LRU; all stay on disk)
+    
+    # Context assembly (MMR + adjacent-chunk merge + char budget)
+    CONTEXT_ASSEMBLY: bool = True
+    CONTEXT_CANDIDATE_MULTIPLIER: int = 3      # Candidates retrieved per requested chunk
+    CONTEXT_MMR_LAMBDA: float = 0.7            # 1.0 = pure relevance, 0.0 = pure diversity
+    CONTEXT_CHARS_PER_CHUNK: int = 1000        # Char budget = max_chunks * this (chunk_size)
+    
+    # Embeddings
+    EMBEDDING_PROVIDER: str = "gemini"    # gemini (API) | static (local CPU) | hashing (tests/offline)
+    EMBEDDING_MODEL: str = "models/text-embedding-004"
+    EMBEDDING_STATIC_MODEL_DIR: str = "data/static_embeddings"  # vocab.txt + embeddings.npy
+    EMBEDDING_HASHING_DIM: int = 768
+    EMBEDDING_CACHE_DIR: str = "data/embedding_cache"
+    EMBEDDING_BATCH_SIZE: int = 100       # Chunks per embedding API call
+    EMBEDDING_CONCURRENCY: int = 4        # Batches in flight at once
+    EMBEDDING_MAX_RETRIES: int = 4        # Retries per failed batch (exponential backoff)
+    
+    # Query result cache (RAG search results)
+    QUERY_CACHE_MAX_ENTRIES: int = 2000
+    QUERY_CACHE_MAX_MB: int = 16
+    QUERY_CACHE_TTL_SECONDS: int = 3600   # 0 = no expiry
     
     # Application
     APP_NAME: str = "Startup Analyzer AI"
@@ -3,14 +3,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api import chat
 from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
+
+from sqlalchemy import func
 
 from .config import settings
-from .database import init_db
+from .database import init_db, SessionLocal
+from .models.models import Analysis, ChatMessage
 from .api import documents, analysis, scoring, market, reports, startups
+from .services.rag_service import rag_service
+from .services.llm_service import llm_service
 
 # Create upload directory
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.VECTOR_STORE_DIR, exist_ok=True)
+os.makedirs(settings.EMBEDDING_CACHE_DIR, exist_ok=True)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -43,10 +50,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def recently_active_startups(limit: int) -> list:
+    """Startup ids ordered by their latest analysis or chat message (most recent first)"""
+    db = SessionLocal()
+    try:
+        last_activity = dict(
+            db.query(Analysis.startup_id, func.max(Analysis.created_at))
+            .group_by(Analysis.startup_id)
+            .all()
+        )
+        chats = (
+            db.query(Analysis.startup_id, func.max(ChatMessage.created_at))
+            .join(ChatMessage, ChatMessage.analysis_id == Analysis.id)
+            .group_by(Analysis.startup_id)
+            .all()
+        )
+        for startup_id, last_chat in chats:
+            if last_chat is not None and (last_activity.get(startup_id) is None or last_chat > last_activity[startup_id]):
+                last_activity[startup_id] = last_chat
+    finally:
+        db.close()
+    ranked = sorted(
+        (startup_id for startup_id, at in last_activity.items() if at is not None),
+        key=lambda startup_id: last_activity[startup_id],
+        reverse=True
+    )
+    return ranked[:limit]
+
+
+async def prewarm_vector_stores():
+    """⚡ Load recently active startups' stores + query embeddings after a restart"""
+    try:
+        loop = asyncio.get_event_loop()
+        startup_ids = await loop.run_in_executor(None, recently_active_startups, settings.PREWARM_STARTUPS)
+        if startup_ids:
+            await rag_service.prewarm(startup_ids)
+    except Exception as e:
+        print(f"⚠️ Prewarm failed: {str(e)}")
+
+
+# Background startup tasks: the event loop only keeps weak references to
+# tasks, so they are held here until they finish (and cancelled on shutdown)
+background_tasks: set = set()
+
+
+def _finish_background_task(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Background task {task.get_name()} failed: {task.exception()}")
+
+
+def start_background_task(coro, name: str) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    background_tasks.add(task)
+    task.add_done_callback(_finish_background_task)
+    return task
+
+
 # Initialize database
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # ⚡ Load the portfolio centroids in the background (first run backfills them)
+    start_background_task(rag_service.load_portfolio(), "load_portfolio")
+    # ⚡ Revalidate the cached Gemini model choice in the background (no probes at import)
+    start_background_task(llm_service.revalidate_model(), "revalidate_model")
+    # ⚡ Warm the most recently active startups in the background
+    if settings.PREWARM_STARTUPS > 0:
+        start_background_task(prewarm_vector_stores(), "prewarm_vector_stores")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop startup work that is still running (e.g. a long portfolio backfill)
+    for task in list(background_tasks):
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # 📊 Per-route LLM latency/tokens/cost for this process's lifetime
+    llm_service.print_stats()
 
 # Health check
 @app.get("/")
@@ -58,8 +138,11 @@ async def root():
     }
 
 @app.get("/health")
-async def health():
-    return {"status": "healthy"}
+async def health(stats: bool = False):
+    """Liveness check; ?stats=true adds LLM routing, rate limiter and response cache statistics"""
+    if not stats:
+        return {"status": "healthy"}
+    return {"status": "healthy", "llm": llm_service.get_stats()}
 
 # Include routers
 app.include_router(documents.router, prefix="/api/documents", tags=["Documents"])
@@ -14,7 +14,7 @@ class AnalyzerService:
     KEY IMPROVEMENTS:
     1. ✅ Run all 9 analysis queries in parallel (not serial!)
     2. ✅ Single web search (cached and reused)
-    3. ✅ Batch RAG queries
+    3. ✅ Batch RAG queries (one embedding call + one FAISS search for all 9)
     4. ✅ Async-native throughout
     5. ✅ LLM-based semantic deduplication (NEW!)
     
@@ -78,15 +78,26 @@ class AnalyzerService:
         
         phase2_start = asyncio.get_event_loop().time()
         
+        # ⚡ Retrieve context for all queries in one batched search
+        try:
+            contexts = await rag_service.batch_get_context(
+                startup_id,
+                self.ANALYSIS_QUERIES,
+                max_chunks=3
+            )
+        except Exception as e:
+            print(f"⚠️ Batched retrieval failed: {e}")
+            contexts = [[] for _ in self.ANALYSIS_QUERIES]
+        
         # Create tasks for all queries
         analysis_tasks = [
             self._analyze_single_query(
-                startup_id,
                 query,
+                context,
                 web_validation,
                 index + 1
             )
-            for index, query in enumerate(self.ANALYSIS_QUERIES)
+            for index, (query, context) in enumerate(zip(self.ANALYSIS_QUERIES, contexts))
         ]
         
         # Execute all analyses in parallel
@@ -182,21 +193,14 @@ class AnalyzerService:
     
     async def _analyze_single_query(
         self,
-        startup_id: int,
         query: str,
+        context: List[str],
         web_validation: str,
         query_num: int
     ) -> Dict[str, Any]:
-        """Analyze a single query - runs in parallel with others"""
+        """Analyze a single query with its pre-fetched RAG context - runs in parallel with others"""
         
         try:
-            # Get context from RAG (cached)
-            context = await rag_service.get_context(
-                startup_id,
-                query,
-                max_chunks=3
-            )
-            
             if not context or sum(len(c) for c in context) < 50:
                 print(f"   ⚠️ Query {query_num}: Insufficient context")
                 return {
@@ -324,7 +328,9 @@ CRITICAL: Respond with ONLY valid JSON, no markdown, no explanations:
 }}"""
 
             result = await llm_service.generate_structured(
-                prompt=prompt
+                prompt=prompt,
+                cache_version="dedup-v1",
+                route="dedup"
             )
             
             print(f"   ✅ LLM deduplication complete:")
@@ -366,5 +372,8 @@ CRITICAL: Respond with ONLY valid JSON, no markdown, no explanations:
             }
 
 
+# ⚡ Fixed queries: embedded once and persisted by the RAG service
+rag_service.register_fixed_queries(AnalyzerService.ANALYSIS_QUERIES)
+
 # Singleton
 analyzer_service = AnalyzerService()
\ No newline at end of file
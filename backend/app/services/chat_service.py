@@ -3,10 +3,11 @@ Chat Service
 Handles chat conversations about analyses using RAG (Retrieval-Augmented Generation)
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterator
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from ..database import SessionLocal
 from ..models.models import Analysis, ChatMessage, Document
 from .rate_limit_service import rate_limit_service
 from .rag_service import rag_service
@@ -35,6 +36,98 @@ class ChatService:
         Returns:
             Dict with answer, context, and metadata
         """
+        # 1-4. Analysis, rate limits, RAG context
+        analysis, context_chunks, context_str = await self._prepare_question(
+            analysis_id, user_id, question, db
+        )
+        
+        # 5. Generate answer using LLM
+        answer, tokens_used = await self._generate_answer(
+            question=question,
+            context=context_str,
+            analysis=analysis
+        )
+        
+        # 6-8. Save chat message + counters
+        return self._save_message(db, analysis, user_id, question, answer, context_chunks, tokens_used)
+    
+    async def ask_question_stream(
+        self,
+        analysis_id: int,
+        user_id: str,
+        question: str,
+        db: Session
+    ) -> AsyncIterator[Dict]:
+        """
+        ⚡ Streaming variant of ask_question
+        
+        Validation (analysis, rate limits) and retrieval happen eagerly, so
+        errors still surface before any byte is sent. Returns an async iterator
+        of events: {"event": "delta", "data": {"text"}} while the answer is
+        generated, then {"event": "done", "data": <saved message>} once the
+        ChatMessage row is persisted. If generation fails after some deltas,
+        the stream ends with {"event": "error", "data": {"detail", "incomplete"}}
+        and the truncated answer is not saved.
+        """
+        analysis, context_chunks, context_str = await self._prepare_question(
+            analysis_id, user_id, question, db
+        )
+        prompt = self._build_prompt(question, context_str)
+        return self._stream_answer(analysis_id, user_id, question, prompt, context_chunks)
+    
+    async def _stream_answer(
+        self,
+        analysis_id: int,
+        user_id: str,
+        question: str,
+        prompt: str,
+        context_chunks: List[Dict]
+    ) -> AsyncIterator[Dict]:
+        parts: List[str] = []
+        try:
+            async for delta in llm_service.generate_stream(
+                prompt=prompt,
+                temperature=0.7,
+                max_tokens=1000,
+                route="chat"
+            ):
+                parts.append(delta)
+                yield {"event": "delta", "data": {"text": delta}}
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            if parts:
+                # Truncated answer: tell the client, never store it as a complete message
+                yield {"event": "error", "data": {"detail": self._error_answer(question), "incomplete": True}}
+                return
+            error_answer = self._error_answer(question)
+            parts.append(error_answer)
+            yield {"event": "delta", "data": {"text": error_answer}}
+        
+        answer = self._fallback_if_empty("".join(parts).strip(), question)
+        tokens_used = len(prompt.split()) + len(answer.split())
+        
+        # The request's session may already be closed - persist with our own
+        db = SessionLocal()
+        try:
+            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+            message = self._save_message(db, analysis, user_id, question, answer, context_chunks, tokens_used)
+        finally:
+            db.close()
+        yield {"event": "done", "data": message}
+    
+    async def _prepare_question(
+        self,
+        analysis_id: int,
+        user_id: str,
+        question: str,
+        db: Session
+    ) -> tuple:
+        """
+        Steps 1-4 shared by both chat paths
+        
+        Returns:
+            Tuple of (analysis, context_chunks, context_str)
+        """
         # 1. Get the analysis first
         analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
         if not analysis:
@@ -59,12 +152,20 @@ class ChatService:
         # 4. Build context string
         context_str = self._build_context_string(context_chunks, analysis)
         
-        # 5. Generate answer using LLM
-        answer, tokens_used = await self._generate_answer(
-            question=question,
-            context=context_str,
-            analysis=analysis
-        )
+        return analysis, context_chunks, context_str
+    
+    def _save_message(
+        self,
+        db: Session,
+        analysis: Analysis,
+        user_id: str,
+        question: str,
+        answer: str,
+        context_chunks: List[Dict],
+        tokens_used: int
+    ) -> Dict:
+        """Steps 6-8: persist the ChatMessage and bump the question counters"""
+        analysis_id = analysis.id
         
         # 6. Calculate estimated cost
         estimated_cost = self._calculate_cost(tokens_used)
@@ -250,28 +351,7 @@ class ChatService:
         Returns:
             Tuple of (answer, tokens_used)
         """
-        
-        # Build prompt in English with instruction to match user's language
-        system_prompt = """You are an expert AI assistant specializing in startup analysis and venture capital due diligence.
-
-    CRITICAL: Respond in the SAME LANGUAGE as the user's question (Hebrew if Hebrew, English if English)."""
-
-        prompt = f"""A user has asked a specific question about a startup analysis that has already been completed.
-
-    === ANALYSIS CONTEXT ===
-    {context}
-
-    === USER'S QUESTION ===
-    {question}
-
-    === INSTRUCTIONS ===
-    1. Answer ONLY the specific question asked - stay focused
-    2. Base your answer STRICTLY on the context provided above
-    3. If the information is not in the context, clearly state that in the same language
-    4. Keep your answer concise and professional (3-5 sentences)
-    5. If asked about scores/ratings, explain the reasoning behind them using the context
-
-    Answer (in the same language as the question):"""
+        prompt = self._build_prompt(question, context)
         
         try:
             # Use LLM service - it returns a dict with 'response' key
@@ -279,7 +359,8 @@ class ChatService:
                 prompt=prompt,
                 context=None,
                 temperature=0.7,
-                max_tokens=1000  # Increased from 500
+                max_tokens=1000,  # Increased from 500
+                route="chat"
             )
             
             # Extract answer from response
@@ -289,14 +370,7 @@ class ChatService:
             else:
                 answer = str(result)
             
-            answer = answer.strip()
-            
-            # If answer is empty or too short, provide fallback
-            if not answer or len(answer) < 10:
-                if any(ord(c) > 127 for c in question):  # Hebrew
-                    answer = "מצטער, לא הצלחתי לייצר תשובה מספקת. אנא נסה לנסח את השאלה אחרת."
-                else:
-                    answer = "Sorry, I couldn't generate a sufficient answer. Please try rephrasing your question."
+            answer = self._fallback_if_empty(answer.strip(), question)
             
             # Estimate tokens (rough calculation)
             tokens_used = len(prompt.split()) + len(answer.split())
@@ -309,11 +383,47 @@ class ChatService:
             traceback.print_exc()
             
             # Return error in same language as question
-            if any(ord(c) > 127 for c in question):  # Hebrew or non-ASCII
-                return "מצטער, אירעה שגיאה בעיבוד השאלה. אנא נסה שוב.", 0
-            else:
-                return "Sorry, an error occurred while processing your question. Please try again.", 0
-            
+            return self._error_answer(question), 0
+    
+    def _build_prompt(self, question: str, context: str) -> str:
+        """Chat prompt (shared by the blocking and streaming paths)"""
+        # Build prompt in English with instruction to match user's language
+        system_prompt = """You are an expert AI assistant specializing in startup analysis and venture capital due diligence.
+
+    CRITICAL: Respond in the SAME LANGUAGE as the user's question (Hebrew if Hebrew, English if English)."""
+
+        prompt = f"""A user has asked a specific question about a startup analysis that has already been completed.
+
+    === ANALYSIS CONTEXT ===
+    {context}
+
+    === USER'S QUESTION ===
+    {question}
+
+    === INSTRUCTIONS ===
+    1. Answer ONLY the specific question asked - stay focused
+    2. Base your answer STRICTLY on the context provided above
+    3. If the information is not in the context, clearly state that in the same language
+    4. Keep your answer concise and professional (3-5 sentences)
+    5. If asked about scores/ratings, explain the reasoning behind them using the context
+
+    Answer (in the same language as the question):"""
+        return prompt
+    
+    def _fallback_if_empty(self, answer: str, question: str) -> str:
+        """If answer is empty or too short, provide fallback"""
+        if not answer or len(answer) < 10:
+            if any(ord(c) > 127 for c in question):  # Hebrew
+                return "מצטער, לא הצלחתי לייצר תשובה מספקת. אנא נסה לנסח את השאלה אחרת."
+            return "Sorry, I couldn't generate a sufficient answer. Please try rephrasing your question."
+        return answer
+    
+    def _error_answer(self, question: str) -> str:
+        """Error message in the same language as the question"""
+        if any(ord(c) > 127 for c in question):  # Hebrew or non-ASCII
+            return "מצטער, אירעה שגיאה בעיבוד השאלה. אנא נסה שוב."
+        return "Sorry, an error occurred while processing your question. Please try again."
+    
     def _calculate_cost(self, tokens_used: int) -> float:
         """Calculate estimated cost based on tokens used"""
         # Gemini 2.5 Flash pricing (approximate)
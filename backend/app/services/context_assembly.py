@@ -0,0 +1,159 @@
+"""
+Context Assembly
+Turns ranked search results into a compact prompt context:
+MMR diversification -> merge adjacent chunks (overlap stripped) -> pack under a char budget
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """
+    Maximal marginal relevance over cosine similarity
+
+    Picks k candidate indices, trading relevance to the query (lambda_mult)
+    against similarity to what is already picked (1 - lambda_mult).
+    """
+    n = len(candidate_vectors)
+    if n <= k:
+        return list(range(n))
+
+    candidates = _unit(candidate_vectors)
+    relevance = candidates @ _unit(query_vector)
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    while len(selected) < k:
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        mmr[selected] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+# Shorter suffix/prefix matches are coincidence ("...engineers" + "sales..."), not splitter overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def _starts_token(text: str, position: int) -> bool:
+    """True if text[position:] does not begin in the middle of a word"""
+    return position == 0 or not (text[position - 1].isalnum() and text[position].isalnum())
+
+
+def strip_overlap(previous: str, following: str, max_overlap: int, min_overlap: int = MIN_OVERLAP_CHARS) -> str:
+    """
+    Drop the prefix of `following` that repeats the end of `previous`
+
+    Only a real splitter overlap counts: at least min_overlap chars, starting
+    on a token boundary of `previous`. Anything else is returned unchanged.
+    """
+    limit = min(len(previous), len(following), max_overlap)
+    for size in range(limit, max(min_overlap, 1) - 1, -1):
+        if previous.endswith(following[:size]) and _starts_token(previous, len(previous) - size):
+            return following[size:]
+    return following
+
+
+# Chunk ids keep counting across these boundaries, so neighbours must also share them
+LOCATION_KEYS = ("page", "slide", "sheet")
+
+
+def _document_key(metadata: Dict[str, Any]) -> Optional[Any]:
+    return metadata.get("document_id", metadata.get("filename"))
+
+
+def _location_key(metadata: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(metadata.get(key) for key in LOCATION_KEYS)
+
+
+def merge_adjacent(results: List[Dict[str, Any]], max_overlap: int) -> List[str]:
+    """
+    Merge chunks that are neighbours in the same document and on the same
+    page/slide/sheet (chunk_id n, n+1, ...) into one passage with the
+    splitter overlap removed.
+
+    Passages keep the rank of their best member.
+    """
+    groups: Dict[Tuple[Any, Tuple[Any, ...]], List[Tuple[int, Dict[str, Any]]]] = {}
+    passages: List[Tuple[int, str]] = []
+
+    for rank, result in enumerate(results):
+        metadata = result.get("metadata") or {}
+        document = _document_key(metadata)
+        chunk_id = metadata.get("chunk_id")
+        if document is None or chunk_id is None:
+            passages.append((rank, result["content"]))
+            continue
+        groups.setdefault((document, _location_key(metadata)), []).append((rank, result))
+
+    for members in groups.values():
+        members.sort(key=lambda member: member[1]["metadata"]["chunk_id"])
+        run_rank, run_text, last_chunk_id = None, "", None
+        for rank, result in members:
+            chunk_id = result["metadata"]["chunk_id"]
+            if run_rank is not None and chunk_id == last_chunk_id + 1:
+                continuation = strip_overlap(run_text, result["content"], max_overlap)
+                # No shared overlap (e.g. a splitter break on a separator): keep a separator
+                if len(continuation) == len(result["content"]):
+                    continuation = "\n" + continuation
+                run_text += continuation
+                run_rank = min(run_rank, rank)
+            else:
+                if run_rank is not None:
+                    passages.append((run_rank, run_text))
+                run_rank, run_text = rank, result["content"]
+            last_chunk_id = chunk_id
+        passages.append((run_rank, run_text))
+
+    passages.sort(key=lambda passage: passage[0])
+    return [text for _, text in passages]
+
+
+def pack_passages(passages: List[str], char_budget: int) -> List[str]:
+    """Keep passages in rank order while they fit; the first one is always kept (trimmed if needed)"""
+    packed, used = [], 0
+    for passage in passages:
+        if used + len(passage) <= char_budget:
+            packed.append(passage)
+            used += len(passage)
+        elif not packed:
+            packed.append(passage[:char_budget])
+            used = char_budget
+    return packed
+
+
+def assemble_context(
+    results: List[Dict[str, Any]],
+    max_chunks: int,
+    char_budget: int,
+    max_overlap: int,
+    query_vector: Optional[np.ndarray] = None,
+    candidate_vectors: Optional[np.ndarray] = None,
+    mmr_lambda: float = 0.7
+) -> List[str]:
+    """
+    ⚡ Ranked candidates -> packed context passages
+
+    Without vectors (lexical-only fallback) MMR is skipped and the top
+    max_chunks results are used as ranked.
+    """
+    if query_vector is not None and candidate_vectors is not None and len(candidate_vectors) == len(results):
+        picked = sorted(mmr_select(query_vector, candidate_vectors, max_chunks, mmr_lambda))
+        selected = [results[i] for i in picked]
+    else:
+        selected = results[:max_chunks]
+
+    return pack_passages(merge_adjacent(selected, max_overlap), char_budget)
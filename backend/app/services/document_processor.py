@@ -1,6 +1,6 @@
 import os
 import google.generativeai as genai
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from PyPDF2 import PdfReader
 from docx import Document as DocxDocument
 from pptx import Presentation
@@ -11,7 +11,28 @@ from ..config import settings
 genai.configure(api_key=settings.GOOGLE_API_KEY)
 
 class DocumentProcessor:
-    """Process various document types and extract text"""
+    """
+    Process various document types and extract text
+    
+    Every processor returns {"text", "metadata", "segments"}: "segments" is the
+    same text split at its natural boundaries (PDF page, slide, sheet, DOCX
+    heading), each with metadata ({"page": 3}, {"slide": 5, "section": "Team"},
+    {"sheet": "P&L"}) that rag_service stores on every chunk for filtered search.
+    """
+    
+    @staticmethod
+    def _segment(text: str, **metadata) -> Dict[str, Any]:
+        return {"text": text, "metadata": {k: v for k, v in metadata.items() if v}}
+    
+    @staticmethod
+    def _page_title(page_text: str) -> str:
+        """First line of a page if it looks like a heading (slide decks exported to PDF)"""
+        first_line = page_text.strip().split("\n", 1)[0].strip()
+        return first_line if 0 < len(first_line) <= 80 else ""
+    
+    @staticmethod
+    def _join(segments: List[Dict[str, Any]], separator: str = "\n\n") -> str:
+        return separator.join(segment["text"] for segment in segments).strip()
     
     @staticmethod
     def process_pdf(file_path: str) -> Dict[str, Any]:
@@ -27,10 +48,17 @@ class DocumentProcessor:
                 "file_type": "pdf"
             }
             
-            for page in reader.pages:
-                text += page.extract_text() + "\n\n"
+            segments = []
+            for page_number, page in enumerate(reader.pages, start=1):
+                page_text = (page.extract_text() or "").strip()
+                if page_text:
+                    segments.append(DocumentProcessor._segment(
+                        page_text,
+                        page=page_number,
+                        section=DocumentProcessor._page_title(page_text)
+                    ))
             
-            text = text.strip()
+            text = DocumentProcessor._join(segments)
             
             # 2. Vision Fallback (if text is empty/short)
             if len(text) < 50:
@@ -39,7 +67,8 @@ class DocumentProcessor:
             
             return {
                 "text": text,
-                "metadata": metadata
+                "metadata": metadata,
+                "segments": segments
             }
             
         except Exception as e:
@@ -77,7 +106,8 @@ class DocumentProcessor:
                 "metadata": {
                     "file_type": "pdf_scanned",
                     "ocr_engine": "gemini_vision_flash"
-                }
+                },
+                "segments": [DocumentProcessor._segment(transcription)]
             }
             
         except Exception as e:
@@ -88,7 +118,22 @@ class DocumentProcessor:
         """Extract text from DOCX"""
         try:
             doc = DocxDocument(file_path)
-            text = "\n\n".join([para.text for para in doc.paragraphs if para.text])
+            
+            # One segment per heading (paragraphs before the first heading: untitled)
+            sections: List[Tuple[str, List[str]]] = [("", [])]
+            for para in doc.paragraphs:
+                if not para.text:
+                    continue
+                style = para.style.name if para.style is not None else ""
+                if style.startswith("Heading") or style == "Title":
+                    sections.append((para.text.strip(), []))
+                sections[-1][1].append(para.text)
+            
+            segments = [
+                DocumentProcessor._segment("\n\n".join(paragraphs), section=heading)
+                for heading, paragraphs in sections if paragraphs
+            ]
+            text = DocumentProcessor._join(segments)
             
             metadata = {
                 "paragraphs": len(doc.paragraphs),
@@ -96,8 +141,9 @@ class DocumentProcessor:
             }
             
             return {
-                "text": text.strip(),
-                "metadata": metadata
+                "text": text,
+                "metadata": metadata,
+                "segments": segments
             }
             
         except Exception as e:
@@ -108,13 +154,18 @@ class DocumentProcessor:
         """Extract text from PPTX"""
         try:
             prs = Presentation(file_path)
-            text = ""
+            segments = []
             
             for i, slide in enumerate(prs.slides):
-                text += f"\n--- Slide {i+1} ---\n"
+                slide_text = f"--- Slide {i+1} ---\n"
                 for shape in slide.shapes:
                     if hasattr(shape, "text"):
-                        text += shape.text + "\n"
+                        slide_text += shape.text + "\n"
+                title_shape = slide.shapes.title
+                title = title_shape.text.strip() if title_shape is not None and title_shape.has_text_frame else ""
+                segments.append(DocumentProcessor._segment(slide_text.strip(), slide=i + 1, section=title))
+            
+            text = DocumentProcessor._join(segments, "\n")
             
             metadata = {
                 "slides": len(prs.slides),
@@ -122,8 +173,9 @@ class DocumentProcessor:
             }
             
             return {
-                "text": text.strip(),
-                "metadata": metadata
+                "text": text,
+                "metadata": metadata,
+                "segments": segments
             }
             
         except Exception as e:
@@ -134,16 +186,19 @@ class DocumentProcessor:
         """Extract text from XLSX"""
         try:
             wb = openpyxl.load_workbook(file_path, data_only=True)
-            text = ""
+            segments = []
             
             for sheet_name in wb.sheetnames:
                 sheet = wb[sheet_name]
-                text += f"\n--- Sheet: {sheet_name} ---\n"
+                sheet_text = f"--- Sheet: {sheet_name} ---\n"
                 
                 for row in sheet.iter_rows(values_only=True):
                     row_text = "\t".join([str(cell) if cell is not None else "" for cell in row])
                     if row_text.strip():
-                        text += row_text + "\n"
+                        sheet_text += row_text + "\n"
+                segments.append(DocumentProcessor._segment(sheet_text.strip(), sheet=sheet_name))
+            
+            text = DocumentProcessor._join(segments, "\n")
             
             metadata = {
                 "sheets": len(wb.sheetnames),
@@ -151,8 +206,9 @@ class DocumentProcessor:
             }
             
             return {
-                "text": text.strip(),
-                "metadata": metadata
+                "text": text,
+                "metadata": metadata,
+                "segments": segments
             }
             
         except Exception as e:
@@ -0,0 +1,114 @@
+"""
+Embedding Cache
+Persistent, content-addressed storage for chunk embeddings
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import List, Optional, Dict, Any
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    ⚡ Disk-backed embedding cache keyed by (embedding model, SHA-256 of text)
+
+    Re-uploading a deck (or a new file that shares slides with an old one)
+    produces the same chunk texts, so their vectors are read from disk instead
+    of going back through the embedding API. Vectors are stored as float32
+    blobs in a single SQLite file (WAL mode, safe to share between threads).
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Content address for a chunk"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(
+        self,
+        model: str,
+        texts: List[str],
+        track: bool = True
+    ) -> List[Optional[np.ndarray]]:
+        """Look up vectors for texts; missing entries are returned as None"""
+        hashes = [self.hash_text(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        unique_hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique_hashes), self._LOOKUP_BATCH):
+                batch = unique_hashes[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+
+        results = [found.get(h) for h in hashes]
+        if not track:
+            return results
+        hit_count = sum(1 for r in results if r is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: np.ndarray):
+        """Store vectors for texts (existing entries are overwritten)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = [
+            (model, self.hash_text(text), int(vector.shape[0]), vector.tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Number of stored vectors (all models)"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(hit_rate, 2),
+        }
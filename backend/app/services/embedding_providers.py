@@ -0,0 +1,181 @@
+"""
+Embedding Providers
+Pluggable embedding backends for rag_service, selected with EMBEDDING_PROVIDER
+
+- gemini:  Gemini embeddings API (768-dim, network round-trip + rate limits)
+- static:  local static word vectors (vocab.txt + embeddings.npy), batched numpy mean pooling
+- hashing: deterministic feature-hashing embedder (no model files - tests / offline dev)
+"""
+
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import numpy as np
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface every embedding backend implements
+
+    model_id keys the persistent embedding cache, so switching providers
+    never mixes vectors from different models. Both are abstract: a backend
+    missing either fails when it is instantiated, not at the first embed.
+    """
+
+    name = "base"
+    # Local providers run in-process: no rate limits, no retries, queries embedded inline
+    is_local = False
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """Cache key of the model behind this provider"""
+
+    @abstractmethod
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Document (chunk) vectors as a float32 matrix"""
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Query vectors as a float32 matrix (same space as the documents)"""
+        return self.embed_documents(queries)
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Gemini embeddings API via LangChain (client injectable for benchmarks)"""
+
+    name = "gemini"
+
+    def __init__(self, model: str, api_key: str, client=None):
+        self.model = model
+        if client is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            client = GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key)
+        self.client = client
+
+    @property
+    def model_id(self) -> str:
+        # Unprefixed, so vectors cached before providers existed stay valid
+        return self.model
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.client.embed_documents(texts), dtype=np.float32)
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.client.embed_documents(queries, task_type="RETRIEVAL_QUERY"),
+            dtype=np.float32
+        )
+
+
+class StaticVectorEmbeddingProvider(EmbeddingProvider):
+    """
+    ⚡ Local CPU embeddings from a static token-vector table
+
+    Model directory:
+        vocab.txt        one token per line (row order of embeddings.npy)
+        embeddings.npy   (V, d) float16/float32 token vectors (memory-mapped)
+
+    Any static model works (model2vec / GloVe / fastText exports). A text's
+    vector is the mean of its known token vectors, L2-normalized; a whole
+    batch is one gather + one np.add.reduceat, so queries take microseconds.
+    """
+
+    name = "static"
+    is_local = True
+
+    def __init__(self, model_dir: str):
+        vocab_path = os.path.join(model_dir, "vocab.txt")
+        matrix_path = os.path.join(model_dir, "embeddings.npy")
+        if not (os.path.exists(vocab_path) and os.path.exists(matrix_path)):
+            raise FileNotFoundError(
+                f"Static embedding model not found in {model_dir} (expected vocab.txt + embeddings.npy)"
+            )
+        with open(vocab_path, encoding="utf-8") as f:
+            self.vocab = {line.rstrip("\n"): i for i, line in enumerate(f)}
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self.dim = self.matrix.shape[1]
+        self._model_name = os.path.basename(os.path.normpath(model_dir))
+
+    @property
+    def model_id(self) -> str:
+        return f"static:{self._model_name}:{self.dim}"
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        vocab = self.vocab
+        token_ids, lengths = [], []
+        for text in texts:
+            ids = [vocab[t] for t in _WORD_RE.findall(text.lower()) if t in vocab]
+            token_ids.extend(ids)
+            lengths.append(len(ids))
+
+        lengths = np.asarray(lengths, dtype=np.int64)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        has_tokens = lengths > 0
+        if token_ids:
+            gathered = np.asarray(self.matrix[np.asarray(token_ids, dtype=np.int64)], dtype=np.float32)
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[has_tokens]
+            vectors[has_tokens] = np.add.reduceat(gathered, starts, axis=0) / lengths[has_tokens, None]
+        return _normalize_rows(vectors)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic feature-hashing embedder (unigrams + bigrams, signed buckets)
+
+    No model files and no network - for tests, offline development and CI.
+    Captures lexical overlap only, not semantics.
+    """
+
+    name = "hashing"
+    is_local = True
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    @property
+    def model_id(self) -> str:
+        return f"hashing:{self.dim}"
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD_RE.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in features),
+                dtype=np.uint32,
+                count=len(features)
+            )
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dim, signs)
+        return _normalize_rows(vectors)
+
+
+def create_embedding_provider(
+    provider: str,
+    model: str,
+    api_key: str,
+    static_model_dir: Optional[str] = None,
+    hashing_dim: int = 768
+) -> EmbeddingProvider:
+    """Factory for EMBEDDING_PROVIDER"""
+    provider = provider.lower()
+    if provider == "gemini":
+        return GeminiEmbeddingProvider(model, api_key)
+    if provider == "static":
+        return StaticVectorEmbeddingProvider(static_model_dir)
+    if provider == "hashing":
+        return HashingEmbeddingProvider(hashing_dim)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER '{provider}' (expected gemini, static or hashing)")
@@ -0,0 +1,132 @@
+"""
+Index Factory
+Builds the FAISS index behind each vector store segment (flat / fp16 / sq8 / ivfpq)
+"""
+
+import math
+from typing import Optional
+import numpy as np
+import faiss
+
+from ..config import settings
+
+
+INDEX_TYPES = ("flat", "fp16", "sq8", "ivfpq")
+
+# IVF training wants ~39 points per centroid; PQ with 8 bits wants >= 256 points
+_POINTS_PER_CENTROID = 39
+_PQ_NBITS = 8
+
+
+def resolve_index_type(n: int, index_type: Optional[str] = None) -> str:
+    """
+    Index type actually used for a segment of n vectors
+
+    Quantizers that need training fall back to flat when the segment is too
+    small to train them well (small segments are cheap anyway; compaction
+    merges them into one large segment that gets the configured type).
+    """
+    index_type = (index_type or settings.VECTOR_INDEX_TYPE).lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown VECTOR_INDEX_TYPE '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+    if index_type == "sq8" and n < settings.VECTOR_INDEX_SQ_MIN_VECTORS:
+        return "flat"
+    if index_type == "ivfpq" and n < max(settings.VECTOR_INDEX_IVF_MIN_VECTORS, _POINTS_PER_CENTROID * (1 << _PQ_NBITS)):
+        return "flat"
+    return index_type
+
+
+def resolve_index_dim(d: int) -> int:
+    """Dimensions actually indexed for d-dim embeddings (EMBEDDING_TRUNCATE_DIM, 0 = all)"""
+    dim = settings.EMBEDDING_TRUNCATE_DIM
+    return dim if 0 < dim < d else d
+
+
+def truncate_vectors(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """
+    Matryoshka truncation: keep the first dim components and L2-renormalize
+
+    Vectors that already have <= dim components are returned unchanged.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape[-1] <= dim:
+        return vectors
+    head = vectors[..., :dim]
+    norms = np.linalg.norm(head, axis=-1, keepdims=True)
+    return np.ascontiguousarray(head / np.maximum(norms, 1e-12), dtype=np.float32)
+
+
+def _pq_subquantizers(d: int) -> int:
+    """Largest m <= VECTOR_INDEX_PQ_M that divides d"""
+    m = max(1, min(settings.VECTOR_INDEX_PQ_M, d))
+    while d % m:
+        m -= 1
+    return m
+
+
+def build_index(
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    index_type: Optional[str] = None
+) -> faiss.Index:
+    """
+    ⚡ Create, train (if needed) and fill an IndexIDMap2 for one segment
+
+    - flat:  exact float32 (4 bytes/dim)
+    - fp16:  float16 scalar quantizer (2 bytes/dim, no training)
+    - sq8:   8-bit scalar quantizer (1 byte/dim, trained on the segment)
+    - ivfpq: IVF + product quantizer (~VECTOR_INDEX_PQ_M bytes/vector), trained on the segment
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+    resolved = resolve_index_type(n, index_type)
+
+    if resolved == "fp16":
+        inner = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16)
+    elif resolved == "sq8":
+        inner = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit)
+    elif resolved == "ivfpq":
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // _POINTS_PER_CENTROID))
+        inner = faiss.IndexIVFPQ(faiss.IndexFlatL2(d), d, nlist, _pq_subquantizers(d), _PQ_NBITS)
+    else:
+        inner = faiss.IndexFlatL2(d)
+
+    if not inner.is_trained:
+        inner.train(vectors)
+
+    index = faiss.IndexIDMap2(inner)
+    index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index):
+    """Query-time knobs (nprobe for IVF) - applied at build and after every load"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(settings.VECTOR_INDEX_NPROBE, inner.nlist)
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Inverse of build_index: which type a (loaded) index is"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return "fp16" if inner.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "flat"
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """Resident size estimate: codes + id map (+ coarse centroids for IVF)"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    ntotal = inner.ntotal
+    id_bytes = ntotal * 8 if hasattr(index, "id_map") else 0
+
+    if isinstance(inner, faiss.IndexIVFPQ):
+        # codes + per-entry list ids, coarse centroids, PQ codebooks
+        pq_bytes = inner.pq.M * inner.pq.ksub * inner.pq.dsub * 4
+        return ntotal * (inner.code_size + 8) + inner.nlist * inner.d * 4 + pq_bytes + id_bytes
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return ntotal * inner.code_size + id_bytes
+    return ntotal * inner.d * 4 + id_bytes
@@ -0,0 +1,161 @@
+"""
+Lexical Index
+Compact BM25 inverted index stored next to each vector store segment
+
+Files in a segment directory:
+    lexical_vocab.json     terms, in term-id order
+    lexical_offsets.npy    int64 (V + 1) offsets into the postings arrays (CSR)
+    lexical_rows.npy       int32 row of each posting, grouped by term
+    lexical_tf.npy         float32 term frequency of each posting
+    lexical_doclen.npy     int32 token count per row
+"""
+
+import os
+import re
+import json
+from collections import Counter
+from typing import List, Dict, Iterable
+import numpy as np
+
+
+VOCAB_FILE = "lexical_vocab.json"
+OFFSETS_FILE = "lexical_offsets.npy"
+ROWS_FILE = "lexical_rows.npy"
+TF_FILE = "lexical_tf.npy"
+DOCLEN_FILE = "lexical_doclen.npy"
+
+# Words (any script - Hebrew decks too), numbers and compounds such as "ltv/cac", "b2b", "soc-2", "3.5x"
+_TOKEN_RE = re.compile(r"\w+(?:[/&.\-]\w+)*", re.UNICODE)
+_SPLIT_RE = re.compile(r"[/&.\-]")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or our that the their
+this to was were what which who will with we you your they them these those than then
+do does did can could would should about into over under more most other such
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compounds are kept whole AND split ("ltv/cac" -> ltv/cac, ltv, cac)"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token not in _STOPWORDS:
+            terms.append(token)
+        if _SPLIT_RE.search(token):
+            terms.extend(part for part in _SPLIT_RE.split(token) if part and part not in _STOPWORDS)
+    return terms
+
+
+class LexicalIndex:
+    """
+    ⚡ Inverted index for one segment (CSR postings, memory-mapped when loaded)
+
+    Scoring is vectorized per query term: one slice of the postings arrays,
+    one numpy expression, scattered into a dense per-row score vector.
+    """
+
+    def __init__(
+        self,
+        vocab: List[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tf: np.ndarray,
+        doc_lengths: np.ndarray
+    ):
+        self.vocab = vocab
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.rows = rows
+        self.tf = tf
+        self.doc_lengths = doc_lengths
+        self.total_length = int(np.sum(doc_lengths, dtype=np.int64))
+        self._vocab_bytes = sum(len(t) + 1 for t in vocab)
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "LexicalIndex":
+        term_ids: Dict[str, int] = {}
+        posting_terms, posting_rows, posting_tf, doc_lengths = [], [], [], []
+
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            doc_lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_rows.append(row)
+                posting_tf.append(count)
+
+        posting_terms = np.asarray(posting_terms, dtype=np.int64)
+        order = np.argsort(posting_terms, kind="stable")
+        offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(posting_terms, minlength=len(term_ids)))
+
+        return cls(
+            list(term_ids),
+            offsets,
+            np.asarray(posting_rows, dtype=np.int32)[order],
+            np.asarray(posting_tf, dtype=np.float32)[order],
+            np.asarray(doc_lengths, dtype=np.int32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.offsets.nbytes + self.rows.nbytes + self.tf.nbytes
+                + self.doc_lengths.nbytes + self._vocab_bytes)
+
+    def document_frequency(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return 0
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def score(
+        self,
+        terms: List[str],
+        idf: Dict[str, float],
+        avg_length: float,
+        k1: float = 1.2,
+        b: float = 0.75
+    ) -> np.ndarray:
+        """BM25 score of every row for the query terms (IDF/avgdl supplied by the caller)"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not len(self):
+            return scores
+
+        norm = k1 * (1 - b + b * self.doc_lengths / max(avg_length, 1e-9))
+        for term in terms:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            rows = self.rows[start:end]
+            tf = self.tf[start:end]
+            # rows are unique within one term's postings - plain fancy-index add is safe
+            scores[rows] += idf[term] * tf * (k1 + 1) / (tf + norm[rows])
+        return scores
+
+    def write(self, path: str):
+        with open(os.path.join(path, VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, separators=(",", ":"), ensure_ascii=False)
+        np.save(os.path.join(path, OFFSETS_FILE), self.offsets)
+        np.save(os.path.join(path, ROWS_FILE), self.rows)
+        np.save(os.path.join(path, TF_FILE), self.tf)
+        np.save(os.path.join(path, DOCLEN_FILE), self.doc_lengths)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, VOCAB_FILE))
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(os.path.join(path, VOCAB_FILE), encoding="utf-8") as f:
+            vocab = json.load(f)
+        return cls(
+            vocab,
+            np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, ROWS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, TF_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, DOCLEN_FILE), mmap_mode="r")
+        )
@@ -0,0 +1,126 @@
+"""
+LLM Response Cache
+Persistent, content-addressed storage for deterministic (low-temperature) LLM responses
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Dict, Any
+
+
+class LLMResponseCache:
+    """
+    ⚡ Disk-backed LLM response cache keyed by
+    (model, prompt hash, temperature, max_tokens, prompt-template version)
+
+    Re-running an analysis or score on unchanged documents sends byte-identical
+    prompts, so the response is read from disk instead of paying full LLM
+    latency and cost. Bumping a call site's template version invalidates its
+    entries. Size-bounded: least recently used responses are evicted once the
+    stored text exceeds max_bytes. Single SQLite file (WAL mode, thread-safe).
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int, template_version: str) -> str:
+        """Content address for one generation request"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha256(
+            json.dumps([model, prompt_hash, round(temperature, 4), max_tokens, template_version]).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, size, time.time())
+            )
+            self._bytes += size - (previous[0] if previous else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        """Drop least recently used responses until the size bound holds"""
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._bytes = 0
+                return
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._bytes = 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics"""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(hit_rate, 2),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,133 @@
+"""
+LLM Routing
+Call site -> model tier table for LLMService (cost/latency-aware routing)
+
+    lite    founder extraction, search-query generation, JSON dedup   cheapest, short outputs
+    flash   per-query analysis, category scoring, market, chat         default
+    pro     long-form reasoning (investment memo)                      slowest, most capable
+
+Every tier tries its preferred models first and then the general candidate
+list, so discovery and 404 fallback always end on a model that works.
+"""
+
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..config import settings
+
+
+DEFAULT_TIER = "flash"
+
+# Preferred models per tier (before LLMService.MODEL_CANDIDATES)
+TIER_PREFERENCES: Dict[str, List[str]] = {
+    "lite": ["gemini-2.5-flash-lite", "gemini-flash-lite-latest"],
+    "flash": [],
+    "pro": ["gemini-2.5-pro", "gemini-3-pro-preview", "gemini-pro-latest"],
+}
+
+# Output cap (Settings, default 16000 like every call site) and concurrency pool per tier
+TIER_LIMITS: Dict[str, Dict[str, int]] = {
+    "lite": {"max_tokens": settings.LLM_LITE_MAX_TOKENS, "concurrency": 8},
+    "flash": {"max_tokens": settings.LLM_FLASH_MAX_TOKENS, "concurrency": 12},
+    "pro": {"max_tokens": settings.LLM_PRO_MAX_TOKENS, "concurrency": 3},
+}
+
+# Call site -> tier (LLM_ROUTE_OVERRIDES can remap any of these)
+ROUTES: Dict[str, str] = {
+    "founders": "lite",
+    "search_queries": "lite",
+    "dedup": "lite",
+    "analysis": "flash",
+    "score": "flash",
+    "market": "flash",
+    "chat": "flash",
+    "reasoning": "pro",
+    "default": DEFAULT_TIER,
+}
+
+# Approximate list prices, USD per 1M tokens (input, output)
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+TIER_PRICES: Dict[str, Tuple[float, float]] = {
+    "lite": (0.10, 0.40),
+    "flash": (0.30, 2.50),
+    "pro": (1.25, 10.00),
+}
+
+
+def resolve_tier(route: str) -> str:
+    """Tier for a call site (unknown routes use the default tier)"""
+    if not settings.LLM_ROUTING_ENABLED:
+        return DEFAULT_TIER
+    tier = settings.LLM_ROUTE_OVERRIDES.get(route) or ROUTES.get(route, DEFAULT_TIER)
+    return tier if tier in TIER_LIMITS else DEFAULT_TIER
+
+
+def estimate_cost(tier: str, model_name: str, prompt_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model_name, TIER_PRICES[tier])
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class ModelTier:
+    """One routing tier: candidate models (active one first to try), output cap, concurrency pool"""
+
+    def __init__(self, name: str, candidates: List[str], max_tokens: int, concurrency: int):
+        self.name = name
+        self.candidates = candidates
+        self.max_tokens = max_tokens
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.model_name = candidates[0]
+        self.model = None
+
+
+class RouteStats:
+    """Latency / token / cost telemetry for one call site"""
+
+    __slots__ = ("calls", "errors", "latency_seconds", "max_latency_seconds",
+                 "prompt_tokens", "output_tokens", "cost_usd", "models")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.models: Dict[str, int] = {}
+
+    def record(
+        self,
+        tier: str,
+        model_name: str,
+        latency: float,
+        prompt_tokens: int,
+        output_tokens: int,
+        error: bool = False
+    ):
+        self.calls += 1
+        self.errors += int(error)
+        self.latency_seconds += latency
+        self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        self.models[model_name] = self.models.get(model_name, 0) + 1
+        if not error:
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self.cost_usd += estimate_cost(tier, model_name, prompt_tokens, output_tokens)
+
+    def to_dict(self, tier: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "tier": tier,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.latency_seconds / self.calls * 1000, 1) if self.calls else 0,
+            "max_latency_ms": round(self.max_latency_seconds * 1000, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "models": dict(self.models),
+        }
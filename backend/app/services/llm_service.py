@@ -1,11 +1,18 @@
 import google.generativeai as genai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
 import json
+import os
+import hashlib
 import re
 import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor
 from ..config import settings
+from .rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from .llm_cache import LLMResponseCache
+from .llm_routing import (
+    DEFAULT_TIER, TIER_LIMITS, TIER_PREFERENCES, ModelTier, RouteStats, resolve_tier
+)
 
 
 class LLMService:
@@ -14,76 +21,243 @@ class LLMService:
     
     ✅ FIXED: Updated to February 2026 available models
     ✅ FIXED: temperature parameter bug
+    ✅ Native async transport (generate_content_async over one multiplexed
+       HTTP/2 gRPC channel) - no thread pool, concurrency set by LLM_MAX_CONCURRENCY
+    ✅ Lazy model discovery: boots on the model cached on disk (no live probes
+       at import), revalidates in the background after startup, and falls back
+       to the next candidate at runtime if the chosen model starts returning 404
+    ✅ Token-bucket scheduling (RPM + TPM) with AIMD and Retry-After, instead
+       of an unlocked fixed 200ms spacing and fixed 2/4/6s sleeps
+    ✅ Persistent response cache for low-temperature calls (opt-in per call
+       site via cache_version) - re-runs on unchanged documents skip the LLM
+    ✅ generate_stream: async iterator of text deltas (chat SSE endpoint)
+    ✅ Single-flight coalescing: identical concurrent prompts share one call
+    ✅ Per-call-site routing to model tiers (lite / flash / pro), each with its
+       own output cap and concurrency pool, plus per-route latency/cost telemetry
     """
     
+    # ⚡ FEBRUARY 2026 MODELS (Updated per Gemini's recommendation) - in preference order
+    MODEL_CANDIDATES = [
+        # Performance Series (Fast & Cheap) - Best for RAG/Deduplication
+        "gemini-2.5-flash",           # Most stable and available (RECOMMENDED)
+        "gemini-3-flash-preview",     # Newest for AI Agents (January 2026)
+        "gemini-2.5-flash-lite",      # Most economical for simple tasks
+        
+        # Reasoning Series (Powerful) - Best for Deep Analysis
+        "gemini-2.5-pro",             # Stable powerful model with adaptive thinking
+        "gemini-3-pro-preview",       # Most powerful available (huge context)
+        
+        # Fallback to older naming conventions (just in case)
+        "gemini-flash-latest",
+        "gemini-pro-latest",
+    ]
+    
     def __init__(self):
         if not settings.GOOGLE_API_KEY:
             raise Exception("GOOGLE_API_KEY not set")
             
         genai.configure(api_key=settings.GOOGLE_API_KEY)
         
-        # ⚡ FEBRUARY 2026 MODELS (Updated per Gemini's recommendation)
-        models_to_try = [
-            # Performance Series (Fast & Cheap) - Best for RAG/Deduplication
-            "gemini-2.5-flash",           # Most stable and available (RECOMMENDED)
-            "gemini-3-flash-preview",     # Newest for AI Agents (January 2026)
-            "gemini-2.5-flash-lite",      # Most economical for simple tasks
-            
-            # Reasoning Series (Powerful) - Best for Deep Analysis
-            "gemini-2.5-pro",             # Stable powerful model with adaptive thinking
-            "gemini-3-pro-preview",       # Most powerful available (huge context)
-            
-            # Fallback to older naming conventions (just in case)
-            "gemini-flash-latest",
-            "gemini-pro-latest",
-        ]
+        # ⚡ Model tiers for call-site routing (lite / flash / pro), each with its
+        # own candidates, output cap and concurrency pool
+        self.tiers: Dict[str, ModelTier] = {
+            name: ModelTier(name, self._tier_candidates(name), limits["max_tokens"], limits["concurrency"])
+            for name, limits in TIER_LIMITS.items()
+        }
+        self.route_stats: Dict[str, RouteStats] = {}
         
-        self.model = None
-        self.model_name = None
-        last_error = None
+        # ⚡ No network here: start on the cached discovery result (or the preferred
+        # candidates); revalidate_model() runs in the background after startup
+        cached = self._read_model_cache()
+        for tier in self.tiers.values():
+            if cached and tier.name in cached["tiers"]:
+                tier.model_name = cached["tiers"][tier.name]
+            tier.model = genai.GenerativeModel(tier.model_name)
+        self._model_checked_at = cached["checked_at"] if cached else 0.0
+        self.model_fallbacks = 0
         
-        print("🔍 Searching for available Gemini model (February 2026)...")
-        for model_name in models_to_try:
-            try:
-                print(f"   Trying: {model_name}...", end="")
-                test_model = genai.GenerativeModel(model_name)
-                test_response = test_model.generate_content("Hi")
-                if test_response.text:
-                    self.model = test_model
-                    self.model_name = model_name
-                    print(f" ✅ SUCCESS!")
-                    print(f"✅ Using Gemini model: {model_name}")
-                    break
-            except Exception as e:
-                error_str = str(e)
-                # Don't print full 404 errors - they're expected
-                if "404" in error_str or "NOT_FOUND" in error_str:
-                    print(f" ❌ Not available")
-                else:
-                    print(f" ❌ {error_str[:50]}")
-                last_error = error_str
-                continue
-        
-        if not self.model:
-            print(f"\n❌ CRITICAL ERROR: No working Gemini model found!")
-            print(f"Last error: {last_error}")
-            print(f"\n💡 SOLUTION:")
-            print(f"   1. Check API key: https://aistudio.google.com/app/apikey")
-            print(f"   2. List available models with:")
-            print(f"      curl 'https://generativelanguage.googleapis.com/v1beta/models?key=YOUR_API_KEY'")
-            print(f"   3. Update models_to_try list in llm_service.py")
-            raise Exception(f"No working Gemini model found. Last error: {last_error}")
-        
-        # ⚡ Thread pool for true async (Gemini SDK is blocking)
-        self.executor = ThreadPoolExecutor(max_workers=10)
-        
-        # ⚡ Rate limiting: Max 5 concurrent requests to avoid quota errors
-        self._rate_limiter = asyncio.Semaphore(5)
-        self._last_request_time = 0
-        self._min_interval = 0.2  # 200ms between requests = 5 req/sec max
+        # ⚡ In-flight calls by (tier, prompt, temperature, max_tokens) - single-flight
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_calls = 0
+        
+        if cached:
+            age_hours = (time.time() - self._model_checked_at) / 3600
+            print(f"✅ Using cached Gemini models: {self._describe_tiers()} (validated {age_hours:.1f}h ago)")
+        else:
+            print(f"🔍 No cached Gemini models - starting on {self._describe_tiers()}, discovery runs after startup")
+        
+        # ⚡ Concurrency cap for the async client (calls share one keep-alive channel)
+        self._concurrency = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        
+        # ⚡ Rate limiting: RPM/TPM token buckets, adaptive (AIMD) on quota errors
+        self.limiter = AdaptiveRateLimiter(
+            rpm=settings.LLM_RPM_LIMIT,
+            tpm=settings.LLM_TPM_LIMIT,
+            min_rpm=settings.LLM_MIN_RPM,
+            increase_rpm=settings.LLM_AIMD_INCREASE_RPM,
+            decrease_factor=settings.LLM_AIMD_DECREASE_FACTOR
+        )
+        
+        # ⚡ Deterministic response cache (SQLite, size-bounded); its reads and
+        # writes run on one worker thread, never on the event loop
+        self.response_cache = LLMResponseCache(
+            settings.LLM_CACHE_PATH,
+            settings.LLM_CACHE_MAX_MB * 1024 * 1024
+        ) if settings.LLM_CACHE_ENABLED else None
+        self._cache_executor = ThreadPoolExecutor(max_workers=1) if self.response_cache else None
         
         print(f"⚡ LLM Service initialized with {self.model_name}")
-        print(f"⚡ Rate limiting: 5 concurrent, 200ms interval")
+        print(f"⚡ Rate limiting: {settings.LLM_MAX_CONCURRENCY} concurrent (async), "
+              f"{settings.LLM_RPM_LIMIT} RPM / {settings.LLM_TPM_LIMIT} TPM (adaptive)")
+    
+    # ─────────────────────────────────────────────
+    # Model tiers + discovery (cached on disk, revalidated in the background)
+    # ─────────────────────────────────────────────
+    @property
+    def model_name(self) -> str:
+        """Active model of the default tier"""
+        return self.tiers[DEFAULT_TIER].model_name
+    
+    @property
+    def model(self):
+        return self.tiers[DEFAULT_TIER].model
+    
+    @model.setter
+    def model(self, model):
+        self.tiers[DEFAULT_TIER].model = model
+    
+    def _tier_candidates(self, tier_name: str) -> List[str]:
+        """Tier preferences first, then the general list (deduplicated, in order)"""
+        return list(dict.fromkeys(TIER_PREFERENCES.get(tier_name, []) + self.MODEL_CANDIDATES))
+    
+    def _describe_tiers(self) -> str:
+        return ", ".join(f"{tier.name}={tier.model_name}" for tier in self.tiers.values())
+    
+    def _read_model_cache(self) -> Optional[Dict[str, Any]]:
+        """Cached discovery result per tier, keeping only current candidates"""
+        try:
+            with open(settings.LLM_MODEL_CACHE_FILE, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        tiers = cached.get("tiers") or {DEFAULT_TIER: cached.get("model")}
+        tiers = {
+            name: model_name for name, model_name in tiers.items()
+            if name in self.tiers and model_name in self.tiers[name].candidates
+        }
+        if not tiers:
+            return None
+        return {"tiers": tiers, "checked_at": cached.get("checked_at", 0.0)}
+    
+    def _write_model_cache(self):
+        """Atomic write (tmp file + rename) of the chosen models"""
+        try:
+            path = settings.LLM_MODEL_CACHE_FILE
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model": self.model_name,
+                    "tiers": {tier.name: tier.model_name for tier in self.tiers.values()},
+                    "checked_at": self._model_checked_at
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Failed to cache Gemini model choice: {str(e)}")
+    
+    def _model_cache_fresh(self) -> bool:
+        return time.time() - self._model_checked_at < settings.LLM_MODEL_CACHE_TTL_HOURS * 3600
+    
+    def _use_model(self, tier: ModelTier, model_name: str, model=None):
+        tier.model = model if model is not None else genai.GenerativeModel(model_name)
+        tier.model_name = model_name
+        self._model_checked_at = time.time()
+        self._write_model_cache()
+    
+    async def _probe(self, model_name: str) -> tuple:
+        """
+        One live "Hi" to a model
+        
+        Returns:
+            Tuple of (GenerativeModel or None, error string or None)
+        """
+        try:
+            model = genai.GenerativeModel(model_name)
+            response = await model.generate_content_async("Hi")
+            if response.text:
+                return model, None
+            return None, "Empty response"
+        except Exception as e:
+            error_str = str(e)
+            # Don't print full 404 errors - they're expected
+            if self._is_model_not_found(error_str):
+                print(f"   {model_name}: ❌ Not available")
+            else:
+                print(f"   {model_name}: ❌ {error_str[:50]}")
+            return None, error_str
+    
+    async def revalidate_model(self, force: bool = False) -> Optional[str]:
+        """
+        Probe each tier's candidates in preference order and persist the first
+        that answers (a model shared by several tiers is probed once)
+
+        Skipped while the cached choice is younger than LLM_MODEL_CACHE_TTL_HOURS
+        (unless force). Runs as a background task after startup, so a cold start
+        never waits for it.
+        """
+        if not force and self._model_cache_fresh():
+            return self.model_name
+        
+        print("🔍 Searching for available Gemini models (February 2026)...")
+        probes: Dict[str, Any] = {}
+        last_error = None
+        for tier in self.tiers.values():
+            for model_name in tier.candidates:
+                if model_name not in probes:
+                    probes[model_name], error = await self._probe(model_name)
+                    last_error = error or last_error
+                if probes[model_name] is not None:
+                    if model_name != tier.model_name:
+                        print(f"   🔄 Switching {tier.name} tier: {tier.model_name} → {model_name}")
+                    tier.model, tier.model_name = probes[model_name], model_name
+                    break
+        
+        if probes.get(self.model_name) is not None:
+            self._model_checked_at = time.time()
+            self._write_model_cache()
+            print(f"✅ Using Gemini models: {self._describe_tiers()}")
+            return self.model_name
+        
+        print(f"\n❌ CRITICAL ERROR: No working Gemini model found!")
+        print(f"Last error: {last_error}")
+        print(f"\n💡 SOLUTION:")
+        print(f"   1. Check API key: https://aistudio.google.com/app/apikey")
+        print(f"   2. List available models with:")
+        print(f"      curl 'https://generativelanguage.googleapis.com/v1beta/models?key=YOUR_API_KEY'")
+        print(f"   3. Update MODEL_CANDIDATES in llm_service.py")
+        return None
+    
+    @staticmethod
+    def _is_model_not_found(error_str: str) -> bool:
+        return "404" in error_str or "NOT_FOUND" in error_str
+    
+    def _fall_back(self, tier: ModelTier, failed_model: str) -> bool:
+        """
+        Move the tier to the candidate after failed_model; False when none are left
+
+        If another request already moved away from failed_model, just retry on
+        the current model.
+        """
+        if tier.model_name != failed_model:
+            return True
+        position = tier.candidates.index(failed_model) + 1 if failed_model in tier.candidates else 0
+        if position >= len(tier.candidates):
+            return False
+        next_model = tier.candidates[position]
+        print(f"⚠️ Gemini model {failed_model} not found - {tier.name} tier falling back to {next_model}")
+        self.model_fallbacks += 1
+        self._use_model(tier, next_model)
+        return True
     
     async def generate(
         self,
@@ -91,63 +265,274 @@ class LLMService:
         context: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 16000,
-        max_retries: int = 3
+        max_retries: int = 3,
+        cache_version: Optional[str] = None,
+        bypass_cache: bool = False,
+        route: str = "default",
+        validate: Optional[Callable[[str], bool]] = None
     ) -> str:
-        """Generate text using Gemini - TRUE ASYNC with rate limiting"""
-        
-        # ⚡ Rate limiting
-        async with self._rate_limiter:
-            # Enforce minimum interval between requests
-            now = time.time()
-            time_since_last = now - self._last_request_time
-            if time_since_last < self._min_interval:
-                await asyncio.sleep(self._min_interval - time_since_last)
-            self._last_request_time = time.time()
-            
-            full_prompt = prompt
-            if context:
-                full_prompt = f"Context:\n{context}\n\n{prompt}"
+        """
+        Generate text using Gemini - TRUE ASYNC with rate limiting
+        
+        cache_version opts the call into the response cache (the call site's
+        prompt-template version - bump it when the template changes);
+        bypass_cache skips the lookup but still stores the fresh response.
+        validate, when given, must accept a response before it is stored (and
+        a cached response it rejects is treated as a miss), so a truncated or
+        malformed reply is never replayed from the cache.
+        route names the call site (see llm_routing.ROUTES) and picks the model
+        tier; max_tokens is capped at the tier's limit.
+        """
+        full_prompt = prompt
+        if context:
+            full_prompt = f"Context:\n{context}\n\n{prompt}"
+        tier = self.tiers[resolve_tier(route)]
+        max_tokens = min(max_tokens, tier.max_tokens)
+        
+        # ⚡ Response cache (opted-in, low-temperature calls only)
+        cacheable = self._cacheable(temperature, cache_version)
+        if cacheable:
+            if bypass_cache or settings.LLM_CACHE_BYPASS:
+                self.response_cache.bypassed += 1
+            else:
+                cached = await self._cache_call(
+                    self.response_cache.get,
+                    self.response_cache.make_key(tier.model_name, full_prompt, temperature, max_tokens, cache_version)
+                )
+                if cached is not None and (validate is None or validate(cached)):
+                    return cached
+        
+        # ⚡ Single-flight: a caller with the same prompt in flight awaits that call
+        key = self._flight_key(tier.name, full_prompt, temperature, max_tokens)
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(
+                self._generate_once(tier, route, full_prompt, temperature, max_tokens, max_retries)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        else:
+            self.coalesced_calls += 1
+        
+        # shield: one waiter being cancelled must not cancel the shared call
+        text, model_name = await asyncio.shield(task)
+        if cacheable and leader and (validate is None or validate(text)):
+            await self._cache_call(
+                self.response_cache.put,
+                self.response_cache.make_key(model_name, full_prompt, temperature, max_tokens, cache_version),
+                model_name,
+                text
+            )
+        return text
+    
+    def _finish_flight(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter was cancelled
+    
+    async def _cache_call(self, fn: Callable, *args):
+        """Run a response cache (SQLite) operation on the cache worker thread"""
+        return await asyncio.get_event_loop().run_in_executor(self._cache_executor, fn, *args)
+    
+    @staticmethod
+    def _flight_key(tier_name: str, full_prompt: str, temperature: float, max_tokens: int) -> str:
+        return hashlib.sha256(f"{tier_name}|{temperature}|{max_tokens}|{full_prompt}".encode("utf-8")).hexdigest()
+    
+    async def _generate_once(
+        self,
+        tier: ModelTier,
+        route: str,
+        full_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        max_retries: int
+    ) -> tuple:
+        """
+        One rate-limited Gemini call with 404 / 429 handling
+        
+        Returns:
+            Tuple of (text, model that produced it)
+        """
+        # ⚡ Tier pool first (a slow pro call cannot starve lite calls), then the global cap
+        async with tier.semaphore, self._concurrency:
+            estimated_tokens = self._estimate_tokens(full_prompt)
             
             # ⚡ Retry logic for rate limit errors
-            for attempt in range(max_retries):
+            attempt = 0
+            while True:
+                # ⚡ Rate limiting: wait for request + token budget (and any Retry-After)
+                await self.limiter.acquire(estimated_tokens)
+                model_name = tier.model_name
+                t0 = time.perf_counter()
                 try:
-                    # ⚡ Run in thread pool to avoid blocking
-                    loop = asyncio.get_event_loop()
-                    response = await loop.run_in_executor(
-                        self.executor,
-                        self._sync_generate,
-                        full_prompt,
-                        temperature,
-                        max_tokens
-                    )
+                    # ⚡ Awaited on the event loop - no thread handoff
+                    response = await self._async_generate(full_prompt, temperature, max_tokens, model=tier.model)
                     
                     if not response or not response.text:
                         raise Exception("Empty response from Gemini")
                     
-                    return response.text
+                    self.limiter.on_success()
+                    self.limiter.settle(estimated_tokens, self._prompt_tokens(response))
+                    self._record_route(route, tier, model_name, t0, estimated_tokens, response, response.text)
+                    return response.text, model_name
                     
                 except Exception as e:
-                    error_str = str(e)
+                    self._record_route(route, tier, model_name, t0, error=True)
+                    retry_attempt = self._retry_attempt(e, tier, model_name, attempt, max_retries)
+                    if retry_attempt is None:
+                        # If not rate limit or max retries reached, raise
+                        raise Exception(f"LLM generation failed: {str(e)}")
+                    attempt = retry_attempt
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 16000,
+        max_retries: int = 3,
+        route: str = "chat"
+    ) -> AsyncIterator[str]:
+        """
+        ⚡ Stream text deltas as Gemini produces them (first delta in a few hundred ms)
+        
+        Same routing, concurrency caps, rate limiter and 404 / 429 handling as
+        generate() until the first delta is out; errors after that propagate
+        to the caller.
+        """
+        full_prompt = prompt
+        if context:
+            full_prompt = f"Context:\n{context}\n\n{prompt}"
+        estimated_tokens = self._estimate_tokens(full_prompt)
+        tier = self.tiers[resolve_tier(route)]
+        max_tokens = min(max_tokens, tier.max_tokens)
+        
+        async with tier.semaphore, self._concurrency:
+            attempt = 0
+            while True:
+                await self.limiter.acquire(estimated_tokens)
+                model_name = tier.model_name
+                t0 = time.perf_counter()
+                parts: List[str] = []
+                try:
+                    response = await self._async_generate(
+                        full_prompt, temperature, max_tokens, stream=True, model=tier.model
+                    )
+                    async for chunk in response:
+                        text = self._chunk_text(chunk)
+                        if text:
+                            parts.append(text)
+                            yield text
                     
-                    # Check if it's a rate limit error (429)
-                    if "429" in error_str or "quota" in error_str.lower():
-                        if attempt < max_retries - 1:
-                            wait_time = (attempt + 1) * 2  # 2s, 4s, 6s
-                            print(f"⚠️ Rate limit hit, waiting {wait_time}s (attempt {attempt + 1}/{max_retries})...")
-                            await asyncio.sleep(wait_time)
-                            continue
+                    self.limiter.on_success()
+                    self.limiter.settle(estimated_tokens, self._prompt_tokens(response))
+                    self._record_route(route, tier, model_name, t0, estimated_tokens, response, "".join(parts))
+                    return
                     
-                    # If not rate limit or max retries reached, raise
-                    raise Exception(f"LLM generation failed: {error_str}")
+                except Exception as e:
+                    self._record_route(route, tier, model_name, t0, error=True)
+                    if parts:
+                        raise
+                    retry_attempt = self._retry_attempt(e, tier, model_name, attempt, max_retries)
+                    if retry_attempt is None:
+                        raise Exception(f"LLM streaming failed: {str(e)}")
+                    attempt = retry_attempt
+    
+    def _retry_attempt(
+        self,
+        error: Exception,
+        tier: ModelTier,
+        model_name: str,
+        attempt: int,
+        max_retries: int
+    ) -> Optional[int]:
+        """Shared 404 / 429 handling: the attempt number to retry with, or None to give up"""
+        error_str = str(error)
+        
+        # ⚡ Model retired / renamed (404): tier's next candidate, not counted as a retry
+        if self._is_model_not_found(error_str) and self._fall_back(tier, model_name):
+            return attempt
+        
+        # Check if it's a rate limit error (429)
+        if "429" in error_str or "quota" in error_str.lower():
+            # ⚡ Halve the rate; Retry-After (or 2s, 4s, ...) pauses every caller
+            wait_time = parse_retry_after(error) or (attempt + 1) * 2
+            self.limiter.on_rate_limited(wait_time)
+            if attempt < max_retries - 1:
+                print(f"⚠️ Rate limit hit, waiting {wait_time}s at {self.limiter.rpm:.0f} RPM "
+                      f"(attempt {attempt + 1}/{max_retries})...")
+                return attempt + 1
+        return None
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Text of one streamed chunk ('' for chunks without text parts, e.g. the final one)"""
+        try:
+            return chunk.text
+        except ValueError:
+            return ""
+    
+    def _cacheable(self, temperature: float, cache_version: Optional[str]) -> bool:
+        return (
+            self.response_cache is not None
+            and cache_version is not None
+            and temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+        )
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough prompt size for the TPM bucket (~4 chars per token)"""
+        return len(text) // 4 + 1
+    
+    @staticmethod
+    def _prompt_tokens(response) -> Optional[int]:
+        usage = getattr(response, "usage_metadata", None)
+        return getattr(usage, "prompt_token_count", None) if usage is not None else None
+    
+    def _record_route(
+        self,
+        route: str,
+        tier: ModelTier,
+        model_name: str,
+        t0: float,
+        estimated_tokens: int = 0,
+        response=None,
+        text: str = "",
+        error: bool = False
+    ):
+        """Latency + token/cost telemetry for one attempt (usage metadata, else estimates)"""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None) or estimated_tokens
+        output_tokens = getattr(usage, "candidates_token_count", None) or (
+            self._estimate_tokens(text) if text else 0
+        )
+        stats = self.route_stats.setdefault(route, RouteStats())
+        stats.record(tier.name, model_name, time.perf_counter() - t0, prompt_tokens, output_tokens, error)
     
-    def _sync_generate(self, prompt: str, temperature: float, max_tokens: int):
-        """Synchronous generation (runs in thread pool)"""
-        return self.model.generate_content(
+    async def _async_generate(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+        model=None
+    ):
+        """
+        Native async generation (grpc.aio client, created lazily on the running loop)
+
+        All calls are multiplexed over one HTTP/2 connection that stays open,
+        so a 15-query fan-out costs 15 streams, not 15 threads or handshakes.
+        """
+        model = model if model is not None else self.model
+        return await model.generate_content_async(
             prompt,
             generation_config=genai.types.GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens,
-            )
+            ),
+            stream=stream
         )
     
     def _clean_json_string(self, text: str) -> str:
@@ -175,6 +560,24 @@ class LLMService:
     
     def _parse_json_safely(self, text: str) -> Dict[str, Any]:
         """Try multiple methods to parse JSON"""
+        result = self._try_parse_json(text)
+        if result is not None:
+            return result
+        
+        # Method 4: Fallback - return default structure
+        return {
+            "summary": "Analysis completed but response format was invalid",
+            "key_insights": ["Unable to parse structured insights"],
+            "score": 50.0
+        }
+    
+    def _try_parse_json(self, text: str, salvage: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Methods 1-3 of _parse_json_safely; None when none of them recovers any field
+        
+        salvage=False stops after the whole-document parses (no regex field
+        extraction), so a reply cut off mid-object does not count as parsed.
+        """
         # Method 1: Direct parse
         try:
             return json.loads(text)
@@ -189,6 +592,9 @@ class LLMService:
         except:
             pass
         
+        if not salvage:
+            return None
+        
         # Method 3: Extract individual fields with regex
         try:
             result = {}
@@ -222,12 +628,11 @@ class LLMService:
         except Exception as e:
             print(f"⚠️ Regex extraction failed: {str(e)}")
         
-        # Method 4: Fallback - return default structure
-        return {
-            "summary": "Analysis completed but response format was invalid",
-            "key_insights": ["Unable to parse structured insights"],
-            "score": 50.0
-        }
+        return None
+    
+    def _is_parseable(self, response_text: str) -> bool:
+        """Cache gate for structured calls: only complete, valid JSON gets stored"""
+        return self._try_parse_json(self._clean_json_string(response_text), salvage=False) is not None
     
     async def generate_structured(
         self,
@@ -237,6 +642,9 @@ class LLMService:
         temperature: float = 0.3,
         max_tokens: int = 16000,
         max_retries: int = 3,
+        cache_version: Optional[str] = None,
+        bypass_cache: bool = False,
+        route: str = "default",
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -265,7 +673,11 @@ CRITICAL INSTRUCTIONS:
                 context=context,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                max_retries=max_retries
+                max_retries=max_retries,
+                cache_version=cache_version,
+                bypass_cache=bypass_cache,
+                route=route,
+                validate=self._is_parseable
             )
             
             # Clean the response
@@ -349,7 +761,9 @@ CRITICAL: If web validation shows MAJOR red flags, include in risks as: "CRITICA
 
         return await self.generate_structured(
             prompt=prompt,
-            temperature=0.3
+            temperature=0.3,
+            cache_version="analysis-v1",
+            route="analysis"
         )
     
     async def batch_generate(
@@ -364,6 +778,44 @@ CRITICAL: If web validation shows MAJOR red flags, include in risks as: "CRITICA
             for prompt in prompts
         ]
         return await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Model choice, routing, rate limiter and response cache statistics"""
+        return {
+            "model": self.model_name,
+            "tiers": {tier.name: tier.model_name for tier in self.tiers.values()},
+            "routes": {
+                route: stats.to_dict(resolve_tier(route))
+                for route, stats in sorted(self.route_stats.items())
+            },
+            "model_fallbacks": self.model_fallbacks,
+            "coalesced_calls": self.coalesced_calls,
+            "rate_limiter": self.limiter.get_stats(),
+            "response_cache": self.response_cache.get_stats() if self.response_cache else None
+        }
+    
+    def print_stats(self):
+        """Print LLM statistics"""
+        stats = self.get_stats()
+        limiter = stats["rate_limiter"]
+        print(f"\n📊 LLM Statistics:")
+        print(f"   Model: {stats['model']} ({stats['model_fallbacks']} runtime fallbacks)")
+        print(f"   Tiers: " + ", ".join(f"{name}={model}" for name, model in stats["tiers"].items()))
+        for route, route_stats in stats["routes"].items():
+            print(f"   Route {route} [{route_stats['tier']}]: {route_stats['calls']} calls "
+                  f"({route_stats['errors']} errors), avg {route_stats['avg_latency_ms']}ms / "
+                  f"max {route_stats['max_latency_ms']}ms, "
+                  f"{route_stats['prompt_tokens']}+{route_stats['output_tokens']} tokens, "
+                  f"~${route_stats['cost_usd']:.4f}")
+        print(f"   Coalesced: {stats['coalesced_calls']} duplicate in-flight calls saved")
+        print(f"   Rate: {limiter['rpm']}/{limiter['max_rpm']:.0f} RPM, {limiter['tpm']} TPM")
+        print(f"   Requests: {limiter['acquired']} ({limiter['throttled']} throttled, "
+              f"{limiter['wait_seconds']}s waiting, {limiter['rate_limited']} quota errors)")
+        cache = stats["response_cache"]
+        if cache:
+            print(f"   Response cache: {cache['hits']} hits / {cache['misses']} misses "
+                  f"({cache['hit_rate']}%), {cache['bypassed']} bypassed, "
+                  f"{cache['bytes'] / 1024:.0f} KB, {cache['evictions']} evictions")
 
 
 # Singleton instance
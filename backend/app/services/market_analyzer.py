@@ -8,6 +8,13 @@ from .rag_service import rag_service
 class MarketAnalyzerService:
     """Service for TAM/SAM/SOM market analysis"""
     
+    # Industry-independent market queries (the market-size query is per industry)
+    MARKET_QUERIES = [
+        "Who are the competitors and what is the competitive landscape?",
+        "What are the market trends and growth projections?",
+        "What is the target customer segment and geography?",
+    ]
+    
     async def analyze_market(
         self,
         db: Session,
@@ -59,15 +66,12 @@ class MarketAnalyzerService:
         """Get market-related context"""
         queries = [
             f"What is the market size and opportunity for {startup.industry}?",
-            "Who are the competitors and what is the competitive landscape?",
-            "What are the market trends and growth projections?",
-            "What is the target customer segment and geography?",
+            *self.MARKET_QUERIES,
         ]
         
-        all_context = []
-        for query in queries:
-            chunks = await rag_service.get_context(startup_id, query, max_chunks=2)
-            all_context.extend(chunks)
+        # ⚡ One embedding call + one FAISS search for all queries
+        all_chunks = await rag_service.batch_get_context(startup_id, queries, max_chunks=2)
+        all_context = [chunk for chunks in all_chunks for chunk in chunks]
         
         return "\n\n".join(all_context)
     
@@ -109,7 +113,9 @@ Respond in JSON:
         try:
             result = await llm_service.generate_structured(
                 prompt=prompt,
-                context=context
+                context=context,
+                cache_version="market-size-v1",
+                route="market"
             )
             return result
         except:
@@ -156,7 +162,9 @@ Respond in JSON:
         try:
             result = await llm_service.generate_structured(
                 prompt=prompt,
-                context=context
+                context=context,
+                cache_version="competitors-v1",
+                route="market"
             )
             return result
         except:
@@ -191,7 +199,9 @@ Respond as JSON array:
         try:
             result = await llm_service.generate_structured(
                 prompt=prompt,
-                context=context
+                context=context,
+                cache_version="trends-v1",
+                route="market"
             )
             return result
         except:
@@ -204,5 +214,8 @@ Respond as JSON array:
             ]
 
 
+# ⚡ Fixed queries: embedded once and persisted by the RAG service
+rag_service.register_fixed_queries(MarketAnalyzerService.MARKET_QUERIES)
+
 # Singleton
 market_analyzer_service = MarketAnalyzerService()
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Metadata Filters
+Chunk metadata predicates for filtered retrieval (rag_service.search(..., filters=...))
+
+A filter is a dict of metadata key -> condition; every key must match:
+    {"file_type": "xlsx"}                               equality
+    {"slide": [2, 3]}                                   any of the values
+    {"section": {"$contains": ["team", "founder"]}}     case-insensitive substring (any)
+"""
+
+import json
+from typing import Dict, Any, Optional
+
+
+MetadataFilter = Dict[str, Any]
+
+
+def _matches(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict):
+        needles = condition.get("$contains", [])
+        if isinstance(needles, str):
+            needles = [needles]
+        text = str(value).lower() if value is not None else ""
+        return any(needle.lower() in text for needle in needles)
+    if isinstance(condition, (list, tuple, set)):
+        return value in condition
+    return value == condition
+
+
+def matches_filter(metadata: Dict[str, Any], filters: Optional[MetadataFilter]) -> bool:
+    """True if the chunk metadata satisfies every condition"""
+    if not filters:
+        return True
+    return all(_matches(metadata.get(key), condition) for key, condition in filters.items())
+
+
+def filter_key(filters: Optional[MetadataFilter]) -> str:
+    """Stable string for a filter (cache keys, mask memoization); '' = no filter"""
+    if not filters:
+        return ""
+    return json.dumps(filters, sort_keys=True, separators=(",", ":"), default=str)
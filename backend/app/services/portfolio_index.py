@@ -0,0 +1,249 @@
+"""
+Portfolio Index
+Cross-startup similarity: one centroid per startup, chunk search routed to the nearest startups
+
+Layout of VECTOR_STORE_DIR/portfolio/:
+    centroid_ids.npy    int64 startup ids
+    centroid_sums.npy   float32 (S, d) running sum of each startup's unit vectors
+    centroid_counts.npy int64 chunk count per startup
+
+Chunk vectors are not copied here: they already live in the per-startup
+segment stores (written incrementally, memory-mapped, loaded under the
+vector store memory budget). The centroids are the coarse quantizer of an
+IVF over startups - a portfolio search probes the stores of the startups
+whose centroids are nearest to the query.
+"""
+
+import os
+import shutil
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from .vector_store import iter_live_vectors
+from .index_factory import resolve_index_dim, truncate_vectors
+
+
+CENTROID_IDS_FILE = "centroid_ids.npy"
+CENTROID_SUMS_FILE = "centroid_sums.npy"
+CENTROID_COUNTS_FILE = "centroid_counts.npy"
+
+# Earlier layout kept every chunk vector in one global index; dropped on load
+STALE_FILES = ("index.faiss", "entries.npy")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class PortfolioIndex:
+    """
+    ⚡ Cross-startup similarity without a second copy of every chunk vector
+
+    - Startup centroids (mean of unit chunk vectors) kept as running sums,
+      so adds and deletes update them in O(chunks added/removed)
+    - Only the centroids are resident: S x d floats, independent of how
+      many chunks each startup has
+    - nearest_startups() picks the stores a portfolio search probes
+    - Matryoshka truncation (EMBEDDING_TRUNCATE_DIM) shrinks the centroids;
+      once built, their dimension is kept for later adds and queries
+    - Updates are in-memory; save() writes the centroids only (small),
+      debounced in the background after a burst of uploads
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.dirty = False
+
+        self.dim: Optional[int] = None
+        self._sums: Dict[int, np.ndarray] = {}         # startup_id -> float32 (d,)
+        self._counts: Dict[int, int] = {}              # startup_id -> chunks
+        self._centroid_matrix: Optional[np.ndarray] = None
+        self._centroid_ids: Optional[np.ndarray] = None
+
+    # ─────────────────────────────────────────────
+    # Loading / persistence
+    # ─────────────────────────────────────────────
+    def ensure_loaded(self, stores_root: Optional[str] = None):
+        """Load from disk once; rebuild from per-startup stores if never saved"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(os.path.join(self.path, CENTROID_IDS_FILE)):
+                self._load()
+            elif stores_root:
+                self._rebuild(stores_root)
+            self._loaded = True
+
+    def _load(self):
+        centroid_ids = np.load(os.path.join(self.path, CENTROID_IDS_FILE))
+        sums = np.load(os.path.join(self.path, CENTROID_SUMS_FILE))
+        counts = np.load(os.path.join(self.path, CENTROID_COUNTS_FILE))
+        for startup_id, vector_sum, count in zip(centroid_ids.tolist(), sums, counts.tolist()):
+            self._sums[startup_id] = np.array(vector_sum, dtype=np.float32)
+            self._counts[startup_id] = count
+        if len(centroid_ids):
+            self.dim = sums.shape[1]
+
+        for name in STALE_FILES:
+            stale = os.path.join(self.path, name)
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    def _rebuild(self, stores_root: str):
+        """One-time backfill from the startup_{id} stores already on disk"""
+        if not os.path.isdir(stores_root):
+            return
+        rebuilt = 0
+        for name in sorted(os.listdir(stores_root)):
+            path = os.path.join(stores_root, name)
+            if not (name.startswith("startup_") and os.path.isdir(path)):
+                continue
+            try:
+                startup_id = int(name.split("_", 1)[1])
+                # Read-only: the server may be opening (and migrating) this store meanwhile
+                for _, vectors in iter_live_vectors(path):
+                    self._add_locked(startup_id, vectors)
+            except Exception as e:
+                print(f"   ⚠️ Portfolio backfill skipped {name}: {str(e)}")
+                continue
+            rebuilt += 1
+        if rebuilt:
+            print(f"   🌐 Portfolio centroids rebuilt from {rebuilt} startup stores")
+            self.dirty = True
+
+    def save(self):
+        """Atomic write (tmp dir + rename) of the centroids"""
+        with self._lock:
+            if not self.dirty:
+                return
+            centroid_ids = np.array(list(self._counts), dtype=np.int64)
+            sums = np.array(
+                [self._sums[s] for s in centroid_ids.tolist()], dtype=np.float32
+            ).reshape(-1, self.dim or 0)
+            counts = np.array([self._counts[s] for s in centroid_ids.tolist()], dtype=np.int64)
+            self.dirty = False
+
+        tmp_path = f"{self.path}.tmp"
+        old_path = f"{self.path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, CENTROID_IDS_FILE), centroid_ids)
+        np.save(os.path.join(tmp_path, CENTROID_SUMS_FILE), sums)
+        np.save(os.path.join(tmp_path, CENTROID_COUNTS_FILE), counts)
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    # ─────────────────────────────────────────────
+    # Incremental updates
+    # ─────────────────────────────────────────────
+    def _unit_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = resolve_index_dim(vectors.shape[1])
+        return _normalize(truncate_vectors(vectors, self.dim))
+
+    def _add_locked(self, startup_id: int, vectors: np.ndarray):
+        if not len(vectors):
+            return
+        vectors = self._unit_vectors(vectors)
+        self._sums[startup_id] = self._sums.get(startup_id, 0) + vectors.sum(axis=0)
+        self._counts[startup_id] = self._counts.get(startup_id, 0) + len(vectors)
+        self._centroid_matrix = None
+        self.dirty = True
+
+    def add(self, startup_id: int, vectors: np.ndarray):
+        """Add a startup's newly stored chunk vectors (called from add_documents)"""
+        if not len(vectors):
+            return
+        with self._lock:
+            self._add_locked(startup_id, vectors)
+
+    def remove_startup(self, startup_id: int) -> int:
+        """Drop a startup's centroid; returns how many chunks it covered"""
+        with self._lock:
+            self._sums.pop(startup_id, None)
+            count = self._counts.pop(startup_id, 0)
+            self._centroid_matrix = None
+            if count:
+                self.dirty = True
+            return count
+
+    def remove_chunks(self, startup_id: int, vectors: np.ndarray) -> int:
+        """Take removed chunk vectors (one deleted document) out of a centroid; returns how many"""
+        with self._lock:
+            if startup_id not in self._counts or not len(vectors):
+                return 0
+            vectors = self._unit_vectors(vectors)
+            remaining = self._counts[startup_id] - len(vectors)
+            if remaining > 0:
+                self._sums[startup_id] = self._sums[startup_id] - vectors.sum(axis=0)
+                self._counts[startup_id] = remaining
+            else:
+                self._sums.pop(startup_id, None)
+                self._counts.pop(startup_id, None)
+            self._centroid_matrix = None
+            self.dirty = True
+            return len(vectors)
+
+    # ─────────────────────────────────────────────
+    # Queries
+    # ─────────────────────────────────────────────
+    def _centroids(self):
+        if self._centroid_matrix is None:
+            ids = np.array(list(self._counts), dtype=np.int64)
+            if len(ids):
+                matrix = _normalize(np.vstack([self._sums[s] for s in ids.tolist()]))
+            else:
+                matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._centroid_ids, self._centroid_matrix = ids, matrix
+        return self._centroid_ids, self._centroid_matrix
+
+    def similar_startups(self, startup_id: int, k: int = 5) -> List[Dict[str, Any]]:
+        """Nearest startups by centroid cosine similarity"""
+        with self._lock:
+            if startup_id not in self._counts:
+                return []
+            ids, matrix = self._centroids()
+            target = matrix[int(np.flatnonzero(ids == startup_id)[0])]
+            similarity = matrix @ target
+
+        order = [i for i in np.argsort(-similarity, kind="stable") if ids[i] != startup_id][:k]
+        return [
+            {"startup_id": int(ids[i]), "similarity": round(float(similarity[i]), 4)}
+            for i in order
+        ]
+
+    def nearest_startups(self, query_vector: np.ndarray, n: int) -> List[Tuple[int, float]]:
+        """(startup_id, centroid cosine similarity) of the n centroids nearest to a query"""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if not self._counts:
+                return []
+            ids, matrix = self._centroids()
+            similarity = matrix @ _normalize(truncate_vectors(query, self.dim))[0]
+
+        order = np.argsort(-similarity, kind="stable")[:n]
+        return [(int(ids[i]), float(similarity[i])) for i in order]
+
+    def nbytes(self) -> int:
+        """Resident size: centroid sums + the normalized matrix built from them"""
+        return 2 * len(self._counts) * (self.dim or 0) * 4
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "startups": len(self._counts),
+            "chunks": int(sum(self._counts.values())),
+            "bytes": self.nbytes(),
+            "loaded": self._loaded,
+        }
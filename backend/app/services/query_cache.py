@@ -0,0 +1,144 @@
+"""
+Query Result Cache
+O(1) LRU + TTL cache for RAG search results with a global memory bound
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Hashable
+import numpy as np
+
+
+class CachedResult:
+    """Search result reference: chunk ids + scores (content lives in the store)"""
+
+    __slots__ = ("startup_id", "chunk_ids", "scores", "expires_at", "nbytes")
+
+    # Rough per-entry overhead (key tuple, OrderedDict node, object header)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, startup_id: int, chunk_ids: np.ndarray, scores: np.ndarray, expires_at: float):
+        self.startup_id = startup_id
+        self.chunk_ids = chunk_ids
+        self.scores = scores
+        self.expires_at = expires_at
+        self.nbytes = chunk_ids.nbytes + scores.nbytes + self.ENTRY_OVERHEAD
+
+
+class QueryResultCache:
+    """
+    ⚡ Query result cache
+
+    - O(1) get/put/evict via an OrderedDict kept in LRU order
+    - Global bounds on entry count AND bytes, optional TTL
+    - Entries hold chunk ids + scores only, not duplicated chunk text
+    - Per-startup key sets, so invalidating a startup touches only its entries
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[Hashable, CachedResult]" = OrderedDict()
+        self._by_startup: Dict[int, Set[Hashable]] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, key: Hashable) -> Optional[CachedResult]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.nbytes
+        keys = self._by_startup.get(entry.startup_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_startup[entry.startup_id]
+        return entry
+
+    def get(self, key: Hashable) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at and entry.expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, startup_id: int, chunk_ids: np.ndarray, scores: np.ndarray):
+        self._remove(key)
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        entry = CachedResult(
+            startup_id,
+            np.asarray(chunk_ids, dtype=np.int64),
+            np.asarray(scores, dtype=np.float32),
+            expires_at
+        )
+        self._entries[key] = entry
+        self._by_startup.setdefault(startup_id, set()).add(key)
+        self._bytes += entry.nbytes
+
+        # Evict least recently used entries beyond the global bounds
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate_startup(self, startup_id: int) -> int:
+        """Drop all entries for one startup - O(entries of that startup)"""
+        keys = self._by_startup.pop(startup_id, set())
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+        return len(keys)
+
+    def invalidate_chunks(self, startup_id: int, chunk_ids: np.ndarray) -> int:
+        """Drop only this startup's entries that returned one of the given chunks"""
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        stale = [
+            key for key in self._by_startup.get(startup_id, ())
+            if np.isin(self._entries[key].chunk_ids, chunk_ids).any()
+        ]
+        for key in stale:
+            self._remove(key)
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_startup.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total": total,
+            "hit_rate": round(hit_rate, 2),
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,164 @@
+"""
+Query Embedding Registry
+Embeds fixed retrieval queries once and persists their vectors
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+
+
+class QueryEmbeddingRegistry:
+    """
+    ⚡ Registry of query embeddings backed by the persistent embedding cache
+
+    Services register their fixed queries (analysis questions, scoring
+    prompts, founder extraction, market queries) at import time. The first
+    time any registered query is needed, every registered query that is not
+    on disk yet is embedded in ONE batched API call and persisted, so later
+    runs (and restarts) make zero query-embedding calls for them.
+    Ad-hoc queries (chat questions, portfolio searches) go through the same
+    cache but stay in memory only in a bounded LRU. SQLite lookups and writes
+    run on the executor, never on the event loop.
+    """
+
+    def __init__(
+        self,
+        cache: EmbeddingCache,
+        model: str,
+        embed_fn: Callable[[List[str]], Awaitable[np.ndarray]],
+        executor: Optional[Executor] = None,
+        max_adhoc_entries: int = 1024
+    ):
+        self.cache = cache
+        # Query vectors use a different task type than document vectors
+        self.cache_model = f"{model}#query"
+        self._embed_fn = embed_fn
+        self._executor = executor
+
+        self._fixed_queries: Dict[str, None] = {}  # ordered set
+        self._fixed_vectors: Dict[str, np.ndarray] = {}  # resident for the process lifetime
+        self._adhoc_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()  # LRU
+        self.max_adhoc_entries = max_adhoc_entries
+        self._warm_lock: Optional[asyncio.Lock] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.api_calls = 0
+        self.queries_embedded = 0
+        self.adhoc_evictions = 0
+
+    def register(self, queries: List[str]):
+        """Register fixed queries (cheap - nothing is embedded yet)"""
+        for query in queries:
+            self._fixed_queries[query] = None
+
+    def is_registered(self, query: str) -> bool:
+        return query in self._fixed_queries
+
+    def _remember(self, query: str, vector: np.ndarray):
+        if self.is_registered(query):
+            self._fixed_vectors[query] = vector
+            return
+        self._adhoc_vectors[query] = vector
+        self._adhoc_vectors.move_to_end(query)
+        while len(self._adhoc_vectors) > self.max_adhoc_entries:
+            self._adhoc_vectors.popitem(last=False)
+            self.adhoc_evictions += 1
+
+    def _lookup(self, query: str) -> Optional[np.ndarray]:
+        vector = self._fixed_vectors.get(query)
+        if vector is None:
+            vector = self._adhoc_vectors.get(query)
+            if vector is not None:
+                self._adhoc_vectors.move_to_end(query)
+        return vector
+
+    async def _run_blocking(self, fn: Callable[[], Any]) -> Any:
+        return await asyncio.get_event_loop().run_in_executor(self._executor, fn)
+
+    async def _embed_and_store(self, queries: List[str]) -> Dict[str, np.ndarray]:
+        """Embed queries in one API call and persist them"""
+        vectors = await self._embed_fn(queries)
+        self.api_calls += 1
+        self.queries_embedded += len(queries)
+        await self._run_blocking(lambda: self.cache.put_many(self.cache_model, queries, vectors))
+        for query, vector in zip(queries, vectors):
+            self._remember(query, vector)
+        return dict(zip(queries, vectors))
+
+    async def _load_from_disk(self, queries: List[str]) -> Dict[str, np.ndarray]:
+        """Persisted vectors for queries (also kept in memory); missing ones are absent"""
+        stored = await self._run_blocking(
+            lambda: self.cache.get_many(self.cache_model, queries, track=False)
+        )
+        found = {}
+        for query, vector in zip(queries, stored):
+            if vector is not None:
+                found[query] = vector
+                self._remember(query, vector)
+                self.disk_hits += 1
+        return found
+
+    async def warm(self) -> int:
+        """Make sure every registered query has a vector; returns how many were embedded"""
+        if self._warm_lock is None:
+            self._warm_lock = asyncio.Lock()
+
+        async with self._warm_lock:
+            pending = [q for q in self._fixed_queries if q not in self._fixed_vectors]
+            if not pending:
+                return 0
+
+            found = await self._load_from_disk(pending)
+            missing = [q for q in pending if q not in found]
+            if missing:
+                print(f"   🧭 Embedding {len(missing)} fixed queries in one batch (persisted for reuse)")
+                await self._embed_and_store(missing)
+            return len(missing)
+
+    async def get_many(self, queries: List[str]) -> np.ndarray:
+        """Vectors for queries as a float32 matrix (one API call for all misses)"""
+        if any(self.is_registered(q) and q not in self._fixed_vectors for q in queries):
+            await self.warm()
+
+        # Collected locally: a large batch may overflow the ad-hoc LRU before vstack
+        vectors: Dict[str, np.ndarray] = {}
+        for query in dict.fromkeys(queries):
+            vector = self._lookup(query)
+            if vector is not None:
+                vectors[query] = vector
+        self.memory_hits += sum(q in vectors for q in queries)
+
+        pending = [q for q in dict.fromkeys(queries) if q not in vectors]
+        if pending:
+            vectors.update(await self._load_from_disk(pending))
+            missing = [q for q in pending if q not in vectors]
+            if missing:
+                vectors.update(await self._embed_and_store(missing))
+
+        return np.vstack([vectors[q] for q in queries]).astype(np.float32)
+
+    def peek(self, query: str) -> Optional[np.ndarray]:
+        """In-memory vector for a query, if any (never calls the API or the disk)"""
+        return self._lookup(query)
+
+    async def get(self, query: str) -> np.ndarray:
+        """Vector for a single query"""
+        return (await self.get_many([query]))[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "registered": len(self._fixed_queries),
+            "in_memory": len(self._fixed_vectors) + len(self._adhoc_vectors),
+            "adhoc_in_memory": len(self._adhoc_vectors),
+            "adhoc_evictions": self.adhoc_evictions,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "api_calls": self.api_calls,
+            "queries_embedded": self.queries_embedded,
+        }
@@ -1,20 +1,28 @@
 import os
-import pickle
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Set
 import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 
 # ❌ OLD: Local HuggingFace embeddings (requires 800MB torch + 300MB transformers)
 # from langchain_community.embeddings import HuggingFaceEmbeddings
 
-# ✅ NEW: Gemini Cloud embeddings (lightweight, 768-dim, faster)
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+# ✅ NEW: Pluggable embedding providers (Gemini API by default, local CPU backends optional)
+from .embedding_providers import EmbeddingProvider, create_embedding_provider
 
 import hashlib
 import asyncio
+import random
+import time
 from concurrent.futures import ThreadPoolExecutor
 from ..config import settings
+from .embedding_cache import EmbeddingCache
+from .query_embeddings import QueryEmbeddingRegistry
+from .query_cache import QueryResultCache
+from .portfolio_index import PortfolioIndex
+from .context_assembly import assemble_context
+from .vector_store import SegmentedVectorStore, open_store, stable_chunk_id, AUTO_ID
+from .metadata_filter import MetadataFilter, filter_key
 
 
 class RAGServiceOptimized:
@@ -22,12 +30,26 @@ class RAGServiceOptimized:
     ⚡ OPTIMIZED RAG Service - Caching & Async & Memory Management
     
     KEY IMPROVEMENTS:
-    1. ✅ In-memory query cache (avoid repeated searches)
+    1. ✅ O(1) LRU + TTL query result cache with a global memory bound
     2. ✅ True async via thread pool (FAISS is blocking)
-    3. ✅ Batch embedding support
+    3. ✅ Batch embedding support + single-matrix batched search
     4. ✅ Smart cache invalidation
     5. ✅ Gemini Embeddings API (768-dim, lightweight, fast)
-    6. ✅ Lazy loading with auto-cleanup (max 2 startups in RAM)
+    6. ✅ Lazy loading with byte-budget LRU residency (VECTOR_STORE_MEMORY_BUDGET_MB)
+    7. ✅ Persistent embedding cache (re-uploads skip the embedding API)
+    8. ✅ Batched, bounded-concurrency embedding pipeline with retries
+    9. ✅ Persisted query embeddings (fixed queries never re-embedded)
+    10. ✅ Pickle-free, memory-mapped on-disk store format (near-instant cold load)
+    11. ✅ Single-flight store loading under concurrent cold searches
+    12. ✅ Append-only segment writes + background compaction (flat upload latency)
+    13. ✅ Hybrid BM25 + dense retrieval (RRF), lexical fallback when embedding is slow
+    14. ✅ Portfolio-wide index (startup centroids + all chunks) for cross-startup search
+    15. ✅ Context assembly: MMR + adjacent-chunk merge (overlap stripped) + char budget
+    16. ✅ Pluggable embedding providers (EMBEDDING_PROVIDER: gemini / static / hashing)
+    17. ✅ Page/slide/sheet chunk metadata + metadata-filtered (pre-pruned) search
+    18. ✅ Stable content-hash chunk ids + per-document deletion (no re-embedding)
+    19. ✅ Background prewarming of recently active startups after a restart
+    20. ✅ Matryoshka truncation (EMBEDDING_TRUNCATE_DIM) + optional exact full-dim rescoring
     
     TIME REDUCTION: ~60% faster for repeated queries
     DOCKER IMAGE: 2500MB → 500MB (saved 2GB!)
@@ -35,7 +57,7 @@ class RAGServiceOptimized:
     """
     
     def __init__(self):
-        print("🚀 Initializing Optimized RAG Service with Gemini Embeddings...")
+        print(f"🚀 Initializing Optimized RAG Service with {settings.EMBEDDING_PROVIDER} embeddings...")
         
         # ❌ OLD: Local model (384-dim, requires torch download)
         # self.embeddings = HuggingFaceEmbeddings(
@@ -44,35 +66,99 @@ class RAGServiceOptimized:
         #     encode_kwargs={'normalize_embeddings': True}
         # )
         
-        # ✅ NEW: Gemini API (768-dim, cloud-based, no local model)
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=settings.GOOGLE_API_KEY
+        # ✅ NEW: Embedding provider selected in Settings
+        # gemini = API (default) | static = local static vectors | hashing = deterministic (tests)
+        self.embedding_provider: EmbeddingProvider = create_embedding_provider(
+            settings.EMBEDDING_PROVIDER,
+            model=settings.EMBEDDING_MODEL,
+            api_key=settings.GOOGLE_API_KEY,
+            static_model_dir=settings.EMBEDDING_STATIC_MODEL_DIR,
+            hashing_dim=settings.EMBEDDING_HASHING_DIM
         )
+        # Cache key - vectors of different providers/models never mix
+        self.embedding_model = self.embedding_provider.model_id
         
+        # ⚡ NEW: Content-addressed embedding cache (disk-backed)
+        # Key: (embedding model, sha256(chunk text)) -> vector
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(settings.EMBEDDING_CACHE_DIR, "embeddings.sqlite3")
+        )
+        
+        self.chunk_overlap = 200
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
-            chunk_overlap=200,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
         )
         
-        self.vector_stores: Dict[int, FAISS] = {}  # startup_id -> FAISS
+        # startup_id -> store, ordered least → most recently used (O(1) LRU)
+        self.vector_stores: "OrderedDict[int, SegmentedVectorStore]" = OrderedDict()
+        
+        # ⚡ NEW: Memory management - residency governed by a byte budget
+        self.memory_budget_bytes = settings.VECTOR_STORE_MEMORY_BUDGET_MB * 1024 * 1024
+        self._store_bytes: Dict[int, int] = {}  # startup_id -> estimated resident bytes
+        self._resident_bytes = 0
+        self._evictions = 0
+        self._store_loads = 0
+        self._total_load_seconds = 0.0
+        self._last_load_seconds = 0.0
+        
+        # ⚡ NEW: Single-flight loading (startup_id -> in-flight load task)
+        self._loading: Dict[int, asyncio.Task] = {}
+        self._duplicate_loads_avoided = 0
+        self._prewarmed = 0
+        
+        # ⚡ NEW: Background segment compaction (startup_ids being compacted)
+        self._compacting: Set[int] = set()
+        self._compactions = 0
+        
+        # ⚡ NEW: Portfolio index (startup centroids only, saved debounced)
+        self.portfolio = PortfolioIndex(os.path.join(settings.VECTOR_STORE_DIR, "portfolio"))
+        self._portfolio_save_task: Optional[asyncio.Task] = None
+        
+        # ⚡ NEW: Hybrid retrieval stats
+        self._hybrid_searches = 0
+        self._lexical_fallbacks = 0
+        
+        # ⚡ NEW: Metadata-filtered retrieval stats
+        self._filtered_searches = 0
+        self._filter_fallbacks = 0
         
-        # ⚡ NEW: Memory management
-        self.MAX_VECTOR_STORES_IN_MEMORY = 2  # Keep only 2 most recent
-        self._access_order: List[int] = []  # Track access for LRU
+        # ⚡ NEW: Context assembly stats (chars of top-k raw chunks vs. packed context)
+        self._context_raw_chars = 0
+        self._context_packed_chars = 0
         
-        # ⚡ NEW: Query cache
-        # Key: (startup_id, query_hash) -> List[Dict]
-        self._query_cache: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # ⚡ NEW: Query result cache
+        # Key: (startup_id, query_hash, k) -> chunk ids + scores (content stays in the store)
+        self.query_cache = QueryResultCache(
+            max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.QUERY_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS
+        )
         
         # ⚡ Thread pool for blocking operations
         self.executor = ThreadPoolExecutor(max_workers=4)
         
-        print("✅ Optimized RAG Service ready with Gemini Embeddings (768-dim)")
-        print(f"⚡ Memory optimization: Max {self.MAX_VECTOR_STORES_IN_MEMORY} vector stores in RAM")
+        # ⚡ NEW: Embedding pipeline (batched, N batches in flight, retried)
+        # Local providers are CPU-bound: one batch per core instead of the API concurrency limit
+        embedding_workers = (
+            os.cpu_count() or 1
+        ) if self.embedding_provider.is_local else settings.EMBEDDING_CONCURRENCY
+        self.embedding_executor = ThreadPoolExecutor(max_workers=embedding_workers)
+        self._embedding_limiter = asyncio.Semaphore(embedding_workers)
+        self._embedding_throughput = 0.0  # chunks/sec of the last pipeline run
+        
+        # ⚡ NEW: Query embedding registry (fixed queries embedded once, persisted)
+        self.query_embeddings = QueryEmbeddingRegistry(
+            self.embedding_cache,
+            self.embedding_model,
+            self._embed_query_texts,
+            executor=self.executor,
+            max_adhoc_entries=settings.QUERY_EMBEDDING_MEMORY_ENTRIES
+        )
+        
+        print(f"✅ Optimized RAG Service ready with embeddings: {self.embedding_model}")
+        print(f"⚡ Memory optimization: {settings.VECTOR_STORE_MEMORY_BUDGET_MB}MB budget for vector stores in RAM")
     
     def _get_store_path(self, startup_id: int) -> str:
         """Get path for vector store"""
@@ -82,98 +168,262 @@ class RAGServiceOptimized:
         """Create hash for query caching"""
         return hashlib.md5(query.encode()).hexdigest()[:16]
     
+    @staticmethod
+    def _estimate_store_bytes(vector_store: SegmentedVectorStore) -> int:
+        """Resident size of a store: float32 vectors (ntotal * d * 4) + chunk store contents"""
+        return vector_store.nbytes()
+    
+    def _format_resident(self) -> str:
+        """Human-readable residency for logs"""
+        return (f"{len(self.vector_stores)} stores, "
+                f"{self._resident_bytes / 1024 / 1024:.1f}/{self.memory_budget_bytes / 1024 / 1024:.0f}MB")
+    
+    def _set_resident(self, startup_id: int, vector_store: SegmentedVectorStore, touch: bool = True):
+        """Register (or re-measure) a resident store; touch marks it most recently used"""
+        size = self._estimate_store_bytes(vector_store)
+        self._resident_bytes += size - self._store_bytes.get(startup_id, 0)
+        self._store_bytes[startup_id] = size
+        self.vector_stores[startup_id] = vector_store
+        if touch:
+            self.vector_stores.move_to_end(startup_id)
+    
+    def _unload_store(self, startup_id: int):
+        """Drop a store from RAM (disk copy is kept)"""
+        self.vector_stores.pop(startup_id, None)
+        self._resident_bytes -= self._store_bytes.pop(startup_id, 0)
+    
     def _update_access_order(self, startup_id: int):
-        """Update LRU access tracking"""
-        if startup_id in self._access_order:
-            self._access_order.remove(startup_id)
-        self._access_order.append(startup_id)
+        """Update LRU access tracking - O(1)"""
+        if startup_id in self.vector_stores:
+            self.vector_stores.move_to_end(startup_id)
     
-    def _cleanup_old_vector_stores(self, current_startup_id: int):
+    def _enforce_memory_budget(self, current_startup_id: int):
         """
-        ⚡⚡ MEMORY OPTIMIZATION: Keep only MAX_VECTOR_STORES_IN_MEMORY in RAM
+        ⚡⚡ MEMORY OPTIMIZATION: Evict least recently used stores until the
+        resident bytes fit VECTOR_STORE_MEMORY_BUDGET_MB.
         
-        This prevents RAM from growing unbounded when many startups are accessed.
-        Frees ~50MB per startup removed.
+        Small stores no longer evict big ones just by count; the store being
+        used right now is never evicted (even if it alone exceeds the budget).
+        The portfolio centroids are always resident and count against it too.
         """
-        if len(self.vector_stores) <= self.MAX_VECTOR_STORES_IN_MEMORY:
-            return
-        
-        # Remove oldest accessed startups (LRU eviction)
-        while len(self.vector_stores) > self.MAX_VECTOR_STORES_IN_MEMORY:
-            # Find least recently used
-            oldest_id = None
-            for startup_id in self._access_order:
-                if startup_id in self.vector_stores and startup_id != current_startup_id:
-                    oldest_id = startup_id
-                    break
-            
-            if oldest_id is None:
-                break
+        while (
+            self._resident_bytes + self.portfolio.nbytes() > self.memory_budget_bytes
+            and len(self.vector_stores) > 1
+        ):
+            oldest_id = next(iter(self.vector_stores))
+            if oldest_id == current_startup_id:
+                # Current store is the LRU entry only if it was just inserted out of order
+                self.vector_stores.move_to_end(oldest_id)
+                oldest_id = next(iter(self.vector_stores))
             
-            print(f"   🧹 RAM cleanup: Unloading startup {oldest_id} (freed ~50MB)")
-            del self.vector_stores[oldest_id]
-            self._access_order.remove(oldest_id)
-    
-    def _get_from_cache(self, startup_id: int, query: str, k: int) -> Optional[List[Dict[str, Any]]]:
-        """Get results from cache"""
-        query_hash = self._hash_query(query)
-        cache_key = (startup_id, query_hash, k)
-        
-        if cache_key in self._query_cache:
-            self._cache_hits += 1
-            return self._query_cache[cache_key]
-        
-        self._cache_misses += 1
-        return None
-    
-    def _put_in_cache(self, startup_id: int, query: str, k: int, results: List[Dict[str, Any]]):
-        """Store results in cache"""
-        query_hash = self._hash_query(query)
-        cache_key = (startup_id, query_hash, k)
-        self._query_cache[cache_key] = results
-        
-        # ⚡ Limit cache size (keep last 100 queries per startup)
-        startup_keys = [k for k in self._query_cache.keys() if k[0] == startup_id]
-        if len(startup_keys) > 100:
-            # Remove oldest (this is simplistic, could use LRU)
-            oldest_key = startup_keys[0]
-            del self._query_cache[oldest_key]
+            freed = self._store_bytes.get(oldest_id, 0)
+            self._unload_store(oldest_id)
+            self._evictions += 1
+            print(f"   🧹 RAM cleanup: Unloading startup {oldest_id} "
+                  f"(freed {freed / 1024 / 1024:.1f}MB, now {self._format_resident()})")
     
     def clear_cache(self, startup_id: Optional[int] = None):
         """Clear query cache for a startup or all"""
         if startup_id is None:
-            self._query_cache.clear()
+            self.query_cache.clear()
             print(f"🗑️ Cleared entire query cache")
         else:
-            keys_to_remove = [k for k in self._query_cache.keys() if k[0] == startup_id]
-            for key in keys_to_remove:
-                del self._query_cache[key]
-            print(f"🗑️ Cleared cache for startup {startup_id}")
+            removed = self.query_cache.invalidate_startup(startup_id)
+            print(f"🗑️ Cleared cache for startup {startup_id} ({removed} entries)")
     
-    def get_cache_stats(self) -> Dict[str, int]:
+    def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total = self._cache_hits + self._cache_misses
-        hit_rate = (self._cache_hits / total * 100) if total > 0 else 0
+        query_stats = self.query_cache.get_stats()
+        embedding_stats = self.embedding_cache.get_stats()
         return {
-            "hits": self._cache_hits,
-            "misses": self._cache_misses,
-            "total": total,
-            "hit_rate": round(hit_rate, 2),
-            "cache_size": len(self._query_cache),
-            "vector_stores_loaded": len(self.vector_stores)
+            "hits": query_stats["hits"],
+            "misses": query_stats["misses"],
+            "total": query_stats["total"],
+            "hit_rate": query_stats["hit_rate"],
+            "cache_size": query_stats["size"],
+            "cache_bytes": query_stats["bytes"],
+            "cache_evictions": query_stats["evictions"],
+            "cache_expirations": query_stats["expirations"],
+            "vector_stores_loaded": len(self.vector_stores),
+            "resident_bytes": self._resident_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "evictions": self._evictions,
+            "store_loads": self._store_loads,
+            "avg_load_ms": round(self._total_load_seconds / self._store_loads * 1000, 1) if self._store_loads else 0,
+            "last_load_ms": round(self._last_load_seconds * 1000, 1),
+            "duplicate_loads_avoided": self._duplicate_loads_avoided,
+            "prewarmed_stores": self._prewarmed,
+            "compactions": self._compactions,
+            "hybrid_searches": self._hybrid_searches,
+            "lexical_fallbacks": self._lexical_fallbacks,
+            "filtered_searches": self._filtered_searches,
+            "filter_fallbacks": self._filter_fallbacks,
+            "context_raw_chars": self._context_raw_chars,
+            "context_packed_chars": self._context_packed_chars,
+            "embedding_cache_hits": embedding_stats["hits"],
+            "embedding_cache_misses": embedding_stats["misses"],
+            "embedding_cache_hit_rate": embedding_stats["hit_rate"],
+            "embedding_chunks_per_sec": round(self._embedding_throughput, 1),
+            "query_embeddings": self.query_embeddings.get_stats(),
+            "portfolio": self.portfolio.get_stats()
         }
     
+    def register_fixed_queries(self, queries: List[str]):
+        """Register queries that are asked on every run (embedded once, persisted)"""
+        self.query_embeddings.register(queries)
+    
+    async def warm_query_embeddings(self) -> int:
+        """Embed any registered fixed queries that are not persisted yet"""
+        return await self.query_embeddings.warm()
+    
+    async def _embed_query_texts(self, queries: List[str]) -> np.ndarray:
+        """Embed queries (retrieval-query task type) in a single API call"""
+        if self.embedding_provider.is_local:
+            # ⚡ Microseconds on CPU - a thread hop would cost more than the embedding
+            return self.embedding_provider.embed_queries(queries)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.embedding_executor,
+            lambda: self.embedding_provider.embed_queries(queries)
+        )
+    
+    async def _embed_batch_with_retry(self, batch: List[str], batch_num: int) -> np.ndarray:
+        """Embed one batch under the shared limiter, retrying with exponential backoff"""
+        loop = asyncio.get_event_loop()
+        # Local providers have no rate limits or transient network errors to retry
+        max_retries = 0 if self.embedding_provider.is_local else settings.EMBEDDING_MAX_RETRIES
+        
+        for attempt in range(max_retries + 1):
+            async with self._embedding_limiter:
+                try:
+                    return await loop.run_in_executor(
+                        self.embedding_executor,
+                        lambda: self.embedding_provider.embed_documents(batch)
+                    )
+                except Exception as e:
+                    error_str = str(e)
+                    if attempt >= max_retries:
+                        raise Exception(f"Embedding batch {batch_num} failed after {attempt + 1} attempts: {error_str}")
+                    is_rate_limit = "429" in error_str or "quota" in error_str.lower()
+            
+            # Back off outside the limiter so other batches can proceed
+            wait_time = (2 ** attempt) * (2.0 if is_rate_limit else 0.5) + random.uniform(0, 0.5)
+            reason = "Rate limit hit" if is_rate_limit else "Embedding error"
+            print(f"   ⚠️ {reason} on batch {batch_num}, retrying in {wait_time:.1f}s "
+                  f"(attempt {attempt + 1}/{max_retries})...")
+            await asyncio.sleep(wait_time)
+    
+    async def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        ⚡ Embedding pipeline: split into batches, run N batches concurrently
+        under a shared limiter, retry failed batches, stack into one matrix.
+        """
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._embed_batch_with_retry(batch, batch_num + 1)
+            for batch_num, batch in enumerate(batches)
+        ])
+        elapsed = time.perf_counter() - start
+        
+        self._embedding_throughput = len(texts) / elapsed if elapsed > 0 else 0.0
+        print(f"   ⚡ Embedded {len(texts)} chunks in {len(batches)} batches "
+              f"({elapsed:.2f}s, {self._embedding_throughput:.1f} chunks/sec)")
+        
+        return np.vstack(results).astype(np.float32)
+    
+    async def _embed_chunks(self, chunks: List[str]) -> np.ndarray:
+        """
+        ⚡ Embed chunks through the persistent embedding cache
+        
+        Only cache misses (deduplicated by content) go over the wire.
+        Returns a float32 matrix with one row per chunk.
+        """
+        loop = asyncio.get_event_loop()
+        cached = await loop.run_in_executor(
+            self.executor,
+            lambda: self.embedding_cache.get_many(self.embedding_model, chunks)
+        )
+        
+        missing_texts = list(dict.fromkeys(
+            chunk for chunk, vector in zip(chunks, cached) if vector is None
+        ))
+        print(f"   💨 Embedding cache: {len(chunks) - sum(v is None for v in cached)} hits, "
+              f"{len(missing_texts)} unique misses")
+        
+        if missing_texts:
+            new_vectors = await self._embed_texts(missing_texts)
+            await loop.run_in_executor(
+                self.executor,
+                lambda: self.embedding_cache.put_many(self.embedding_model, missing_texts, new_vectors)
+            )
+            fresh = dict(zip(missing_texts, new_vectors))
+            cached = [
+                vector if vector is not None else fresh[chunk]
+                for chunk, vector in zip(chunks, cached)
+            ]
+        
+        return np.vstack(cached).astype(np.float32)
+    
+    def _add_to_vector_store(
+        self,
+        vector_store: Optional[SegmentedVectorStore],
+        chunks: List[str],
+        vectors: np.ndarray,
+        metadatas: List[Dict],
+        chunk_ids: Optional[np.ndarray] = None
+    ) -> Tuple[SegmentedVectorStore, List[str], np.ndarray]:
+        """
+        Append a precomputed matrix as one new segment (one bulk add)
+        
+        Only the new segment is written to disk; vector_store=None builds an
+        in-memory store with no backing directory. Also returns the rows that
+        were stored (chunks already in the store are skipped).
+        """
+        if vector_store is None:
+            vector_store = SegmentedVectorStore(None)
+        ids, new_rows = vector_store.append(vectors, chunks, metadatas, chunk_ids)
+        return vector_store, [str(int(i)) for i in ids], new_rows
+    
+    @staticmethod
+    def _stable_chunk_ids(chunks: List[str], chunk_metadatas: List[Dict]) -> np.ndarray:
+        """(document_id, content hash) ids; chunks without a document get sequential ids"""
+        ids = np.full(len(chunks), AUTO_ID, dtype=np.int64)
+        seen: Dict[Tuple[Any, str], int] = {}
+        for i, (chunk, metadata) in enumerate(zip(chunks, chunk_metadatas)):
+            document_id = metadata.get("document_id")
+            if document_id is None:
+                continue
+            occurrence = seen.get((document_id, chunk), 0)
+            seen[(document_id, chunk)] = occurrence + 1
+            ids[i] = stable_chunk_id(document_id, chunk, occurrence)
+        return ids
+    
     async def add_documents(
         self,
         startup_id: int,
         texts: List[str],
-        metadatas: Optional[List[Dict]] = None
+        metadatas: Optional[List[Dict]] = None,
+        ids_by_document: Optional[Dict[Any, List[str]]] = None
     ) -> List[str]:
-        """Add documents to vector store - ASYNC"""
+        """
+        Add documents to vector store - ASYNC
+        
+        texts may be whole documents or segments of one (page / slide / sheet
+        with that location in their metadata); chunk_id keeps counting across
+        the segments of the same document, so neighbouring chunks stay adjacent.
+        
+        Chunks with a document_id get stable content-hash ids; if
+        ids_by_document is given it is filled with document_id -> chunk ids
+        (stored in Document.vector_ids for per-document deletion).
+        """
         try:
             # Split texts into chunks
             chunks = []
             chunk_metadatas = []
+            next_chunk_id: Dict[Any, int] = {}
             
             for i, text in enumerate(texts):
                 text_chunks = self.text_splitter.split_text(text)
@@ -184,8 +434,11 @@ class RAGServiceOptimized:
                 if metadatas and i < len(metadatas):
                     base_metadata = metadatas[i]
                 
+                document = base_metadata.get("document_id") or base_metadata.get("filename") or ("text", i)
+                first = next_chunk_id.get(document, 0)
+                next_chunk_id[document] = first + len(text_chunks)
                 chunk_metadatas.extend([
-                    {**base_metadata, "chunk_id": j}
+                    {**base_metadata, "chunk_id": first + j}
                     for j in range(len(text_chunks))
                 ])
             
@@ -194,160 +447,626 @@ class RAGServiceOptimized:
                 print("⚠️ No chunks generated from texts (empty document?). Returning empty list.")
                 return []
 
+            # ⚡ Embed through the persistent cache (only misses hit the API)
+            vectors = await self._embed_chunks(chunks)
+            
             # ⚡ Run in thread pool (FAISS operations are blocking)
             loop = asyncio.get_event_loop()
             
-            if startup_id in self.vector_stores:
-                # Add to existing store
-                vector_store = self.vector_stores[startup_id]
-                ids = await loop.run_in_executor(
-                    self.executor,
-                    lambda: vector_store.add_texts(chunks, metadatas=chunk_metadatas)
-                )
-            else:
-                # Create new store
-                vector_store = await loop.run_in_executor(
-                    self.executor,
-                    lambda: FAISS.from_texts(chunks, self.embeddings, metadatas=chunk_metadatas)
-                )
-                self.vector_stores[startup_id] = vector_store
-                ids = [str(i) for i in range(len(chunks))]
+            # Portfolio must be loaded (or backfilled) before the new segment hits disk
+            await self.load_portfolio()
             
-            # Update access order
-            self._update_access_order(startup_id)
+            # Append a segment to the existing store (loading it if evicted),
+            # or start a new one - only the new chunks are written to disk
+            existing_store = await self._get_vector_store(startup_id)
+            if existing_store is None:
+                existing_store = SegmentedVectorStore(self._get_store_path(startup_id))
+            chunk_ids = self._stable_chunk_ids(chunks, chunk_metadatas)
+            vector_store, ids, new_rows = await loop.run_in_executor(
+                self.executor,
+                lambda: self._add_to_vector_store(existing_store, chunks, vectors, chunk_metadatas, chunk_ids)
+            )
+            # Re-measure and mark as most recently used
+            self._set_resident(startup_id, vector_store)
             
-            # ⚡⚡ Cleanup old vector stores
-            self._cleanup_old_vector_stores(startup_id)
+            # ⚡⚡ Evict least recently used stores beyond the memory budget
+            self._enforce_memory_budget(startup_id)
             
-            # Save to disk
-            store_path = self._get_store_path(startup_id)
+            # ⚡ Clear cache when new docs added
+            self.clear_cache(startup_id)
+            
+            # ⚡ Keep the portfolio centroids current (in memory now, on disk debounced)
             await loop.run_in_executor(
                 self.executor,
-                lambda: vector_store.save_local(store_path)
+                lambda: self.portfolio.add(startup_id, vectors[new_rows])
             )
+            self._schedule_portfolio_save()
             
-            # ⚡ Clear cache when new docs added
-            self.clear_cache(startup_id)
+            # ⚡ Merge segments in the background once there are too many
+            self._schedule_compaction(startup_id, vector_store)
+            
+            if ids_by_document is not None:
+                for chunk_id, metadata in zip(ids, chunk_metadatas):
+                    if metadata.get("document_id") is not None:
+                        ids_by_document.setdefault(metadata["document_id"], []).append(chunk_id)
             
             return ids
             
         except Exception as e:
             raise Exception(f"Failed to add documents: {str(e)}")
     
-    async def search(
+    def _schedule_compaction(self, startup_id: int, vector_store: SegmentedVectorStore):
+        """
+        Start a background compaction if the store passed the segment threshold,
+        or if deletions left a segment with too many tombstones (every search
+        over-fetches by the tombstone count until they are purged)
+        """
+        if (
+            vector_store.segment_count <= settings.SEGMENT_COMPACTION_THRESHOLD
+            and vector_store.max_deleted_fraction < settings.SEGMENT_TOMBSTONE_COMPACTION_RATIO
+        ):
+            return
+        if startup_id in self._compacting:
+            return
+        self._compacting.add(startup_id)
+        asyncio.get_event_loop().create_task(self._compact_store(startup_id, vector_store))
+    
+    async def _compact_store(self, startup_id: int, vector_store: SegmentedVectorStore):
+        """
+        Merge a store's segments off the event loop (chunk ids are preserved)
+
+        The store may be evicted and reloaded meanwhile; both instances share
+        the directory's write lock and manifest generation, so appends made
+        through the new one are kept.
+        """
+        try:
+            loop = asyncio.get_event_loop()
+            start = time.perf_counter()
+            merged = await loop.run_in_executor(self.executor, vector_store.compact)
+            if merged:
+                self._compactions += 1
+                # The merged segment replaced the old ones: re-measure (LRU order unchanged)
+                if self.vector_stores.get(startup_id) is vector_store:
+                    self._set_resident(startup_id, vector_store, touch=False)
+                print(f"   🧱 Compacted {merged} segments for startup {startup_id} "
+                      f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            print(f"   ⚠️ Compaction failed for startup {startup_id}: {str(e)}")
+        finally:
+            self._compacting.discard(startup_id)
+    
+    def _finish_load(self, startup_id: int, task: asyncio.Task):
+        if self._loading.get(startup_id) is task:
+            del self._loading[startup_id]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller was cancelled
+    
+    async def _load_vector_store(self, startup_id: int) -> Optional[SegmentedVectorStore]:
+        """Load a store from disk into RAM (exactly once per concurrent burst)"""
+        store_path = self._get_store_path(startup_id)
+        print(f"   Loading from: {store_path}")
+        
+        if not os.path.exists(store_path):
+            print(f"   ℹ️ No vector store on disk for startup {startup_id}")
+            return None
+        
+        # ⚡ Load in thread pool
+        loop = asyncio.get_event_loop()
+        load_start = time.perf_counter()
+        loaded_store = await loop.run_in_executor(
+            self.executor,
+            lambda: open_store(store_path)
+        )
+        self._last_load_seconds = time.perf_counter() - load_start
+        self._total_load_seconds += self._last_load_seconds
+        self._store_loads += 1
+        
+        self._set_resident(startup_id, loaded_store)
+        print(f"   ✅ Loaded vector store in {self._last_load_seconds * 1000:.0f}ms")
+        return loaded_store
+    
+    def _estimate_disk_store_bytes(self, startup_id: int) -> int:
+        """Resident size of a store before loading it (its files minus raw vectors/tombstones)"""
+        total = 0
+        for root, _, files in os.walk(self._get_store_path(startup_id)):
+            for name in files:
+                if name not in ("vectors.npy", "deleted.npy"):
+                    total += os.path.getsize(os.path.join(root, name))
+        return total
+    
+    async def prewarm(self, startup_ids: List[int]) -> int:
+        """
+        ⚡ Load the stores of recently active startups (most recent first) and
+        the fixed query embeddings, in the background after a restart
+        
+        Stops before the memory budget would force an eviction. Loads go
+        through _get_vector_store, so a request arriving mid-warm awaits the
+        in-flight load instead of starting its own. Returns stores loaded.
+        """
+        loop = asyncio.get_event_loop()
+        start = time.perf_counter()
+        
+        try:
+            await self.warm_query_embeddings()
+        except Exception as e:
+            print(f"   ⚠️ Prewarm: query embeddings not warmed: {str(e)}")
+        
+        # Pick what fits, most recent first ...
+        selected, planned_bytes = [], self._resident_bytes
+        for startup_id in startup_ids:
+            if startup_id in self.vector_stores or not os.path.exists(self._get_store_path(startup_id)):
+                continue
+            size = await loop.run_in_executor(
+                self.executor,
+                lambda: self._estimate_disk_store_bytes(startup_id)
+            )
+            if planned_bytes + size > self.memory_budget_bytes:
+                break
+            selected.append(startup_id)
+            planned_bytes += size
+        
+        # ... and load the most recent last, so it ends up most recently used
+        loaded = 0
+        for startup_id in reversed(selected):
+            try:
+                if await self._get_vector_store(startup_id) is not None:
+                    loaded += 1
+            except Exception as e:
+                print(f"   ⚠️ Prewarm failed for startup {startup_id}: {str(e)}")
+        
+        self._prewarmed += loaded
+        print(f"🔥 Prewarmed {loaded} vector stores in {time.perf_counter() - start:.2f}s "
+              f"({self._format_resident()})")
+        return loaded
+    
+    async def _get_vector_store(self, startup_id: int) -> Optional[SegmentedVectorStore]:
+        """
+        Return the startup's vector store, loading it from disk if needed
+        
+        ⚡ Single-flight: concurrent cold callers (e.g. the 9 parallel analysis
+        queries) await one shared load task instead of each loading a copy.
+        The load runs as its own task and every caller (the first included)
+        awaits it shielded, so a cancelled request cannot strand the others.
+        """
+        if startup_id in self.vector_stores:
+            # Update access order for LRU
+            self._update_access_order(startup_id)
+            vector_store = self.vector_stores[startup_id]
+        else:
+            task = self._loading.get(startup_id)
+            if task is not None:
+                self._duplicate_loads_avoided += 1
+                print(f"   ⏳ Awaiting in-flight load for startup {startup_id}")
+            else:
+                task = asyncio.ensure_future(self._load_vector_store(startup_id))
+                self._loading[startup_id] = task
+                task.add_done_callback(lambda done: self._finish_load(startup_id, done))
+            vector_store = await asyncio.shield(task)
+        
+        if vector_store is None:
+            return None
+        
+        # ⚡⚡ MEMORY OPTIMIZATION: Evict LRU stores beyond the byte budget
+        self._enforce_memory_budget(startup_id)
+        
+        return vector_store
+    
+    @staticmethod
+    def _valid_hits(scores: np.ndarray, chunk_ids: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Per-query (chunk ids, scores) with empty (-1) slots dropped"""
+        hits = []
+        for row_scores, row_ids in zip(scores, chunk_ids):
+            valid = row_ids != -1
+            hits.append((row_ids[valid], row_scores[valid]))
+        return hits
+    
+    def _search_matrix(
         self,
-        startup_id: int,
-        query: str,
-        k: int = 5
+        vector_store: SegmentedVectorStore,
+        query_vectors: np.ndarray,
+        k: int,
+        filters: Optional[MetadataFilter] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """⚡ One index.search over the stacked query matrix (BLAS-batched in FAISS)"""
+        rescore = settings.RESCORE_CANDIDATES if settings.TWO_STAGE_RESCORE else 0
+        distances, chunk_ids = vector_store.search(query_vectors, k, filters, rescore_candidates=rescore)
+        return self._valid_hits(distances, chunk_ids)
+    
+    def _lexical_matrix(
+        self,
+        vector_store: SegmentedVectorStore,
+        queries: List[str],
+        k: int,
+        filters: Optional[MetadataFilter] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """⚡ BM25 over the store's inverted indexes (no embedding API call)"""
+        scores, chunk_ids = vector_store.lexical_search(
+            queries, k, k1=settings.BM25_K1, b=settings.BM25_B, filters=filters
+        )
+        return self._valid_hits(scores, chunk_ids)
+    
+    @staticmethod
+    def _fuse_rrf(
+        ranked_lists: List[np.ndarray],
+        k: int,
+        rrf_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Reciprocal-rank fusion: score(id) = sum over lists of 1 / (rrf_k + rank)"""
+        fused: Dict[int, float] = {}
+        for chunk_ids in ranked_lists:
+            for rank, chunk_id in enumerate(chunk_ids):
+                chunk_id = int(chunk_id)
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+        
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        return (
+            np.array([chunk_id for chunk_id, _ in best], dtype=np.int64),
+            np.array([score for _, score in best], dtype=np.float32)
+        )
+    
+    async def _query_vectors_or_none(self, queries: List[str]) -> Optional[np.ndarray]:
+        """
+        Query vectors, or None if the embedding API fails or is too slow
+        
+        The embedding keeps running in the background after a timeout, so the
+        vectors still land in the registry/cache for the next search.
+        """
+        task = asyncio.ensure_future(self.query_embeddings.get_many(queries))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task),
+                timeout=settings.QUERY_EMBEDDING_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            print(f"   ⚠️ Query embedding slower than {settings.QUERY_EMBEDDING_TIMEOUT_SECONDS}s")
+        except Exception as e:
+            print(f"   ⚠️ Query embedding failed: {str(e)}")
+        return None
+    
+    @staticmethod
+    def _format_results(
+        vector_store: SegmentedVectorStore,
+        chunk_ids: np.ndarray,
+        scores: np.ndarray
     ) -> List[Dict[str, Any]]:
-        """Search for relevant documents - CACHED & ASYNC & MEMORY OPTIMIZED"""
+        """Materialize chunk ids + scores into result dicts (text read from the store)"""
+        formatted_results = []
+        for chunk_id, score in zip(chunk_ids, scores):
+            content, metadata = vector_store.get_chunk(chunk_id)
+            formatted_results.append({
+                "content": content,
+                "metadata": metadata,
+                "score": float(score),
+                "vector_id": int(chunk_id)
+            })
+        return formatted_results
+    
+    async def batch_search(
+        self,
+        startup_id: int,
+        queries: List[str],
+        k: int = 5,
+        filters: Optional[MetadataFilter] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        ⚡⚡ Batched search - CACHED & ASYNC & MEMORY OPTIMIZED & HYBRID
+        
+        All uncached queries are embedded in one API call (fixed queries come
+        from the registry), stacked into one float32 matrix and searched with a
+        single FAISS call instead of N independent embeddings + searches.
+        
+        With HYBRID_SEARCH, BM25 candidates are fused with the dense candidates
+        (reciprocal-rank fusion), and "score" is the fused score (higher is
+        better). If query embedding fails or times out, BM25 results are
+        returned on their own (and not cached).
+        
+        filters (see metadata_filter.py) prunes candidates BEFORE scoring:
+        only matching chunks are searched, densely and lexically. A filter
+        that matches nothing in this startup's store is ignored.
+        """
         try:
-            # ⚡ Check cache first
-            cached_results = self._get_from_cache(startup_id, query, k)
-            if cached_results is not None:
-                print(f"   💨 Cache HIT for query: {query[:50]}...")
-                return cached_results
+            vector_store = await self._get_vector_store(startup_id)
+            if vector_store is None:
+                return [[] for _ in queries]
+            
+            loop = asyncio.get_event_loop()
+            if filters:
+                matching = await loop.run_in_executor(
+                    self.executor,
+                    lambda: vector_store.count_matching(filters)
+                )
+                if matching == 0:
+                    self._filter_fallbacks += 1
+                    print(f"   🔎 No chunks match {filter_key(filters)} - searching all chunks")
+                    filters = None
+            fkey = filter_key(filters)
+            
+            results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+            
+            # ⚡ Check cache first (entries hold chunk ids + scores only)
+            pending = []
+            for i, query in enumerate(queries):
+                cached = self.query_cache.get((startup_id, self._hash_query(query), k, fkey))
+                if cached is not None:
+                    print(f"   💨 Cache HIT for query: {query[:50]}...")
+                    results[i] = self._format_results(vector_store, cached.chunk_ids, cached.scores)
+                else:
+                    pending.append(i)
+            
+            if not pending:
+                return results
             
             print(f"\n🔍 RAG SEARCH (cache miss):")
             print(f"   Startup ID: {startup_id}")
-            print(f"   Query: {query[:100]}...")
+            print(f"   Queries: {len(pending)} ({queries[pending[0]][:60]}...)")
             print(f"   K: {k}")
+            if filters:
+                self._filtered_searches += 1
+                print(f"   Filter: {fkey} ({matching}/{vector_store.ntotal} chunks)")
             
-            # Load vector store if not in memory
-            if startup_id not in self.vector_stores:
-                store_path = self._get_store_path(startup_id)
-                print(f"   Loading from: {store_path}")
-                
-                if os.path.exists(store_path):
-                    # ⚡ Load in thread pool
-                    loop = asyncio.get_event_loop()
-                    self.vector_stores[startup_id] = await loop.run_in_executor(
-                        self.executor,
-                        lambda: FAISS.load_local(store_path, self.embeddings, allow_dangerous_deserialization=True)
-                    )
-                    print(f"   ✅ Loaded vector store")
-                else:
-                    print(f"   ❌ Vector store not found!")
-                    return []
+            pending_queries = [queries[i] for i in pending]
+            hybrid = settings.HYBRID_SEARCH
+            depth = max(k, settings.HYBRID_CANDIDATES) if hybrid else k
             
-            # Update access order for LRU
-            self._update_access_order(startup_id)
+            # ⚡ Lexical candidates need no API call - start them right away
+            lexical_future = None
+            if hybrid:
+                lexical_future = loop.run_in_executor(
+                    self.executor,
+                    lambda: self._lexical_matrix(vector_store, pending_queries, depth, filters)
+                )
             
-            vector_store = self.vector_stores[startup_id]
+            # ⚡ Query vectors from the registry (one API call for all misses)
+            if hybrid:
+                query_vectors = await self._query_vectors_or_none(pending_queries)
+            else:
+                query_vectors = await self.query_embeddings.get_many(pending_queries)
             
-            # ⚡⚡ MEMORY OPTIMIZATION: Auto-cleanup after loading
-            # This ensures we never have more than MAX_VECTOR_STORES_IN_MEMORY
-            self._cleanup_old_vector_stores(startup_id)
+            if query_vectors is not None and query_vectors.shape[1] != vector_store.d:
+                # Store was built with another embedding provider - BM25 still works
+                print(f"   ⚠️ Query embeddings are {query_vectors.shape[1]}-dim, store is "
+                      f"{vector_store.d}-dim (EMBEDDING_PROVIDER changed?)")
+                query_vectors = None
+            
+            if query_vectors is None:
+                # ⚡ Zero-latency fallback: BM25 only, not cached
+                self._lexical_fallbacks += 1
+                print(f"   🔤 Falling back to lexical (BM25) results for {len(pending)} queries")
+                if lexical_future is None:
+                    lexical_future = loop.run_in_executor(
+                        self.executor,
+                        lambda: self._lexical_matrix(vector_store, pending_queries, depth, filters)
+                    )
+                lexical_hits = await lexical_future
+                for i, (chunk_ids, scores) in zip(pending, lexical_hits):
+                    results[i] = self._format_results(vector_store, chunk_ids[:k], scores[:k])
+                return results
             
             # ⚡ Search in thread pool (FAISS is blocking)
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
+            batch_hits = await loop.run_in_executor(
                 self.executor,
-                lambda: vector_store.similarity_search_with_score(query, k=k)
+                lambda: self._search_matrix(vector_store, query_vectors, depth, filters)
             )
             
-            print(f"   📊 Found {len(results)} results")
-            print(f"   💾 Vector stores in RAM: {len(self.vector_stores)}/{self.MAX_VECTOR_STORES_IN_MEMORY}")
+            if hybrid:
+                self._hybrid_searches += 1
+                lexical_hits = await lexical_future
+                batch_hits = [
+                    self._fuse_rrf([dense_ids, lexical_ids], k, settings.RRF_K)
+                    for (dense_ids, _), (lexical_ids, _) in zip(batch_hits, lexical_hits)
+                ]
             
-            formatted_results = []
-            for i, (doc, score) in enumerate(results):
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score)
-                })
+            print(f"   📊 Found {sum(len(ids) for ids, _ in batch_hits)} results for {len(pending)} queries")
+            print(f"   💾 Vector stores in RAM: {self._format_resident()}")
             
-            # ⚡ Store in cache
-            self._put_in_cache(startup_id, query, k, formatted_results)
+            for i, query, (chunk_ids, scores) in zip(pending, pending_queries, batch_hits):
+                # ⚡ Store in cache
+                self.query_cache.put((startup_id, self._hash_query(query), k, fkey), startup_id, chunk_ids, scores)
+                results[i] = self._format_results(vector_store, chunk_ids, scores)
             
-            return formatted_results
+            return results
             
         except Exception as e:
             print(f"   ❌ Search failed: {str(e)}")
             raise Exception(f"Search failed: {str(e)}")
     
+    async def search(
+        self,
+        startup_id: int,
+        query: str,
+        k: int = 5,
+        filters: Optional[MetadataFilter] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for relevant documents - CACHED & ASYNC & MEMORY OPTIMIZED
+        
+        filters restricts the search to matching chunks, e.g. {"file_type": "xlsx"}
+        or {"section": {"$contains": ["team", "founder"]}}
+        """
+        return (await self.batch_search(startup_id, [query], k=k, filters=filters))[0]
+    
     async def get_context(
         self,
         startup_id: int,
         query: str,
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        char_budget: Optional[int] = None,
+        filters: Optional[MetadataFilter] = None
+    ) -> List[str]:
+        """Get packed context passages for a query - CACHED"""
+        return (await self.batch_get_context(
+            startup_id, [query], max_chunks, char_budget, filters=[filters]
+        ))[0]
+    
+    def _assemble(
+        self,
+        vector_store: Optional[SegmentedVectorStore],
+        query: str,
+        results: List[Dict[str, Any]],
+        max_chunks: int,
+        char_budget: int
     ) -> List[str]:
-        """Get context chunks for a query - CACHED"""
-        results = await self.search(startup_id, query, k=max_chunks)
-        return [r["content"] for r in results]
+        """MMR over the candidates' stored vectors, then merge + pack"""
+        query_vector = self.query_embeddings.peek(query)
+        candidate_vectors = None
+        if query_vector is not None and vector_store is not None and results:
+            candidate_vectors = vector_store.get_vectors([r["vector_id"] for r in results])
+        
+        passages = assemble_context(
+            results,
+            max_chunks=max_chunks,
+            char_budget=char_budget,
+            max_overlap=self.chunk_overlap,
+            query_vector=query_vector,
+            candidate_vectors=candidate_vectors,
+            mmr_lambda=settings.CONTEXT_MMR_LAMBDA
+        )
+        self._context_raw_chars += sum(len(r["content"]) for r in results[:max_chunks])
+        self._context_packed_chars += sum(len(p) for p in passages)
+        return passages
     
     async def batch_get_context(
         self,
         startup_id: int,
         queries: List[str],
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        char_budget: Optional[int] = None,
+        filters: Optional[List[Optional[MetadataFilter]]] = None
     ) -> List[List[str]]:
-        """Get context for multiple queries in parallel - OPTIMIZED"""
-        tasks = [
-            self.get_context(startup_id, query, max_chunks)
-            for query in queries
-        ]
-        return await asyncio.gather(*tasks)
+        """
+        Get context for multiple queries with one embedding call and one FAISS search
+        
+        ⚡ With CONTEXT_ASSEMBLY, max_chunks * CONTEXT_CANDIDATE_MULTIPLIER
+        candidates are retrieved, diversified with MMR, adjacent chunks are
+        merged (overlap stripped) and the passages are packed under
+        char_budget (default max_chunks * CONTEXT_CHARS_PER_CHUNK).
+        
+        filters is one metadata filter (or None) per query; queries sharing a
+        filter are searched as one batch.
+        """
+        depth = max_chunks * max(1, settings.CONTEXT_CANDIDATE_MULTIPLIER) if settings.CONTEXT_ASSEMBLY else max_chunks
+        all_results = await self._batch_search_filtered(startup_id, queries, depth, filters)
+        if not settings.CONTEXT_ASSEMBLY:
+            return [[r["content"] for r in results] for results in all_results]
+        
+        budget = char_budget or max_chunks * settings.CONTEXT_CHARS_PER_CHUNK
+        
+        vector_store = self.vector_stores.get(startup_id)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: [
+                self._assemble(vector_store, query, results, max_chunks, budget)
+                for query, results in zip(queries, all_results)
+            ]
+        )
+    
+    async def _batch_search_filtered(
+        self,
+        startup_id: int,
+        queries: List[str],
+        k: int,
+        filters: Optional[List[Optional[MetadataFilter]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """batch_search with a per-query filter: one batched search per distinct filter"""
+        if not filters or not any(filters):
+            return await self.batch_search(startup_id, queries, k=k)
+        
+        groups: Dict[str, List[int]] = {}
+        for i, query_filter in enumerate(filters):
+            groups.setdefault(filter_key(query_filter), []).append(i)
+        
+        group_results = await asyncio.gather(*[
+            self.batch_search(startup_id, [queries[i] for i in members], k=k, filters=filters[members[0]])
+            for members in groups.values()
+        ])
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for members, hits in zip(groups.values(), group_results):
+            for i, query_results in zip(members, hits):
+                results[i] = query_results
+        return results
+    
+    async def delete_document(
+        self,
+        startup_id: int,
+        document_id: int,
+        chunk_ids: Optional[List[str]] = None,
+        legacy_filename: Optional[str] = None
+    ) -> int:
+        """
+        ⚡ Remove one document's chunks; returns how many were removed
+        
+        chunk_ids come from Document.vector_ids; without them the chunks are
+        found by their document_id metadata. Documents uploaded before chunks
+        carried a document_id only have their filename: pass legacy_filename
+        to match those chunks (ones without a document_id) by it. Only the
+        segments holding those chunks are touched, nothing is re-embedded, and
+        only cached results that returned one of the chunks are invalidated.
+        """
+        try:
+            vector_store = await self._get_vector_store(startup_id)
+            if vector_store is None:
+                return 0
+            
+            loop = asyncio.get_event_loop()
+            if chunk_ids:
+                ids = np.array([int(i) for i in chunk_ids], dtype=np.int64)
+            else:
+                ids = await loop.run_in_executor(
+                    self.executor,
+                    lambda: vector_store.ids_matching({"document_id": document_id})
+                )
+                if not len(ids) and legacy_filename:
+                    ids = await loop.run_in_executor(
+                        self.executor,
+                        lambda: vector_store.ids_matching({"filename": legacy_filename, "document_id": None})
+                    )
+            if not len(ids):
+                return 0
+            
+            removed_ids, removed_vectors = await loop.run_in_executor(
+                self.executor,
+                lambda: vector_store.pop_vectors(ids)
+            )
+            removed = len(removed_ids)
+            self._set_resident(startup_id, vector_store)
+            self._schedule_compaction(startup_id, vector_store)
+            invalidated = self.query_cache.invalidate_chunks(startup_id, ids)
+            
+            await self.load_portfolio()
+            await loop.run_in_executor(
+                self.executor,
+                lambda: self.portfolio.remove_chunks(startup_id, removed_vectors)
+            )
+            self._schedule_portfolio_save()
+            
+            print(f"🗑️ Removed {removed} chunks of document {document_id} "
+                  f"(startup {startup_id}, {invalidated} cached results invalidated)")
+            return removed
+            
+        except Exception as e:
+            raise Exception(f"Failed to delete document: {str(e)}")
     
     async def delete_startup_data(self, startup_id: int):
         """Delete all vector data for a startup"""
         try:
             # Remove from memory
-            if startup_id in self.vector_stores:
-                del self.vector_stores[startup_id]
-            
-            # Remove from access order
-            if startup_id in self._access_order:
-                self._access_order.remove(startup_id)
+            self._unload_store(startup_id)
             
             # Clear cache
             self.clear_cache(startup_id)
             
+            # Remove from the portfolio index
+            await self.load_portfolio()
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(self.executor, lambda: self.portfolio.remove_startup(startup_id))
+            self._schedule_portfolio_save()
+            
             # Remove from disk
             store_path = self._get_store_path(startup_id)
             if os.path.exists(store_path):
                 import shutil
-                loop = asyncio.get_event_loop()
                 await loop.run_in_executor(
                     self.executor,
                     lambda: shutil.rmtree(store_path)
@@ -356,6 +1075,96 @@ class RAGServiceOptimized:
         except Exception as e:
             raise Exception(f"Failed to delete data: {str(e)}")
     
+    # ─────────────────────────────────────────────
+    # Portfolio (cross-startup) search
+    # ─────────────────────────────────────────────
+    async def load_portfolio(self):
+        """Load the portfolio centroids (backfilled from startup stores on first run)"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            self.executor,
+            lambda: self.portfolio.ensure_loaded(settings.VECTOR_STORE_DIR)
+        )
+    
+    def _schedule_portfolio_save(self):
+        """Debounced save: one background write per burst of updates"""
+        if self._portfolio_save_task is not None and not self._portfolio_save_task.done():
+            return
+        self._portfolio_save_task = asyncio.get_event_loop().create_task(self._save_portfolio())
+    
+    async def _save_portfolio(self):
+        loop = asyncio.get_event_loop()
+        try:
+            while self.portfolio.dirty:
+                await asyncio.sleep(settings.PORTFOLIO_SAVE_DELAY_SECONDS)
+                await loop.run_in_executor(self.executor, self.portfolio.save)
+        except Exception as e:
+            print(f"   ⚠️ Failed to save portfolio index: {str(e)}")
+    
+    async def similar_startups(self, startup_id: int, k: int = 5) -> List[Dict[str, Any]]:
+        """Startups whose documents are closest to this one (centroid cosine similarity)"""
+        await self.load_portfolio()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: self.portfolio.similar_startups(startup_id, k)
+        )
+    
+    async def portfolio_search(
+        self,
+        query: str,
+        k: int = 10,
+        chunks_per_startup: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Search across startups; results grouped by startup, best chunk first
+        
+        ⚡ IVF over startups: the portfolio centroids pick the
+        PORTFOLIO_SEARCH_STARTUPS stores nearest to the query, and only those
+        are searched - loaded one at a time under the memory budget, like any
+        other search - so no global chunk index has to stay resident.
+        """
+        await self.load_portfolio()
+        query_vector = await self.query_embeddings.get(query)
+        loop = asyncio.get_event_loop()
+        candidates = await loop.run_in_executor(
+            self.executor,
+            lambda: self.portfolio.nearest_startups(query_vector, max(k, settings.PORTFOLIO_SEARCH_STARTUPS))
+        )
+        
+        results = []
+        for startup_id, _ in candidates:
+            vector_store = await self._get_vector_store(startup_id)
+            if vector_store is None or not vector_store.ntotal:
+                continue
+            chunks = await loop.run_in_executor(
+                self.executor,
+                lambda: self._best_chunks(vector_store, query_vector, chunks_per_startup)
+            )
+            if chunks:
+                results.append({"startup_id": startup_id, "similarity": chunks[0]["similarity"], "chunks": chunks})
+        
+        results.sort(key=lambda entry: -entry["similarity"])
+        return results[:k]
+    
+    @staticmethod
+    def _best_chunks(vector_store: SegmentedVectorStore, query_vector: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """Top-k chunks of one store with their cosine similarity to the query"""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        _, chunk_ids = vector_store.search(query, k)
+        chunk_ids = [int(i) for i in chunk_ids[0] if i != -1]
+        if not chunk_ids:
+            return []
+        vectors = vector_store.get_vectors(chunk_ids)
+        similarity = (vectors @ query[0]) / np.maximum(
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query[0]), 1e-12
+        )
+        order = np.argsort(-similarity, kind="stable")
+        return [
+            {"chunk_id": chunk_ids[i], "similarity": round(float(similarity[i]), 4)}
+            for i in order
+        ]
+    
     def print_cache_stats(self):
         """Print cache statistics"""
         stats = self.get_cache_stats()
@@ -363,8 +1172,25 @@ class RAGServiceOptimized:
         print(f"   Hits: {stats['hits']}")
         print(f"   Misses: {stats['misses']}")
         print(f"   Hit Rate: {stats['hit_rate']}%")
-        print(f"   Cache Size: {stats['cache_size']} queries")
-        print(f"   Vector Stores Loaded: {stats['vector_stores_loaded']}/{self.MAX_VECTOR_STORES_IN_MEMORY}")
+        print(f"   Cache Size: {stats['cache_size']} queries "
+              f"({stats['cache_bytes'] / 1024:.1f}KB, {stats['cache_evictions']} evicted, "
+              f"{stats['cache_expirations']} expired)")
+        print(f"   Vector Stores Loaded: {stats['vector_stores_loaded']} "
+              f"({stats['resident_bytes'] / 1024 / 1024:.1f}MB / {stats['memory_budget_bytes'] / 1024 / 1024:.0f}MB budget)")
+        print(f"   Evictions: {stats['evictions']} | Loads: {stats['store_loads']} "
+              f"(avg {stats['avg_load_ms']}ms, last {stats['last_load_ms']}ms) | "
+              f"Duplicate loads avoided: {stats['duplicate_loads_avoided']} | "
+              f"Compactions: {stats['compactions']} | Prewarmed: {stats['prewarmed_stores']}")
+        print(f"   Hybrid searches: {stats['hybrid_searches']} | "
+              f"Lexical fallbacks: {stats['lexical_fallbacks']} | "
+              f"Filtered searches: {stats['filtered_searches']} "
+              f"({stats['filter_fallbacks']} unmatched filters ignored)")
+        if stats['context_raw_chars']:
+            saved = 100 - stats['context_packed_chars'] / stats['context_raw_chars'] * 100
+            print(f"   Context: {stats['context_raw_chars']} raw chars -> "
+                  f"{stats['context_packed_chars']} packed ({saved:.0f}% saved)")
+        print(f"   Embedding Cache: {stats['embedding_cache_hits']} hits, "
+              f"{stats['embedding_cache_misses']} misses ({stats['embedding_cache_hit_rate']}%)")
 
 
 # Singleton instance
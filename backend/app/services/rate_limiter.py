@@ -0,0 +1,148 @@
+"""
+Rate Limiter
+Async token-bucket scheduler for LLM calls (requests/min + tokens/min) with AIMD
+
+- Two buckets refilled continuously: one request per call, estimated prompt
+  tokens per call; a call waits until both buckets cover it
+- Waiters are served FIFO under one lock, so concurrent coroutines cannot
+  race past the limit
+- AIMD: every success raises the rate additively (up to the configured
+  ceiling); every quota error halves it, and Retry-After pauses all callers
+"""
+
+import asyncio
+import re
+import time
+from typing import Dict, Any, Optional
+
+
+# "Please retry in 37.5s", "retry_delay { seconds: 37 }", "Retry-After: 37"
+_RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+]
+
+
+def parse_retry_after(error: Any) -> Optional[float]:
+    """Server-requested delay in seconds from a quota error (None if not given)"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    text = str(error)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    ⚡ RPM/TPM token buckets with additive-increase / multiplicative-decrease
+
+    The bucket capacity is one second of the current rate (at least one
+    request), so bursts stay short and throughput tracks the rate.
+    """
+
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        min_rpm: float = 10,
+        increase_rpm: float = 5,
+        decrease_factor: float = 0.5
+    ):
+        self.max_rpm = float(rpm)
+        self.max_tpm = float(tpm)
+        self.min_rpm = min(float(min_rpm), self.max_rpm)
+        self.increase_rpm = increase_rpm
+        self.decrease_factor = decrease_factor
+
+        self.rpm = self.max_rpm
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        # Stats
+        self.acquired = 0
+        self.throttled = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def tpm(self) -> float:
+        """Token rate scales with the request rate (same AIMD factor)"""
+        return self.max_tpm * self.rpm / self.max_rpm
+
+    @property
+    def _request_capacity(self) -> float:
+        return max(1.0, self.rpm / 60)
+
+    @property
+    def _token_capacity(self) -> float:
+        return self.tpm / 60
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._request_capacity, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self._token_capacity, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request of ~tokens prompt tokens fits under both limits"""
+        # A prompt larger than one second of TPM only has to wait for a full bucket
+        tokens = min(float(tokens), self._token_capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = max(
+                    self._blocked_until - now,
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm if self.tpm else 0.0,
+                )
+                if delay <= 0:
+                    break
+                waited += delay
+                await asyncio.sleep(delay)
+
+            self._requests -= 1
+            self._tokens -= tokens
+
+        self.acquired += 1
+        if waited:
+            self.throttled += 1
+            self.wait_seconds += waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Charge the difference once the real prompt token count is known"""
+        if actual_tokens is not None:
+            self._tokens -= actual_tokens - min(estimated_tokens, self._token_capacity)
+
+    def on_success(self):
+        """Additive increase, up to the configured ceiling"""
+        self.rpm = min(self.max_rpm, self.rpm + self.increase_rpm)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease; Retry-After pauses every caller"""
+        self.rate_limited += 1
+        self.rpm = max(self.min_rpm, self.rpm * self.decrease_factor)
+        self._requests = min(self._requests, self._request_capacity)
+        self._tokens = min(self._tokens, self._token_capacity)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": round(self.rpm, 1),
+            "max_rpm": self.max_rpm,
+            "tpm": round(self.tpm),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+            "wait_seconds": round(self.wait_seconds, 2),
+        }
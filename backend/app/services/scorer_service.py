@@ -14,8 +14,9 @@ class ScorerServiceOptimized:
     KEY IMPROVEMENTS:
     1. ✅ Parallel scoring of all 6 categories (not serial!)
     2. ✅ Single web search (cached and reused)
-    3. ✅ Batch RAG queries
+    3. ✅ Batch RAG queries (one embedding call + one FAISS search for all 6)
     4. ✅ Async-native throughout
+    5. ✅ Metadata-filtered retrieval (financials -> XLSX model, team -> team slides)
     
     TIME REDUCTION: 5+ minutes → 45-90 seconds
     """
@@ -29,6 +30,28 @@ class ScorerServiceOptimized:
         "financials_score": 0.10,
         "innovation_score": 0.10,
     }
+    
+    # Retrieval query for each category
+    CATEGORY_QUERIES = {
+        "team_score": "What is the team's background, experience, expertise, and track record? Who are the founders and key team members?",
+        "product_score": "What is the product innovation, technical feasibility, product-market fit, and differentiation from competitors?",
+        "market_score": "What is the market size (TAM/SAM/SOM), growth potential, market timing, and market accessibility?",
+        "traction_score": "What is the revenue, user growth, customer acquisition, partnerships, and key milestones achieved?",
+        "financials_score": "What are the unit economics (LTV/CAC), burn rate, runway, path to profitability, and financial projections?",
+        "innovation_score": "What is the technology innovation, intellectual property (patents), business model uniqueness, and competitive moat?",
+    }
+    
+    # ⚡ Where each category's evidence lives (chunk metadata filters).
+    # A filter that matches nothing for a startup falls back to all chunks.
+    TEAM_FILTER = {"section": {"$contains": ["team", "founder", "leadership", "management"]}}
+    CATEGORY_FILTERS = {
+        "team_score": TEAM_FILTER,
+        "financials_score": {"file_type": "xlsx"},
+    }
+    
+    FOUNDER_QUERY = "Who are the founders, CEO, CTO, and key team members? List their full names."
+    
+    REASONING_CONTEXT_QUERY = "Provide a comprehensive overview of the startup including: company name, product, technology, team, traction metrics, market opportunity, and key achievements."
 
     def _format_score(self, score: float) -> str:
         """Format score with max 2 decimals, removing trailing zeros"""
@@ -101,14 +124,27 @@ class ScorerServiceOptimized:
         
         phase2_start = asyncio.get_event_loop().time()
         
+        # ⚡ Retrieve context for all categories in one batched search
+        categories = list(self.WEIGHTS.keys())
+        try:
+            contexts = await rag_service.batch_get_context(
+                startup_id,
+                [self._get_category_query(category) for category in categories],
+                max_chunks=5,
+                filters=[self.CATEGORY_FILTERS.get(category) for category in categories]
+            )
+        except Exception as e:
+            print(f"⚠️ Batched retrieval failed: {e}")
+            contexts = [[] for _ in categories]
+        
         # Create scoring tasks for all categories
         scoring_tasks = {
             category: self._score_category_optimized(
-                startup_id, 
                 category, 
+                context, 
                 web_validation
             )
-            for category in self.WEIGHTS.keys()
+            for category, context in zip(categories, contexts)
         }
         
         # Execute all scorings in parallel
@@ -200,8 +236,9 @@ class ScorerServiceOptimized:
             # Get context about team/founders
             context = await rag_service.get_context(
                 startup_id, 
-                "Who are the founders, CEO, CTO, and key team members? List their full names.",
-                max_chunks=3
+                self.FOUNDER_QUERY,
+                max_chunks=3,
+                filters=self.TEAM_FILTER
             )
             
             if not context or sum(len(c) for c in context) < 50:
@@ -230,7 +267,9 @@ Example:
 
             result = await llm_service.generate_structured(
                 prompt=prompt,
-                context=None
+                context=None,
+                cache_version="founders-v1",
+                route="founders"
             )
             
             names = result.get("founder_names", [])
@@ -267,23 +306,13 @@ Example:
     
     async def _score_category_optimized(
         self,
-        startup_id: int,
         category: str,
+        context: List[str],
         web_validation: str = ""
     ) -> float:
-        """Score a specific category - OPTIMIZED with caching"""
+        """Score a specific category from its pre-fetched RAG context"""
         
         try:
-            # Get query for this category
-            query = self._get_category_query(category)
-            
-            # Get context (cached in RAG service)
-            context = await rag_service.get_context(
-                startup_id, 
-                query, 
-                max_chunks=5
-            )
-            
             if not context or sum(len(c) for c in context) < 50:
                 print(f"   ⚠️ {category}: Insufficient context")
                 return 50.0
@@ -294,7 +323,9 @@ Example:
             # Get LLM score
             result = await llm_service.generate_structured(
                 prompt=prompt,
-                context=None
+                context=None,
+                cache_version="score-v1",
+                route="score"
             )
             
             # Extract score with validation
@@ -312,17 +343,7 @@ Example:
     
     def _get_category_query(self, category: str) -> str:
         """Get search query for each category"""
-        
-        queries = {
-            "team_score": "What is the team's background, experience, expertise, and track record? Who are the founders and key team members?",
-            "product_score": "What is the product innovation, technical feasibility, product-market fit, and differentiation from competitors?",
-            "market_score": "What is the market size (TAM/SAM/SOM), growth potential, market timing, and market accessibility?",
-            "traction_score": "What is the revenue, user growth, customer acquisition, partnerships, and key milestones achieved?",
-            "financials_score": "What are the unit economics (LTV/CAC), burn rate, runway, path to profitability, and financial projections?",
-            "innovation_score": "What is the technology innovation, intellectual property (patents), business model uniqueness, and competitive moat?",
-        }
-        
-        return queries.get(category, "Analyze this startup")
+        return self.CATEGORY_QUERIES.get(category, "Analyze this startup")
     
     def _build_scoring_prompt(self, category: str, context: List[str], web_validation: str = "") -> str:
         """Build prompt for scoring a category"""
@@ -447,8 +468,7 @@ Example with web validation impact:
         print(f"\n--- Generating Overall Reasoning ---")
         
         # Get comprehensive context
-        context_query = "Provide a comprehensive overview of the startup including: company name, product, technology, team, traction metrics, market opportunity, and key achievements."
-        context = await rag_service.get_context(startup_id, context_query, max_chunks=8)
+        context = await rag_service.get_context(startup_id, self.REASONING_CONTEXT_QUERY, max_chunks=8)
         
         if not context:
             return self._generate_simple_reasoning(scores, overall)
@@ -510,7 +530,8 @@ Act as a Senior VC Analyst. Review the deck AND web validation to generate a con
                 prompt=prompt,
                 context=None,
                 temperature=0.7,
-                max_tokens=16000
+                max_tokens=16000,
+                route="reasoning"
             )
             
             reasoning = reasoning.strip()
@@ -565,5 +586,12 @@ Consider this investment opportunity with careful attention to the identified we
         return reasoning
 
 
+# ⚡ Fixed queries: embedded once and persisted by the RAG service
+rag_service.register_fixed_queries([
+    *ScorerServiceOptimized.CATEGORY_QUERIES.values(),
+    ScorerServiceOptimized.FOUNDER_QUERY,
+    ScorerServiceOptimized.REASONING_CONTEXT_QUERY,
+])
+
 # Singleton
 scorer_service = ScorerServiceOptimized()
\ No newline at end of file
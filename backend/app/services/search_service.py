@@ -158,7 +158,9 @@ DO NOT include markdown, explanations, or code blocks."""
                 prompt=prompt,
                 context=None,
                 temperature=0.2,  # Lower temp for focused output
-                max_tokens=500    # Short response
+                max_tokens=500,   # Short response
+                cache_version="search-queries-v1",
+                route="search_queries"
             )
             
             # Clean and parse
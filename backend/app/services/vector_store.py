@@ -0,0 +1,1064 @@
+"""
+Vector Store
+Pickle-free, memory-mapped, append-only on-disk format for per-startup vector stores
+
+Layout of a store directory (startup_{id}/):
+    manifest.json   format version, dimension, next chunk id, live segment names
+    seg_000001/     one immutable segment per add_documents call (or compaction)
+    seg_000002/
+    ...
+
+Layout of a segment directory:
+    manifest.json   segment format version, dimension, chunk count, index type
+    index.faiss     FAISS index (IndexIDMap2 over flat/fp16/sq8/ivfpq), read read-only with
+                    IO_FLAG_MMAP (IVF lists mapped; flat codes only with IO_FLAG_MMAP_IFC,
+                    faiss >= 1.8); may cover only the first EMBEDDING_TRUNCATE_DIM dims (Matryoshka)
+    ids.npy         int64 chunk id per row (unique across segments)
+    vectors.npy     full-dimension float32 vectors in row order (memory-mapped; used by
+                    compaction and exact two-stage rescoring)
+    offsets.npy     int64 offsets (n + 1) into chunks.bin
+    chunks.bin      UTF-8 blob with all chunk texts back to back
+    metadata.json   compact JSON list with one metadata dict per row
+    lexical_*       BM25 inverted index over the chunk texts (see lexical_index.py)
+    deleted.npy     int64 tombstones: chunk ids removed since the segment was written
+                    (filtered out at search time, purged by compaction)
+
+Chunk ids are stable: int63 content hashes of (document_id, chunk text), or
+sequential ids for chunks that do not belong to a Document row.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import mmap
+import pickle
+import shutil
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import numpy as np
+import faiss
+
+from .index_factory import (
+    build_index, apply_search_params, index_type_of, index_nbytes,
+    resolve_index_dim, truncate_vectors
+)
+from .lexical_index import LexicalIndex, tokenize
+from .metadata_filter import MetadataFilter, matches_filter, filter_key
+
+
+FORMAT_VERSION = 1            # segment directory
+SEGMENTED_FORMAT_VERSION = 2  # startup directory (list of segments)
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+IDS_FILE = "ids.npy"
+VECTORS_FILE = "vectors.npy"
+OFFSETS_FILE = "offsets.npy"
+CHUNKS_FILE = "chunks.bin"
+METADATA_FILE = "metadata.json"
+DELETED_FILE = "deleted.npy"
+
+# add_segment: id slot to be filled with the next sequential id
+AUTO_ID = -1
+
+# Legacy LangChain FAISS.save_local layout
+LEGACY_PICKLE_FILE = "index.pkl"
+
+# ⚡ Zero-copy mmap of flat codes needs IO_FLAG_MMAP_IFC (faiss >= 1.8); with older
+# builds IO_FLAG_MMAP maps only IVF inverted lists and flat/sq8 codes are read into RAM.
+# Mapped indexes are read-only: tombstones are filtered at search time, never removed.
+MMAP_READ_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+# Locks keyed by real store path, shared by every object that opens that directory
+_path_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(kind: str, path: str) -> threading.Lock:
+    key = (kind, os.path.realpath(path))
+    with _path_locks_guard:
+        return _path_locks.setdefault(key, threading.Lock())
+
+
+def _read_tombstones(path: str) -> np.ndarray:
+    deleted_path = os.path.join(path, DELETED_FILE)
+    if os.path.exists(deleted_path):
+        return np.load(deleted_path)
+    return np.zeros(0, dtype=np.int64)
+
+
+def stable_chunk_id(document_id: Any, content: str, occurrence: int = 0) -> int:
+    """
+    Content-hash chunk id in [0, 2^63): the same chunk of the same document
+    always gets the same id (occurrence disambiguates repeated identical chunks)
+    """
+    key = f"{document_id}\x00{occurrence}\x00{content}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def _encode_metadatas(metadatas: List[Dict[str, Any]]) -> str:
+    return json.dumps(metadatas, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ChunkStore:
+    """
+    Array-backed chunk store: one UTF-8 blob + int64 offsets + compact JSON metadata
+
+    Loaded stores memory-map the blob and offsets, so chunk texts are only
+    paged in when a search result actually needs them, and the pages are
+    shared between worker processes through the OS page cache.
+    The store is immutable, so its metadata size is measured once (at build,
+    or from the metadata file at load) rather than on every nbytes call.
+    """
+
+    def __init__(
+        self,
+        blob,
+        offsets: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        metadata_bytes: Optional[int] = None
+    ):
+        self._blob = blob
+        self.offsets = offsets
+        self.metadatas = metadatas
+        self._metadata_bytes = metadata_bytes
+
+    @classmethod
+    def build(cls, texts: List[str], metadatas: List[Dict[str, Any]]) -> "ChunkStore":
+        encoded = [t.encode("utf-8") for t in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            offsets[1:] = np.cumsum([len(e) for e in encoded])
+        metadatas = list(metadatas)
+        metadata_bytes = len(_encode_metadatas(metadatas).encode("utf-8"))
+        return cls(b"".join(encoded), offsets, metadatas, metadata_bytes)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_text(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def get_metadata(self, row: int) -> Dict[str, Any]:
+        return self.metadatas[row]
+
+    def texts(self) -> List[str]:
+        return [self.get_text(row) for row in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        if self._metadata_bytes is None:
+            self._metadata_bytes = len(_encode_metadatas(self.metadatas).encode("utf-8"))
+        return int(self.offsets[-1]) + self.offsets.nbytes + self._metadata_bytes
+
+    def write(self, path: str):
+        with open(os.path.join(path, CHUNKS_FILE), "wb") as f:
+            f.write(bytes(self._blob[:int(self.offsets[-1])]))
+        np.save(os.path.join(path, OFFSETS_FILE), self.offsets)
+        with open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as f:
+            f.write(_encode_metadatas(self.metadatas))
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkStore":
+        offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        metadata_path = os.path.join(path, METADATA_FILE)
+        with open(metadata_path, encoding="utf-8") as f:
+            metadatas = json.load(f)
+
+        blob_path = os.path.join(path, CHUNKS_FILE)
+        if os.path.getsize(blob_path) == 0:
+            blob = b""
+        else:
+            with open(blob_path, "rb") as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(blob, offsets, metadatas, os.path.getsize(metadata_path))
+
+
+class MmapVectorStore:
+    """
+    ⚡ Immutable vector store segment in the native on-disk format
+
+    - FAISS index wrapped in IndexIDMap2, so search returns chunk ids
+    - Index type from the index factory (exact or quantized, per VECTOR_INDEX_TYPE)
+    - Chunk texts/metadata in a ChunkStore (no pickle, no LangChain docstore)
+    - BM25 inverted index over the same rows, built at ingest
+    - Raw vectors kept alongside (vectors.npy) so segments can be merged
+      without reconstructing them from the index
+    - Cold load = read manifest + mmap files; nothing is unpickled
+    - Deletions are tombstones filtered out of search results; the index
+      itself is never edited (it may be memory-mapped read-only)
+    """
+
+    def __init__(
+        self,
+        index: faiss.Index,
+        chunks: ChunkStore,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        lexical: LexicalIndex,
+        path: Optional[str] = None,
+        deleted: Optional[np.ndarray] = None
+    ):
+        self.index = index
+        self.chunks = chunks
+        self.ids = ids
+        self.vectors = vectors
+        self.lexical = lexical
+        self.path = path
+        # Tombstoned chunk ids (still in the index and files, filtered at search time)
+        self.deleted = np.zeros(0, dtype=np.int64) if deleted is None else np.asarray(deleted, dtype=np.int64)
+        self._row_of: Optional[Dict[int, int]] = None
+        self._filter_masks: Dict[str, np.ndarray] = {}  # filter key -> row mask (segment is immutable)
+
+    # ─────────────────────────────────────────────
+    # Construction
+    # ─────────────────────────────────────────────
+    @classmethod
+    def create(
+        cls,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[np.ndarray] = None,
+        index_type: Optional[str] = None
+    ) -> "MmapVectorStore":
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if ids is None:
+            ids = np.arange(len(texts), dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int64)
+
+        # ⚡ The index may hold only the leading dims; vectors keep full dimension
+        index_dim = resolve_index_dim(vectors.shape[1])
+        index = build_index(truncate_vectors(vectors, index_dim), ids, index_type)
+        return cls(index, ChunkStore.build(texts, metadatas), ids, vectors, LexicalIndex.build(texts))
+
+    @classmethod
+    def merge(
+        cls,
+        segments: List["MmapVectorStore"],
+        index_type: Optional[str] = None
+    ) -> "MmapVectorStore":
+        """
+        One segment holding every live chunk of the given segments
+        (ids preserved, tombstoned rows dropped, index retrained)
+        """
+        texts, metadatas, vectors, ids = [], [], [], []
+        for segment in segments:
+            rows = np.flatnonzero(segment.live_mask())
+            texts.extend(segment.chunks.get_text(row) for row in rows.tolist())
+            metadatas.extend(segment.chunks.metadatas[row] for row in rows.tolist())
+            vectors.append(np.asarray(segment.vectors[rows]))
+            ids.append(np.asarray(segment.ids)[rows])
+        return cls.create(np.concatenate(vectors), texts, metadatas, np.concatenate(ids), index_type)
+
+    # ─────────────────────────────────────────────
+    # Queries
+    # ─────────────────────────────────────────────
+    @property
+    def ntotal(self) -> int:
+        """Live chunks (index rows minus tombstones)"""
+        return self.index.ntotal - len(self.deleted)
+
+    @property
+    def deleted_fraction(self) -> float:
+        """Share of index rows that are tombstones (searches over-fetch by their count)"""
+        return len(self.deleted) / self.index.ntotal if self.index.ntotal else 0.0
+
+    @property
+    def d(self) -> int:
+        """Embedding dimension (full, as stored in vectors.npy)"""
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else self.index.d
+
+    @property
+    def index_dim(self) -> int:
+        """Dimensions the index searches over (< d when truncated)"""
+        return self.index.d
+
+    @property
+    def index_type(self) -> str:
+        return index_type_of(self.index)
+
+    def nbytes(self) -> int:
+        """Resident size estimate: index codes + chunk store + lexical index"""
+        return index_nbytes(self.index) + self.chunks.nbytes + self.lexical.nbytes
+
+    def _rows(self) -> Dict[int, int]:
+        if self._row_of is None:
+            self._row_of = {int(chunk_id): row for row, chunk_id in enumerate(self.ids)}
+        return self._row_of
+
+    def live_mask(self) -> np.ndarray:
+        """Boolean row mask of the chunks that are not tombstoned"""
+        return self.filter_mask(None)
+
+    def filter_mask(self, filters: Optional[MetadataFilter]) -> np.ndarray:
+        """Boolean row mask of the live chunks matching a metadata filter (memoized per filter)"""
+        key = filter_key(filters)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            if filters:
+                mask = np.fromiter(
+                    (matches_filter(metadata, filters) for metadata in self.chunks.metadatas),
+                    dtype=bool,
+                    count=len(self.chunks)
+                )
+            else:
+                mask = np.ones(len(self.chunks), dtype=bool)
+            if len(self.deleted):
+                mask &= ~np.isin(np.asarray(self.ids), self.deleted)
+            self._filter_masks[key] = mask
+        return mask
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        filters: Optional[MetadataFilter] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched search; returns (distances, chunk ids) with -1 for empty slots"""
+        # Full-dim queries are projected into the index's (possibly truncated) space
+        query_vectors = truncate_vectors(np.ascontiguousarray(query_vectors, dtype=np.float32), self.index_dim)
+        if filters:
+            return self._filtered_search(query_vectors, k, self.filter_mask(filters))
+        k = min(k, self.ntotal)
+        if k <= 0:
+            n = len(query_vectors)
+            return np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.int64)
+        if not len(self.deleted):
+            return self.index.search(query_vectors, k)
+        return self._search_live(query_vectors, k)
+
+    def _search_live(self, query_vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Post-filter tombstones: over-fetch by the tombstone count, drop deleted
+        ids and keep the first k live hits per query (order preserved)
+        """
+        distances, chunk_ids = self.index.search(
+            query_vectors, min(k + len(self.deleted), self.index.ntotal)
+        )
+        dead = np.isin(chunk_ids, self.deleted)
+        order = np.argsort(dead, axis=1, kind="stable")[:, :k]
+        distances = np.take_along_axis(distances, order, axis=1)
+        chunk_ids = np.take_along_axis(chunk_ids, order, axis=1)
+        dead = np.take_along_axis(dead, order, axis=1)
+        distances[dead] = np.finfo(np.float32).max
+        chunk_ids[dead] = -1
+        return distances, chunk_ids
+
+    def _filtered_search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ⚡ Pre-filtered search: exact squared L2 over ONLY the matching rows
+
+        Filtered candidate sets are small (one file / a few slides), so one
+        numpy matmul over the raw vectors beats searching the whole index
+        and discarding non-matching hits.
+        """
+        rows = np.flatnonzero(mask)
+        k = min(k, len(rows))
+        n = len(query_vectors)
+        if k <= 0:
+            return np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.int64)
+
+        candidates = truncate_vectors(self.vectors[rows], self.index_dim)
+        distances = (
+            (query_vectors ** 2).sum(axis=1, keepdims=True)
+            - 2 * query_vectors @ candidates.T
+            + (candidates ** 2).sum(axis=1)
+        )
+        top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, top, axis=1).astype(np.float32),
+            np.asarray(self.ids, dtype=np.int64)[rows[top]]
+        )
+
+    def get_chunk(self, chunk_id: int) -> Tuple[str, Dict[str, Any]]:
+        row = self._rows()[int(chunk_id)]
+        return self.chunks.get_text(row), self.chunks.get_metadata(row)
+
+    def get_vector(self, chunk_id: int) -> np.ndarray:
+        return np.asarray(self.vectors[self._rows()[int(chunk_id)]], dtype=np.float32)
+
+    # ─────────────────────────────────────────────
+    # Deletion
+    # ─────────────────────────────────────────────
+    def without(self, chunk_ids: np.ndarray) -> Optional["MmapVectorStore"]:
+        """
+        Copy of this segment with chunk_ids removed (None if none of them are here)
+
+        ⚡ Only the tombstone list changes: index, texts, vectors and the
+        lexical index are shared (the index may be memory-mapped read-only),
+        and on disk only the small deleted.npy file of this segment is rewritten.
+        """
+        live_ids = np.asarray(self.ids)[self.live_mask()]
+        hits = live_ids[np.isin(live_ids, chunk_ids)]
+        if not len(hits):
+            return None
+
+        deleted = np.union1d(self.deleted, hits)
+        if self.path is not None:
+            tmp_file = os.path.join(self.path, f"{DELETED_FILE}.tmp.npy")
+            np.save(tmp_file, deleted)
+            os.replace(tmp_file, os.path.join(self.path, DELETED_FILE))
+        return MmapVectorStore(
+            self.index, self.chunks, self.ids, self.vectors, self.lexical,
+            path=self.path, deleted=deleted
+        )
+
+    def with_tombstones(self, deleted: np.ndarray) -> "MmapVectorStore":
+        """This segment with another tombstone list (self if unchanged)"""
+        if np.array_equal(np.sort(self.deleted), np.sort(deleted)):
+            return self
+        return MmapVectorStore(
+            self.index, self.chunks, self.ids, self.vectors, self.lexical,
+            path=self.path, deleted=deleted
+        )
+
+    # ─────────────────────────────────────────────
+    # Persistence
+    # ─────────────────────────────────────────────
+    def save(self, path: str):
+        """Write the store atomically (tmp dir + rename) and keep using it from disk"""
+        tmp_path = f"{path}.tmp"
+        old_path = f"{path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        faiss.write_index(self.index, os.path.join(tmp_path, INDEX_FILE))
+        np.save(os.path.join(tmp_path, IDS_FILE), np.asarray(self.ids, dtype=np.int64))
+        np.save(os.path.join(tmp_path, VECTORS_FILE), np.asarray(self.vectors, dtype=np.float32))
+        self.chunks.write(tmp_path)
+        self.lexical.write(tmp_path)
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "dim": self.d,
+                "index_dim": self.index_dim,
+                "count": self.index.ntotal,
+                "index_type": self.index_type,
+            }, f)
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.path = path
+        # Raw vectors are only needed again for compaction - page them from disk
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+
+    @classmethod
+    def load(cls, path: str) -> "MmapVectorStore":
+        """
+        Cold load without unpickling: ids, vectors and the chunk blob are
+        memory-mapped; the index is mapped as far as the faiss build allows
+        (see MMAP_READ_FLAGS) and read into RAM otherwise
+        """
+        index = faiss.read_index(os.path.join(path, INDEX_FILE), MMAP_READ_FLAGS)
+        apply_search_params(index)
+        ids = np.load(os.path.join(path, IDS_FILE), mmap_mode="r")
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        if os.path.exists(vectors_path):
+            vectors = np.load(vectors_path, mmap_mode="r")
+        else:
+            vectors = _reconstruct_vectors(index)
+        chunks = ChunkStore.load(path)
+        if LexicalIndex.exists(path):
+            lexical = LexicalIndex.load(path)
+        else:
+            lexical = LexicalIndex.build(chunks.texts())
+        return cls(index, chunks, ids, vectors, lexical, path=path, deleted=_read_tombstones(path))
+
+
+def _reconstruct_vectors(index: faiss.Index) -> np.ndarray:
+    """Row-ordered vectors of a flat index (optionally wrapped in IndexIDMap2) - legacy segments only"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    if inner.ntotal == 0:
+        return np.zeros((0, inner.d), dtype=np.float32)
+    return inner.reconstruct_n(0, inner.ntotal)
+
+
+class SegmentedVectorStore:
+    """
+    ⚡ Per-startup vector store made of append-only segments
+
+    - add_segment writes ONLY the new chunks (a new segment dir) plus a tiny
+      manifest, so upload latency stays flat as the corpus grows
+    - search fans out over the segments and merges the per-segment top-k
+    - lexical_search scores BM25 over all segments with corpus-wide IDF
+    - compact() merges segments into one (run in the background) and purges
+      tombstoned rows; chunk ids are preserved, so cached search results stay valid
+    - Writes are serialized per directory, not per instance: an instance that
+      is still compacting after LRU eviction and its reloaded successor share
+      one lock, and each write first catches up with the manifest generation
+      written by the other
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        dim: Optional[int] = None,
+        segments: Optional[List[MmapVectorStore]] = None,
+        segment_names: Optional[List[str]] = None,
+        next_id: int = 0,
+        next_segment: int = 1,
+        generation: int = 0
+    ):
+        self.path = path
+        self.dim = dim
+        # Copy-on-write lists: searches iterate a stable snapshot
+        self.segments: List[MmapVectorStore] = segments or []
+        self.segment_names: List[str] = segment_names or []
+        self.next_id = next_id
+        self.next_segment = next_segment
+        self.generation = generation  # manifest writes seen by this instance
+        self._lock = _path_lock("store", path) if path is not None else threading.Lock()
+        self._segment_of: Optional[Dict[int, MmapVectorStore]] = None
+
+    # ─────────────────────────────────────────────
+    # Writes
+    # ─────────────────────────────────────────────
+    def _new_segment_name(self) -> str:
+        name = f"seg_{self.next_segment:06d}"
+        self.next_segment += 1
+        return name
+
+    def _write_manifest(self):
+        if self.path is None:
+            return
+        self.generation += 1
+        tmp_file = os.path.join(self.path, f"{MANIFEST_FILE}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({
+                "format": SEGMENTED_FORMAT_VERSION,
+                "dim": self.dim,
+                "next_id": self.next_id,
+                "next_segment": self.next_segment,
+                "generation": self.generation,
+                "segments": self.segment_names,
+            }, f)
+        os.replace(tmp_file, os.path.join(self.path, MANIFEST_FILE))
+
+    def _sync_locked(self):
+        """
+        Catch up with manifest writes made through another instance of this
+        directory (caller holds the path lock); segments already open are reused
+        """
+        if self.path is None:
+            return
+        manifest = _read_manifest(self.path)
+        if manifest is None or manifest.get("generation", 0) == self.generation:
+            return
+        open_segments = dict(zip(self.segment_names, self.segments))
+        segments = []
+        for name in manifest["segments"]:
+            segment_path = os.path.join(self.path, name)
+            segment = open_segments.get(name)
+            if segment is None:
+                segment = MmapVectorStore.load(segment_path)
+            else:
+                segment = segment.with_tombstones(_read_tombstones(segment_path))
+            segments.append(segment)
+        self.segments = segments
+        self.segment_names = list(manifest["segments"])
+        self.dim = manifest.get("dim") or self.dim
+        self.next_id = max(self.next_id, manifest["next_id"])
+        self.next_segment = max(self.next_segment, manifest["next_segment"])
+        self.generation = manifest.get("generation", 0)
+        self._segment_of = None
+
+    def add_segment(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Append chunks as a new immutable segment; returns their chunk ids
+
+        ids: stable chunk ids (AUTO_ID slots get sequential ids). Chunks whose
+        id is already live in the store are skipped, so re-adding the same
+        document content is a no-op.
+        """
+        return self.append(vectors, texts, metadatas, ids)[0]
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """add_segment that also returns which input rows were actually stored (not skipped)"""
+        if self.dim and vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match the store ({self.dim}) - "
+                f"was EMBEDDING_PROVIDER changed? Re-index this startup's documents."
+            )
+        with self._lock:
+            self._sync_locked()
+            if ids is None:
+                ids = np.full(len(texts), AUTO_ID, dtype=np.int64)
+            ids = np.array(ids, dtype=np.int64)
+            auto = ids == AUTO_ID
+            ids[auto] = np.arange(self.next_id, self.next_id + int(auto.sum()), dtype=np.int64)
+            self.next_id += int(auto.sum())
+
+            live = np.concatenate(
+                [np.asarray(segment.ids)[segment.live_mask()] for segment in self.segments]
+            ) if self.segments else np.zeros(0, dtype=np.int64)
+            _, first = np.unique(ids, return_index=True)
+            new_rows = np.sort(first[~np.isin(ids[first], live)])
+            if not len(new_rows):
+                return ids, new_rows
+
+            segment = MmapVectorStore.create(
+                vectors[new_rows],
+                [texts[row] for row in new_rows.tolist()],
+                [metadatas[row] for row in new_rows.tolist()],
+                ids[new_rows]
+            )
+            name = self._new_segment_name()
+
+            if self.path is not None:
+                os.makedirs(self.path, exist_ok=True)
+                segment.save(os.path.join(self.path, name))
+
+            self.dim = segment.d
+            self.segments = self.segments + [segment]
+            self.segment_names = self.segment_names + [name]
+            self._segment_of = None
+            self._write_manifest()
+        return ids, new_rows
+
+    def compact(self) -> int:
+        """
+        Merge all current segments into one; returns how many were merged
+
+        A single segment with tombstones is rewritten without them. The merged
+        segment is built outside the lock, so uploads can keep appending
+        segments meanwhile - those stay after the merged one.
+        """
+        with self._lock:
+            self._sync_locked()
+            segments = list(self.segments)
+            names = list(self.segment_names)
+            if len(segments) < 2 and not any(len(segment.deleted) for segment in segments):
+                return 0
+            merged_name = self._new_segment_name()
+            # Reserve the name on disk, so no other instance can allocate it
+            self._write_manifest()
+
+        merged = MmapVectorStore.merge(segments)
+        if self.path is not None:
+            merged.save(os.path.join(self.path, merged_name))
+
+        with self._lock:
+            self._sync_locked()
+            if self.segment_names[:len(names)] != names:
+                # Another instance compacted this store meanwhile - drop our merge
+                if self.path is not None:
+                    shutil.rmtree(os.path.join(self.path, merged_name), ignore_errors=True)
+                return 0
+            # Chunks removed while merging must stay removed
+            removed_meanwhile = [
+                np.setdiff1d(current.deleted, snapshot.deleted)
+                for current, snapshot in zip(self.segments, segments)
+                if current is not snapshot
+            ]
+            if removed_meanwhile:
+                merged = merged.without(np.concatenate(removed_meanwhile)) or merged
+            self.segments = [merged] + self.segments[len(segments):]
+            self.segment_names = [merged_name] + self.segment_names[len(names):]
+            self._segment_of = None
+            self._write_manifest()
+
+        if self.path is not None:
+            # Open mmaps keep unlinked files readable for in-flight searches
+            for name in names:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        return len(segments)
+
+    # ─────────────────────────────────────────────
+    # Queries
+    # ─────────────────────────────────────────────
+    @property
+    def ntotal(self) -> int:
+        return sum(segment.ntotal for segment in self.segments)
+
+    @property
+    def d(self) -> int:
+        return self.dim or 0
+
+    @property
+    def segment_count(self) -> int:
+        return len(self.segments)
+
+    @property
+    def max_deleted_fraction(self) -> float:
+        """Largest tombstone share of any segment (0.0 when nothing was deleted)"""
+        return max((segment.deleted_fraction for segment in self.segments), default=0.0)
+
+    def nbytes(self) -> int:
+        return sum(segment.nbytes() for segment in self.segments)
+
+    def count_matching(self, filters: Optional[MetadataFilter]) -> int:
+        """How many chunks a metadata filter keeps"""
+        if not filters:
+            return self.ntotal
+        return int(sum(segment.filter_mask(filters).sum() for segment in self.segments))
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        filters: Optional[MetadataFilter] = None,
+        rescore_candidates: int = 0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fan out over segments and merge the per-segment top-k (ascending L2)
+
+        rescore_candidates > k enables two-stage search: a coarse pass over the
+        (truncated / quantized) indexes for that many hits, then exact
+        full-dimension L2 rescoring from vectors.npy, keeping the best k.
+        """
+        if rescore_candidates > k:
+            distances, chunk_ids = self._coarse_search(query_vectors, rescore_candidates, filters)
+            return self._rescore(query_vectors, distances, chunk_ids, k)
+        return self._coarse_search(query_vectors, k, filters)
+
+    def _rescore(
+        self,
+        query_vectors: np.ndarray,
+        distances: np.ndarray,
+        chunk_ids: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact squared L2 at full dimension for the coarse hits (one gather for the batch)"""
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        unique_ids = np.unique(chunk_ids[chunk_ids != -1])
+        if not len(unique_ids):
+            return distances[:, :k], chunk_ids[:, :k]
+        full = self.get_vectors(unique_ids.tolist())
+        positions = np.searchsorted(unique_ids, np.where(chunk_ids == -1, unique_ids[0], chunk_ids))
+
+        exact = ((query_vectors[:, None, :] - full[positions]) ** 2).sum(axis=2)
+        exact = np.where(chunk_ids == -1, np.inf, exact).astype(np.float32)
+        top = np.argsort(exact, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(exact, top, axis=1), np.take_along_axis(chunk_ids, top, axis=1)
+
+    def _coarse_search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        filters: Optional[MetadataFilter] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        segments = self.segments
+        if not segments:
+            n = len(query_vectors)
+            return np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.int64)
+        if len(segments) == 1:
+            return segments[0].search(query_vectors, k, filters)
+
+        parts = [segment.search(query_vectors, k, filters) for segment in segments]
+        distances = np.hstack([p[0] for p in parts])
+        chunk_ids = np.hstack([p[1] for p in parts])
+        # Empty slots (-1) must sort last
+        distances = np.where(chunk_ids == -1, np.inf, distances)
+
+        top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, top, axis=1),
+            np.take_along_axis(chunk_ids, top, axis=1)
+        )
+
+    def lexical_search(
+        self,
+        queries: List[str],
+        k: int,
+        k1: float = 1.2,
+        b: float = 0.75,
+        filters: Optional[MetadataFilter] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ⚡ BM25 top-k per query (no embedding needed); returns (scores, chunk ids),
+        best first, with -1 for empty slots
+
+        IDF stays corpus-wide; a metadata filter only restricts which rows can rank.
+        """
+        segments = self.segments
+        n_docs = sum(len(segment.lexical) for segment in segments)
+        scores_out = np.zeros((len(queries), k), dtype=np.float32)
+        ids_out = np.full((len(queries), k), -1, dtype=np.int64)
+        if not n_docs or k <= 0:
+            return scores_out, ids_out
+        avg_length = sum(segment.lexical.total_length for segment in segments) / n_docs
+        allowed = None
+        if filters or any(len(segment.deleted) for segment in segments):
+            allowed = np.concatenate([segment.filter_mask(filters) for segment in segments])
+
+        for qi, query in enumerate(queries):
+            terms = list(dict.fromkeys(tokenize(query)))
+            idf = {}
+            for term in terms:
+                df = sum(segment.lexical.document_frequency(term) for segment in segments)
+                idf[term] = float(np.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+
+            all_scores = np.concatenate([
+                segment.lexical.score(terms, idf, avg_length, k1, b) for segment in segments
+            ])
+            all_ids = np.concatenate([np.asarray(segment.ids) for segment in segments])
+            if allowed is not None:
+                all_scores[~allowed] = 0
+
+            matched = np.flatnonzero(all_scores > 0)
+            if not len(matched):
+                continue
+            top = matched[np.argsort(-all_scores[matched], kind="stable")[:k]]
+            scores_out[qi, :len(top)] = all_scores[top]
+            ids_out[qi, :len(top)] = all_ids[top]
+        return scores_out, ids_out
+
+    def remove_ids(self, chunk_ids: List[int]) -> int:
+        """
+        ⚡ Remove chunks by id; returns how many were removed
+
+        Only segments holding those chunks are touched (tombstone file);
+        everything else stays as is on disk.
+        """
+        return len(self.pop_vectors(chunk_ids)[0])
+
+    def pop_vectors(self, chunk_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """remove_ids that returns (removed chunk ids, their full vectors) - only live chunks count"""
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        removed_ids, removed_vectors = [], []
+        with self._lock:
+            self._sync_locked()
+            segments = list(self.segments)
+            for i, segment in enumerate(segments):
+                updated = segment.without(chunk_ids)
+                if updated is not None:
+                    hits = np.setdiff1d(updated.deleted, segment.deleted)
+                    removed_ids.append(hits)
+                    removed_vectors.append(np.vstack([segment.get_vector(chunk_id) for chunk_id in hits.tolist()]))
+                    segments[i] = updated
+            if removed_ids:
+                self.segments = segments
+                self._segment_of = None
+                # New generation: other instances re-read the tombstones
+                self._write_manifest()
+        if not removed_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.d), dtype=np.float32)
+        return np.concatenate(removed_ids), np.vstack(removed_vectors)
+
+    def ids_matching(self, filters: MetadataFilter) -> np.ndarray:
+        """Live chunk ids whose metadata matches a filter (e.g. {"document_id": 7})"""
+        if not self.segments:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([
+            np.asarray(segment.ids)[segment.filter_mask(filters)] for segment in self.segments
+        ])
+
+    def _segment_for(self, chunk_id: int) -> MmapVectorStore:
+        segment_of = self._segment_of
+        if segment_of is None:
+            segment_of = {
+                int(i): segment for segment in self.segments for i in segment.ids
+            }
+            self._segment_of = segment_of
+        return segment_of[int(chunk_id)]
+
+    def get_chunk(self, chunk_id: int) -> Tuple[str, Dict[str, Any]]:
+        return self._segment_for(chunk_id).get_chunk(chunk_id)
+
+    def get_vectors(self, chunk_ids: List[int]) -> np.ndarray:
+        """Full-precision vectors for chunk ids (rows of the mmapped vectors.npy)"""
+        if not len(chunk_ids):
+            return np.zeros((0, self.d), dtype=np.float32)
+        return np.vstack([self._segment_for(i).get_vector(i) for i in chunk_ids])
+
+    # ─────────────────────────────────────────────
+    # Persistence
+    # ─────────────────────────────────────────────
+    @classmethod
+    def load(cls, path: str) -> "SegmentedVectorStore":
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        names = manifest["segments"]
+        return cls(
+            path,
+            dim=manifest.get("dim"),
+            segments=[MmapVectorStore.load(os.path.join(path, name)) for name in names],
+            segment_names=list(names),
+            next_id=manifest["next_id"],
+            next_segment=manifest["next_segment"],
+            generation=manifest.get("generation", 0)
+        )
+
+
+# ═════════════════════════════════════════════════
+# Migration (LangChain pickle / un-segmented layouts)
+# ═════════════════════════════════════════════════
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    manifest_file = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def is_native_store(path: str) -> bool:
+    manifest = _read_manifest(path)
+    return manifest is not None and "segments" in manifest
+
+
+def is_single_store(path: str) -> bool:
+    """Un-segmented native layout (store files directly in startup_{id}/)"""
+    manifest = _read_manifest(path)
+    return manifest is not None and "segments" not in manifest
+
+
+def is_legacy_store(path: str) -> bool:
+    return (
+        _read_manifest(path) is None
+        and os.path.exists(os.path.join(path, LEGACY_PICKLE_FILE))
+        and os.path.exists(os.path.join(path, INDEX_FILE))
+    )
+
+
+def _rewrite_as_segmented(path: str, store: MmapVectorStore):
+    """
+    Turn path into a segmented store whose only segment is store, in place
+
+    The segment is written under a unique temp dir inside path and renamed
+    into place; the atomic manifest replace is the commit point, so readers
+    see either the old layout or the complete new one. Files of the old
+    layout are removed afterwards.
+    """
+    old_entries = [name for name in os.listdir(path) if name != MANIFEST_FILE]
+
+    segmented = SegmentedVectorStore(
+        path,
+        dim=store.d,
+        next_id=int(np.max(store.ids)) + 1 if len(store.ids) else 0
+    )
+    name = segmented._new_segment_name()
+    tmp_path = tempfile.mkdtemp(prefix=".migrate_", dir=path)
+    try:
+        store.save(os.path.join(tmp_path, name))
+        # Left over by an interrupted migration (never committed to a manifest)
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        os.rename(os.path.join(tmp_path, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    segmented.segment_names = [name]
+    segmented._write_manifest()
+
+    for entry in old_entries:
+        entry_path = os.path.join(path, entry)
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+        elif os.path.exists(entry_path):
+            os.remove(entry_path)
+
+
+def upgrade_single_store(path: str):
+    """Move an un-segmented native store into its first segment"""
+    _rewrite_as_segmented(path, MmapVectorStore.load(path))
+
+
+def migrate_legacy_store(path: str):
+    """
+    One-shot conversion of a LangChain FAISS.save_local directory
+
+    The pickle is read one last time (these files were written by this app),
+    vectors are copied out of the flat index in row order and the directory
+    is rewritten in the native format.
+    """
+    legacy_index = faiss.read_index(os.path.join(path, INDEX_FILE))
+    with open(os.path.join(path, LEGACY_PICKLE_FILE), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    n = legacy_index.ntotal
+    vectors = legacy_index.reconstruct_n(0, n) if n else np.zeros((0, legacy_index.d), dtype=np.float32)
+
+    texts, metadatas = [], []
+    for row in range(n):
+        doc = docstore.search(index_to_docstore_id[row])
+        texts.append(doc.page_content)
+        metadatas.append(dict(doc.metadata))
+
+    _rewrite_as_segmented(path, MmapVectorStore.create(vectors, texts, metadatas))
+
+
+def open_store(path: str) -> SegmentedVectorStore:
+    """Open a startup store directory, migrating older layouts once (thread-safe)"""
+    if is_legacy_store(path) or is_single_store(path):
+        # Prewarm, the portfolio backfill and requests may open one store at once
+        with _path_lock("migrate", path):
+            # Re-check: another caller may have migrated it while we waited
+            if is_legacy_store(path):
+                print(f"   🔁 Migrating legacy store to native format: {path}")
+                migrate_legacy_store(path)
+            elif is_single_store(path):
+                print(f"   🔁 Upgrading store to segmented format: {path}")
+                upgrade_single_store(path)
+    return SegmentedVectorStore.load(path)
+
+
+def iter_live_vectors(path: str) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (chunk ids, full vectors) of the live chunks, per segment, for any layout
+
+    Read-only: unlike open_store it never migrates, so background readers
+    (portfolio backfill) cannot rewrite a store that requests are opening.
+    Legacy rows get the sequential ids migration would assign them.
+    """
+    if is_legacy_store(path):
+        legacy_index = faiss.read_index(os.path.join(path, INDEX_FILE))
+        n = legacy_index.ntotal
+        if n:
+            yield np.arange(n, dtype=np.int64), legacy_index.reconstruct_n(0, n)
+        return
+    if is_single_store(path):
+        segments = [MmapVectorStore.load(path)]
+    else:
+        segments = SegmentedVectorStore.load(path).segments
+    for segment in segments:
+        rows = np.flatnonzero(segment.live_mask())
+        if len(rows):
+            yield np.asarray(segment.ids)[rows], np.asarray(segment.vectors[rows], dtype=np.float32)
+
+
+def migrate_all_legacy_stores(root: str) -> int:
+    """Migrate every legacy or un-segmented startup_{id} directory under root; returns count"""
+    migrated = 0
+    if not os.path.isdir(root):
+        return migrated
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not (name.startswith("startup_") and os.path.isdir(path)):
+            continue
+        if is_legacy_store(path) or is_single_store(path):
+            print(f"🔁 Migrating {name} to native vector store format...")
+            open_store(path)
+            migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    # python -m app.services.vector_store [VECTOR_STORE_DIR]
+    from ..config import settings
+
+    root_dir = sys.argv[1] if len(sys.argv) > 1 else settings.VECTOR_STORE_DIR
+    count = migrate_all_legacy_stores(root_dir)
+    print(f"✅ Migrated {count} legacy vector store(s) in {root_dir}")
@@ -0,0 +1,157 @@
+"""
+Benchmark: N independent searches vs. one batched search
+
+Compares the old retrieval path with RAGServiceOptimized.batch_search (one
+embedding call + one index.search over the stacked query matrix) for the
+9 analysis queries and the 15 analysis + scoring queries.
+
+The old path is reproduced as it ran before batching: every query is one
+task on a private 4-worker thread pool (the old service executor) doing its
+own embed_query + single-query FAISS search, all gathered concurrently. It
+does not go through the service's shared embedding executor, so the
+speedup is not inflated by batch-of-1 calls queueing behind each other.
+
+The embedding API is replaced by a deterministic stub with a configurable
+per-call latency, so no API key is needed.
+
+Usage (from backend/):
+    python benchmarks/batch_search_benchmark.py --chunks 2000 --embed-latency-ms 150
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TMP = tempfile.mkdtemp(prefix="rag_bench_")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ["VECTOR_STORE_DIR"] = os.path.join(_TMP, "vector_store")
+os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(_TMP, "embedding_cache")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rag_service import RAGServiceOptimized  # noqa: E402
+from app.services.embedding_providers import GeminiEmbeddingProvider  # noqa: E402
+
+ANALYSIS_QUERIES = [
+    "What is the business model and value proposition?",
+    "Who is the target market and customers?",
+    "What is the competitive landscape?",
+    "What is the team's background and expertise?",
+    "What is the current traction and milestones?",
+    "What are the financial projections and unit economics?",
+    "What are the main risks and challenges?",
+    "What is the go-to-market strategy?",
+    "What is the technology or product innovation?",
+]
+
+SCORING_QUERIES = [
+    "What is the team's background, experience, expertise, and track record?",
+    "What is the product innovation, technical feasibility, product-market fit?",
+    "What is the market size (TAM/SAM/SOM), growth potential, market timing?",
+    "What is the revenue, user growth, customer acquisition, partnerships?",
+    "What are the unit economics (LTV/CAC), burn rate, runway?",
+    "What is the technology innovation, intellectual property, competitive moat?",
+]
+
+
+class StubEmbeddings(Embeddings):
+    """Deterministic 768-dim embeddings with simulated API latency per call"""
+
+    def __init__(self, latency_s: float, dim: int = 768):
+        self.latency_s = latency_s
+        self.dim = dim
+        self.calls = 0
+
+    def _vector(self, text: str) -> list:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text, **kwargs):
+        return self.embed_documents([text])[0]
+
+
+def _independent_search(stub: StubEmbeddings, store, query: str, k: int):
+    """Old per-query path: embed one query, search the index with it"""
+    vector = np.asarray([stub.embed_query(query)], dtype=np.float32)
+    return store.search(vector, k)
+
+
+async def run(chunks: int, latency_ms: float, repeats: int):
+    # The service logs every search; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = RAGServiceOptimized()
+    stub = StubEmbeddings(latency_ms / 1000)
+    service.embedding_provider = GeminiEmbeddingProvider(service.embedding_model, "benchmark", client=stub)
+
+    # Build one startup store directly from random vectors (no ingest cost)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((chunks, stub.dim)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(chunks)]
+    store, _, _ = service._add_to_vector_store(None, texts, vectors, [{} for _ in texts])
+    service.vector_stores[1] = store
+
+    # Same pool size as the old service executor (embed + search ran in it per query)
+    old_executor = ThreadPoolExecutor(max_workers=4)
+    loop = asyncio.get_running_loop()
+
+    print(f"Corpus: {chunks} chunks x {stub.dim} dims, simulated embed latency {latency_ms:.0f} ms/call")
+    print(f"{'queries':>8} {'independent (ms)':>18} {'batched (ms)':>14} {'speedup':>8} {'API calls':>12}")
+
+    for label, queries in (("9", ANALYSIS_QUERIES), ("15", ANALYSIS_QUERIES + SCORING_QUERIES)):
+        independent, batched = [], []
+        calls_independent = calls_batched = 0
+        for trial in range(repeats):
+            # Fresh query strings each trial so neither path hits a cache
+            old_queries = [f"{q} [independent {label}/{trial}]" for q in queries]
+            new_queries = [f"{q} [batched {label}/{trial}]" for q in queries]
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                c0 = stub.calls
+                t0 = time.perf_counter()
+                await asyncio.gather(*[
+                    loop.run_in_executor(old_executor, _independent_search, stub, store, q, 5)
+                    for q in old_queries
+                ])
+                independent.append(time.perf_counter() - t0)
+                calls_independent = stub.calls - c0
+
+                c0 = stub.calls
+                t0 = time.perf_counter()
+                await service.batch_search(1, new_queries, k=5)
+                batched.append(time.perf_counter() - t0)
+                calls_batched = stub.calls - c0
+
+        old_ms = np.median(independent) * 1000
+        new_ms = np.median(batched) * 1000
+        print(f"{label:>8} {old_ms:>18.1f} {new_ms:>14.1f} {old_ms / new_ms:>7.1f}x "
+              f"{calls_independent:>5} -> {calls_batched:<4}")
+
+    old_executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--embed-latency-ms", type=float, default=150.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.embed_latency_ms, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: recall vs. memory for the vector index types
+
+Builds every VECTOR_INDEX_TYPE (flat, fp16, sq8, ivfpq) over the same
+synthetic corpus and reports resident bytes per vector, build time, query
+latency and recall@k against the exact flat index.
+
+The corpus is clustered, unit-norm 768-dim float32 vectors with a low
+intrinsic dimension (a rough stand-in for Gemini embeddings of a few hundred
+decks); no API key is needed.
+
+Usage (from backend/):
+    python benchmarks/index_recall_benchmark.py --vectors 50000 --queries 500 --k 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.index_factory import (  # noqa: E402
+    INDEX_TYPES, build_index, index_nbytes, index_type_of
+)
+
+
+def make_corpus(n: int, n_queries: int, dim: int, clusters: int, seed: int = 0):
+    """Clustered unit vectors with low intrinsic dimension (like text embeddings)"""
+    rng = np.random.default_rng(seed)
+    latent_dim = 64
+    projection = rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    centers = rng.standard_normal((clusters, latent_dim)).astype(np.float32)
+
+    def sample(count: int) -> np.ndarray:
+        latent = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, latent_dim))
+        x = latent.astype(np.float32) @ projection + 0.05 * rng.standard_normal((count, dim)).astype(np.float32)
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    return sample(n), sample(n_queries)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.vectors, args.queries, args.dim, args.clusters)
+    ids = np.arange(args.vectors, dtype=np.int64)
+
+    print(f"Corpus: {args.vectors} x {args.dim} dims, {args.queries} queries, recall@{args.k} vs. flat")
+    print(f"{'type':>6} {'built as':>9} {'bytes/vec':>10} {'total MB':>9} {'build s':>8} "
+          f"{'query ms':>9} {'recall':>7}")
+
+    truth = None
+    for index_type in INDEX_TYPES:
+        t0 = time.perf_counter()
+        index = build_index(vectors, ids, index_type)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _, found = index.search(queries, args.k)
+        query_ms = (time.perf_counter() - t0) * 1000 / args.queries
+
+        if truth is None:
+            truth = found  # flat is first: exact ground truth
+        nbytes = index_nbytes(index)
+        print(f"{index_type:>6} {index_type_of(index):>9} {nbytes / args.vectors:>10.0f} "
+              f"{nbytes / 1024 / 1024:>9.1f} {build_s:>8.2f} {query_ms:>9.3f} "
+              f"{recall_at_k(found, truth):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
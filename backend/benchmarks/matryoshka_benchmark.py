@@ -0,0 +1,150 @@
+"""
+Benchmark: Matryoshka truncation and two-stage rescoring
+
+Builds a SegmentedVectorStore per EMBEDDING_TRUNCATE_DIM (768 / 512 / 256 / 128)
+over the same vectors and reports index bytes per vector, query latency and
+recall@k against exact full-dimension search - once for the truncated index
+alone and once with exact full-dim rescoring of the top candidates
+(SegmentedVectorStore.search(..., rescore_candidates=N), as used by
+rag_service when TWO_STAGE_RESCORE is on).
+
+Data:
+- default: synthetic clustered unit vectors whose variance decays with the
+  dimension index (Matryoshka-trained embeddings front-load information)
+- --store DIR: the vectors of a real startup store (e.g. data/vector_store/startup_1),
+  queried with the analysis + scoring queries embedded by the configured
+  EMBEDDING_PROVIDER (needs GOOGLE_API_KEY for gemini)
+
+Usage (from backend/):
+    python benchmarks/matryoshka_benchmark.py --vectors 20000 --queries 500 --k 5
+    python benchmarks/matryoshka_benchmark.py --store data/vector_store/startup_1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings  # noqa: E402
+from app.services.index_factory import index_nbytes  # noqa: E402
+from app.services.vector_store import SegmentedVectorStore, open_store  # noqa: E402
+
+ANALYSIS_QUERIES = [
+    "What is the business model and value proposition?",
+    "Who is the target market and customers?",
+    "What is the competitive landscape?",
+    "What is the team's background and expertise?",
+    "What is the current traction and milestones?",
+    "What are the financial projections and unit economics?",
+    "What are the main risks and challenges?",
+    "What is the go-to-market strategy?",
+    "What is the technology or product innovation?",
+]
+
+SCORING_QUERIES = [
+    "What is the team's background, experience, expertise, and track record?",
+    "What is the product innovation, technical feasibility, product-market fit?",
+    "What is the market size (TAM/SAM/SOM), growth potential, market timing?",
+    "What is the revenue, user growth, customer acquisition, partnerships?",
+    "What are the unit economics (LTV/CAC), burn rate, runway?",
+    "What is the technology innovation, intellectual property, competitive moat?",
+]
+
+
+def make_corpus(n: int, n_queries: int, dim: int, clusters: int, seed: int = 0):
+    """Clustered unit vectors with per-dimension scale ~ 1/sqrt(i) (Matryoshka-like)"""
+    rng = np.random.default_rng(seed)
+    latent_dim = 64
+    projection = rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    projection *= (1.0 / np.sqrt(np.arange(1, dim + 1))).astype(np.float32)
+    centers = rng.standard_normal((clusters, latent_dim)).astype(np.float32)
+
+    def sample(count: int) -> np.ndarray:
+        latent = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, latent_dim))
+        x = latent.astype(np.float32) @ projection + 0.01 * rng.standard_normal((count, dim)).astype(np.float32)
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    return sample(n), sample(n_queries)
+
+
+def load_real(store_dir: str):
+    """Vectors of an existing store + the embedded analysis/scoring queries"""
+    from app.services.embedding_providers import create_embedding_provider
+
+    store = open_store(store_dir)
+    vectors = np.vstack([np.asarray(s.vectors, dtype=np.float32) for s in store.segments if s.ntotal])
+    provider = create_embedding_provider(
+        settings.EMBEDDING_PROVIDER, settings.EMBEDDING_MODEL, settings.GOOGLE_API_KEY,
+        settings.EMBEDDING_STATIC_MODEL_DIR, settings.EMBEDDING_HASHING_DIM
+    )
+    return vectors, provider.embed_queries(ANALYSIS_QUERIES + SCORING_QUERIES)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def timed_search(store: SegmentedVectorStore, queries: np.ndarray, k: int, rescore: int = 0):
+    t0 = time.perf_counter()
+    _, found = store.search(queries, k, rescore_candidates=rescore)
+    return found, (time.perf_counter() - t0) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--dims", type=str, default="768,512,256,128")
+    parser.add_argument("--index-type", type=str, default="flat")
+    parser.add_argument("--rescore", type=int, default=50, help="coarse candidates rescored at full dim")
+    parser.add_argument("--store", type=str, default=None)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.store:
+        vectors, queries = load_real(args.store)
+        source = f"store {args.store}"
+    else:
+        vectors, queries = make_corpus(args.vectors, args.queries, args.dim, args.clusters)
+        source = "synthetic"
+    n, dim = vectors.shape
+    texts = [""] * n
+    metadatas = [{} for _ in range(n)]
+    ids = np.arange(n, dtype=np.int64)
+
+    # Exact ground truth: brute-force L2 at full dimension
+    distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :]
+    truth = np.argsort(distances, axis=1, kind="stable")[:, :args.k]
+
+    settings.VECTOR_INDEX_TYPE = args.index_type
+    root = tempfile.mkdtemp(prefix="matryoshka_bench_")
+    print(f"Corpus: {source}, {n} x {dim} dims, {len(queries)} queries, "
+          f"{args.index_type} index, recall@{args.k} vs. exact full-dim")
+    print(f"{'dim':>5} {'bytes/vec':>10} {'total MB':>9} {'query ms':>9} {'recall':>7} "
+          f"{'+rescore ms':>12} {'recall':>7}")
+
+    for truncate_dim in [int(x) for x in args.dims.split(",")]:
+        settings.EMBEDDING_TRUNCATE_DIM = truncate_dim
+        store = SegmentedVectorStore(os.path.join(root, f"dim_{truncate_dim}"))
+        store.add_segment(vectors, texts, metadatas, ids=ids)
+        store = SegmentedVectorStore.load(store.path)
+
+        nbytes = sum(index_nbytes(segment.index) for segment in store.segments)
+        coarse, coarse_ms = timed_search(store, queries, args.k)
+        rescored, rescore_ms = timed_search(store, queries, args.k, args.rescore)
+        print(f"{store.segments[0].index_dim:>5} {nbytes / n:>10.0f} {nbytes / 1024 / 1024:>9.1f} "
+              f"{coarse_ms:>9.3f} {recall_at_k(coarse, truth):>7.3f} "
+              f"{rescore_ms:>12.3f} {recall_at_k(rescored, truth):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
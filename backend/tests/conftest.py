@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+# Settings are read at import time: point every store at a throwaway directory
+_DATA_DIR = tempfile.mkdtemp(prefix="startup_analyzer_tests_")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hashing")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DATA_DIR}/test.db")
+os.environ.setdefault("UPLOAD_DIR", f"{_DATA_DIR}/uploads")
+os.environ.setdefault("VECTOR_STORE_DIR", f"{_DATA_DIR}/vector_store")
+os.environ.setdefault("EMBEDDING_CACHE_DIR", f"{_DATA_DIR}/embedding_cache")
+os.environ.setdefault("LLM_CACHE_PATH", f"{_DATA_DIR}/llm_cache/responses.sqlite3")
+os.environ.setdefault("LLM_MODEL_CACHE_FILE", f"{_DATA_DIR}/llm_model.json")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_legacy_store():
+    """Writes a LangChain FAISS.save_local directory (the pre-native store layout)"""
+    from langchain_core.embeddings import Embeddings
+    from langchain_community.vectorstores import FAISS
+
+    class RandomEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            rng = np.random.default_rng(len(texts))
+            return rng.standard_normal((len(texts), 16)).astype(np.float32).tolist()
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    def make(path, n):
+        texts = [f"chunk {i}" for i in range(n)]
+        FAISS.from_texts(texts, RandomEmbeddings(), metadatas=[{"chunk_id": i} for i in range(n)]).save_local(path)
+
+    return make
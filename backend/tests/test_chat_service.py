@@ -0,0 +1,32 @@
+import asyncio
+
+from app.database import Base, SessionLocal, engine
+from app.models.models import ChatMessage
+from app.services import chat_service as chat_module
+from app.services.chat_service import chat_service
+
+
+def _collect(events):
+    async def run():
+        return [event async for event in events]
+    return asyncio.run(run())
+
+
+def test_stream_error_after_first_delta_reports_error_and_saves_nothing(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+
+    async def broken_stream(**kwargs):
+        yield "The team has "
+        raise Exception("connection reset")
+
+    monkeypatch.setattr(chat_module.llm_service, "generate_stream", broken_stream)
+
+    events = _collect(chat_service._stream_answer(1, "user-1", "Who is on the team?", "prompt", []))
+
+    assert [event["event"] for event in events] == ["delta", "error"]
+    assert events[-1]["data"]["incomplete"] is True
+    db = SessionLocal()
+    try:
+        assert db.query(ChatMessage).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,54 @@
+from app.services.context_assembly import merge_adjacent, strip_overlap
+
+
+def _result(content, chunk_id, **metadata):
+    return {"content": content, "metadata": {"document_id": 1, "chunk_id": chunk_id, **metadata}}
+
+
+def test_strip_overlap_removes_splitter_overlap():
+    previous = "The company was founded in 2021 by two engineers from Google."
+    following = "two engineers from Google. They raised a seed round in 2022."
+    assert strip_overlap(previous, following, 200) == " They raised a seed round in 2022."
+
+
+def test_strip_overlap_ignores_short_coincidental_match():
+    assert strip_overlap("Our team has 5 engineers", "sales grew 40%", 200) == "sales grew 40%"
+    assert strip_overlap("We sell to SMBs in Europe", "Europe is our first market", 200) == "Europe is our first market"
+
+
+def test_strip_overlap_ignores_match_inside_a_word():
+    previous = "Revenue reached 1.2M ARR with expansion revenue from enterprise"
+    following = "ion revenue from enterprise customers growing 3x"
+    assert strip_overlap(previous, following, 200, min_overlap=5) == following
+
+
+def test_merge_adjacent_keeps_non_overlapping_neighbours_intact():
+    merged = merge_adjacent([_result("Our team has 5 engineers", 0), _result("sales grew 40%", 1)], 200)
+    assert merged == ["Our team has 5 engineers\nsales grew 40%"]
+
+
+def test_merge_adjacent_strips_real_overlap():
+    first = "The company was founded in 2021 by two engineers from Google."
+    second = "two engineers from Google. They raised a seed round in 2022."
+    merged = merge_adjacent([_result(first, 0), _result(second, 1)], 200)
+    assert merged == [first + " They raised a seed round in 2022."]
+
+
+def test_merge_adjacent_does_not_cross_page_boundaries():
+    merged = merge_adjacent([
+        _result("Revenue grew 3x year over year in all regions.", 4, page=2),
+        _result("Revenue grew 3x year over year in all regions. Team slide.", 5, page=3),
+    ], 200)
+    assert merged == [
+        "Revenue grew 3x year over year in all regions.",
+        "Revenue grew 3x year over year in all regions. Team slide.",
+    ]
+
+
+def test_merge_adjacent_merges_within_the_same_slide():
+    merged = merge_adjacent([
+        _result("Our team has 5 engineers", 7, slide=3),
+        _result("sales grew 40%", 8, slide=3),
+        _result("Market slide", 9, slide=4),
+    ], 200)
+    assert merged == ["Our team has 5 engineers\nsales grew 40%", "Market slide"]
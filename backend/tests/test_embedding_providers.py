@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_providers import EmbeddingProvider, HashingEmbeddingProvider
+
+
+def test_provider_missing_methods_fails_at_instantiation():
+    class NoModelId(EmbeddingProvider):
+        def embed_documents(self, texts):
+            return np.zeros((len(texts), 4), dtype=np.float32)
+
+    with pytest.raises(TypeError, match="model_id"):
+        NoModelId()
+
+
+def test_queries_default_to_document_embeddings():
+    provider = HashingEmbeddingProvider()
+    assert np.array_equal(provider.embed_queries(["seed round"]), provider.embed_documents(["seed round"]))
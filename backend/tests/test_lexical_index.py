@@ -0,0 +1,23 @@
+from app.services.lexical_index import LexicalIndex, tokenize
+
+
+def test_tokenize_keeps_and_splits_compounds():
+    assert tokenize("Our LTV/CAC is 3.5x") == ["ltv/cac", "ltv", "cac", "3.5x", "3", "5x"]
+
+
+def test_tokenize_non_latin_text():
+    assert tokenize("הכנסות שנתיות של 2M דולר") == ["הכנסות", "שנתיות", "של", "2m", "דולר"]
+    assert tokenize("Выручка растёт") == ["выручка", "растёт"]
+
+
+def test_bm25_ranks_hebrew_documents():
+    index = LexicalIndex.build([
+        "הצוות כולל מהנדסים מגוגל",
+        "הכנסות שנתיות של שני מיליון דולר",
+        "the team has five engineers",
+    ])
+    terms = tokenize("הכנסות שנתיות")
+    idf = {term: 1.0 for term in terms}
+    scores = index.score(terms, idf, avg_length=5.0, k1=1.2, b=0.75)
+    assert scores.argmax() == 1
+    assert scores[0] == scores[2] == 0
@@ -0,0 +1,42 @@
+from app.services.llm_cache import LLMResponseCache
+
+
+def _cache(tmp_path, max_bytes=1024 * 1024):
+    return LLMResponseCache(str(tmp_path / "responses.sqlite3"), max_bytes)
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.make_key("gemini-2.5-flash", "prompt", 0.3, 8192, "score-v1")
+
+    assert cache.get(key) is None
+    cache.put(key, "gemini-2.5-flash", '{"score": 80}')
+    assert cache.get(key) == '{"score": 80}'
+    assert cache.get(cache.make_key("gemini-2.5-flash", "prompt", 0.3, 8192, "score-v2")) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 33.33)
+    assert stats["bytes"] == len('{"score": 80}')
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    keys = [cache.make_key("m", f"prompt {i}", 0.0, 100, "v1") for i in range(3)]
+    for key in keys:
+        cache.put(key, "m", "x" * 100)
+        cache.get(keys[0])  # keep the first response recently used
+
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["bytes"] == 200
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_byte_count_survives_reopen_and_replace(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.make_key("m", "prompt", 0.0, 100, "v1")
+    cache.put(key, "m", "a" * 40)
+    cache.put(key, "m", "b" * 10)
+
+    assert cache.count() == 1
+    assert _cache(tmp_path).get_stats()["bytes"] == 10
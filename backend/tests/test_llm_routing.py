@@ -0,0 +1,37 @@
+import pytest
+
+from app.config import settings
+from app.services.llm_routing import RouteStats, resolve_tier
+
+
+def test_call_sites_resolve_to_their_tier():
+    assert resolve_tier("dedup") == "lite"
+    assert resolve_tier("score") == "flash"
+    assert resolve_tier("reasoning") == "pro"
+    assert resolve_tier("not-a-route") == "flash"
+
+
+def test_overrides_and_disabled_routing(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTE_OVERRIDES", {"reasoning": "flash", "dedup": "nonexistent"})
+    assert resolve_tier("reasoning") == "flash"
+    assert resolve_tier("dedup") == "flash"
+
+    monkeypatch.setattr(settings, "LLM_ROUTE_OVERRIDES", {})
+    monkeypatch.setattr(settings, "LLM_ROUTING_ENABLED", False)
+    assert resolve_tier("founders") == "flash"
+
+
+def test_route_stats_cost_and_errors():
+    stats = RouteStats()
+    stats.record("flash", "gemini-2.5-flash", 0.2, 1_000_000, 100_000)
+    stats.record("pro", "gemini-unlisted", 0.6, 1_000_000, 0)
+    stats.record("flash", "gemini-2.5-flash", 0.1, 5_000, 0, error=True)
+
+    summary = stats.to_dict("flash")
+    # 0.30 + 0.1 * 2.50 at flash prices, plus 1.25 at pro tier prices for the unlisted model
+    assert summary["cost_usd"] == pytest.approx(0.55 + 1.25)
+    assert (summary["calls"], summary["errors"]) == (3, 1)
+    assert summary["prompt_tokens"] == 2_000_000
+    assert summary["avg_latency_ms"] == 300.0
+    assert summary["max_latency_ms"] == 600.0
+    assert summary["models"] == {"gemini-2.5-flash": 2, "gemini-unlisted": 1}
@@ -0,0 +1,193 @@
+import asyncio
+import gc
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import AdaptiveRateLimiter
+
+
+@pytest.fixture
+def service(tmp_path):
+    llm = LLMService()
+    llm.response_cache = LLMResponseCache(str(tmp_path / "responses.sqlite3"), 1024 * 1024)
+    return llm
+
+
+def _fake_model(service, replies):
+    """Replaces the Gemini call with canned replies; returns the list of prompts sent"""
+    sent = []
+
+    async def fake_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        sent.append(prompt)
+        return SimpleNamespace(text=replies[min(len(sent), len(replies)) - 1], usage_metadata=None)
+
+    service._async_generate = fake_generate
+    return sent
+
+
+def test_unparseable_structured_response_is_not_cached(service):
+    sent = _fake_model(service, ['{"score": 72, "justification": "Strong te', '{"score": 72}'])
+
+    async def scenario():
+        first = await service.generate_structured("Score the team", cache_version="score-v1", route="score")
+        second = await service.generate_structured("Score the team", cache_version="score-v1", route="score")
+        third = await service.generate_structured("Score the team", cache_version="score-v1", route="score")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    # The truncated reply is salvaged for this call but never replayed from the cache
+    assert first["score"] == 72.0
+    assert second == third == {"score": 72}
+    assert len(sent) == 2
+    assert service.response_cache.count() == 1
+
+
+def test_cached_response_rejected_by_validate_is_regenerated(service):
+    sent = _fake_model(service, ["not json", '{"summary": "ok"}'])
+
+    async def scenario():
+        await service.generate("Summarize", temperature=0.3, cache_version="analysis-v1")
+        return await service.generate(
+            "Summarize", temperature=0.3, cache_version="analysis-v1",
+            validate=lambda text: text.startswith("{")
+        )
+
+    assert asyncio.run(scenario()) == '{"summary": "ok"}'
+    assert len(sent) == 2
+
+
+def test_cache_reads_and_writes_run_off_the_event_loop(service):
+    _fake_model(service, ['{"score": 64}'])
+    threads = []
+    get, put = service.response_cache.get, service.response_cache.put
+
+    def tracked(fn):
+        def call(*args):
+            threads.append(threading.get_ident())
+            return fn(*args)
+        return call
+
+    service.response_cache.get = tracked(get)
+    service.response_cache.put = tracked(put)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await service.generate("Score", temperature=0.3, cache_version="score-v1")
+        cached = await service.generate("Score", temperature=0.3, cache_version="score-v1")
+        await service.generate("Score", temperature=0.3, cache_version="score-v1", bypass_cache=True)
+        return loop_thread, cached
+
+    loop_thread, cached = asyncio.run(scenario())
+
+    assert cached == '{"score": 64}'
+    assert len(threads) == 4 and loop_thread not in threads
+    stats = service.response_cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+
+
+def test_tier_output_cap_defaults_to_existing_limit(service):
+    caps = []
+
+    async def fake_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        caps.append(max_tokens)
+        return SimpleNamespace(text="[]", usage_metadata=None)
+
+    service._async_generate = fake_generate
+
+    async def scenario():
+        await service.generate("Deduplicate", route="dedup")
+        await service.generate("Score", route="score")
+        await service.generate("Short", route="search_queries", max_tokens=500)
+
+    asyncio.run(scenario())
+    assert caps == [16000, 16000, 500]
+
+
+def test_tier_pool_bounds_concurrent_calls(service):
+    service.limiter = AdaptiveRateLimiter(rpm=60000, tpm=10 ** 9)
+    in_flight = peak = 0
+
+    async def fake_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(text="ok", usage_metadata=None)
+
+    service._async_generate = fake_generate
+
+    async def scenario():
+        await asyncio.gather(*[service.generate(f"founders {i}", route="founders") for i in range(20)])
+
+    asyncio.run(scenario())
+    assert peak == service.tiers["lite"].concurrency
+    assert service.get_stats()["routes"]["founders"]["calls"] == 20
+
+
+def test_quota_error_backs_off_for_retry_after_then_recovers(service):
+    service.limiter = AdaptiveRateLimiter(rpm=600, tpm=10 ** 9, increase_rpm=50)
+    attempts = []
+
+    async def fake_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise Exception("429 Resource exhausted. Please retry in 0.2s")
+        return SimpleNamespace(text="ok", usage_metadata=None)
+
+    service._async_generate = fake_generate
+
+    assert asyncio.run(service.generate("Score", route="score")) == "ok"
+    assert attempts[1] - attempts[0] >= 0.19
+    stats = service.limiter.get_stats()
+    assert stats["rate_limited"] == 1
+    assert stats["rpm"] == 350  # halved to 300, then +50 for the success
+
+
+def test_identical_concurrent_prompts_share_one_call(service):
+    sent = []
+
+    async def fake_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        sent.append(prompt)
+        await asyncio.sleep(0.02)
+        return SimpleNamespace(text="shared answer", usage_metadata=None)
+
+    service._async_generate = fake_generate
+
+    async def scenario():
+        return await asyncio.gather(*[service.generate("Summarize the deck", route="analysis") for _ in range(5)])
+
+    assert asyncio.run(scenario()) == ["shared answer"] * 5
+    assert len(sent) == 1
+    assert service.coalesced_calls == 4
+    assert service._inflight == {}
+
+
+def test_failed_shared_call_with_every_waiter_cancelled_is_retrieved(service):
+    unretrieved = []
+
+    async def failing_generate(prompt, temperature, max_tokens, stream=False, model=None):
+        await asyncio.sleep(0.02)
+        raise Exception("invalid argument")
+
+    service._async_generate = failing_generate
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        waiters = [asyncio.ensure_future(service.generate("Summarize", route="analysis")) for _ in range(2)]
+        await asyncio.sleep(0.005)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.05)  # the shared call fails with nobody awaiting it
+        gc.collect()
+
+    asyncio.run(scenario())
+    assert service._inflight == {}
+    assert unretrieved == []
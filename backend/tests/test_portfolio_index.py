@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from app.services.portfolio_index import PortfolioIndex
+from app.services.vector_store import SegmentedVectorStore, is_legacy_store
+
+
+def test_backfill_reads_stores_without_migrating_them(tmp_path, make_legacy_store):
+    stores_root = tmp_path / "stores"
+    legacy_path = str(stores_root / "startup_1")
+    make_legacy_store(legacy_path, 12)
+
+    native = SegmentedVectorStore(str(stores_root / "startup_2"))
+    vectors = np.random.default_rng(0).standard_normal((6, 16)).astype(np.float32)
+    native.add_segment(vectors, [f"t{i}" for i in range(6)], [{} for _ in range(6)])
+    native.remove_ids([0, 1])
+
+    portfolio = PortfolioIndex(str(tmp_path / "portfolio"))
+    portfolio.ensure_loaded(str(stores_root))
+
+    assert is_legacy_store(legacy_path)
+    assert sorted(os.listdir(legacy_path)) == ["index.faiss", "index.pkl"]
+    assert portfolio._counts == {1: 12, 2: 4}
+
+
+def test_centroids_follow_adds_and_removals(tmp_path):
+    rng = np.random.default_rng(1)
+    first, second = rng.standard_normal((5, 16)), rng.standard_normal((3, 16))
+    portfolio = PortfolioIndex(str(tmp_path / "portfolio"))
+    portfolio.ensure_loaded()
+    portfolio.add(7, first)
+    before = portfolio._sums[7].copy()
+
+    portfolio.add(7, second)
+    assert portfolio.remove_chunks(7, second) == 3
+    assert portfolio._counts[7] == 5
+    assert np.allclose(portfolio._sums[7], before, atol=1e-5)
+
+    # Resident size depends on the number of startups, not on their chunks
+    assert portfolio.nbytes() == 2 * 16 * 4
+    assert portfolio.remove_chunks(7, first) == 5
+    assert 7 not in portfolio._counts
+
+
+def test_save_keeps_only_centroids(tmp_path):
+    path = tmp_path / "portfolio"
+    path.mkdir()
+    (path / "index.faiss").write_bytes(b"stale global chunk index")
+    np.save(path / "entries.npy", np.zeros((0, 3), dtype=np.int64))
+    np.save(path / "centroid_ids.npy", np.array([3], dtype=np.int64))
+    np.save(path / "centroid_sums.npy", np.ones((1, 16), dtype=np.float32))
+    np.save(path / "centroid_counts.npy", np.array([4], dtype=np.int64))
+
+    portfolio = PortfolioIndex(str(path))
+    portfolio.ensure_loaded()
+    assert sorted(os.listdir(path)) == ["centroid_counts.npy", "centroid_ids.npy", "centroid_sums.npy"]
+
+    portfolio.add(9, np.eye(16, dtype=np.float32)[:2])
+    portfolio.save()
+    reloaded = PortfolioIndex(str(path))
+    reloaded.ensure_loaded()
+    assert reloaded._counts == {3: 4, 9: 2}
+    assert [startup_id for startup_id, _ in reloaded.nearest_startups(np.eye(16)[0], 1)] == [9]
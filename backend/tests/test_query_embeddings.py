@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.query_embeddings import QueryEmbeddingRegistry
+
+
+def _registry(tmp_path, max_adhoc_entries=3):
+    calls = []
+
+    async def embed(queries):
+        calls.append(list(queries))
+        return np.array([[len(q), 1.0] for q in queries], dtype=np.float32)
+
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    registry = QueryEmbeddingRegistry(
+        cache, "test-model", embed, executor=ThreadPoolExecutor(max_workers=1),
+        max_adhoc_entries=max_adhoc_entries
+    )
+    return registry, cache, calls
+
+
+def test_adhoc_queries_are_bounded_but_fixed_queries_stay_resident(tmp_path):
+    registry, _, calls = _registry(tmp_path)
+    registry.register(["fixed question"])
+
+    async def scenario():
+        await registry.get_many(["fixed question"])
+        for i in range(10):
+            await registry.get(f"chat question {i}")
+        # Evicted from memory, read back from disk without an API call
+        return await registry.get("chat question 0")
+
+    vector = asyncio.run(scenario())
+    stats = registry.get_stats()
+    assert stats["adhoc_in_memory"] == 3
+    assert stats["in_memory"] == 4
+    assert registry.peek("fixed question") is not None
+    assert vector.tolist() == [float(len("chat question 0")), 1.0]
+    assert len(calls) == 11
+
+
+def test_batch_larger_than_the_lru_still_returns_every_vector(tmp_path):
+    registry, _, _ = _registry(tmp_path, max_adhoc_entries=2)
+    queries = [f"q{i}" for i in range(6)]
+    matrix = asyncio.run(registry.get_many(queries))
+    assert matrix.shape == (6, 2)
+
+
+def test_sqlite_access_runs_off_the_event_loop(tmp_path):
+    registry, cache, _ = _registry(tmp_path)
+    threads = set()
+    get_many, put_many = cache.get_many, cache.put_many
+
+    def tracked_get_many(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return get_many(*args, **kwargs)
+
+    def tracked_put_many(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return put_many(*args, **kwargs)
+
+    cache.get_many, cache.put_many = tracked_get_many, tracked_put_many
+    asyncio.run(registry.get("what is the burn rate?"))
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,126 @@
+import asyncio
+
+from app.config import settings
+from app.services.rag_service import rag_service
+
+
+def test_cancelled_first_loader_does_not_strand_followers(monkeypatch):
+    sentinel = object()
+    loads = []
+
+    async def slow_load(startup_id):
+        loads.append(startup_id)
+        await asyncio.sleep(0.05)
+        return sentinel
+
+    monkeypatch.setattr(rag_service, "_load_vector_store", slow_load)
+    monkeypatch.setattr(rag_service, "_enforce_memory_budget", lambda startup_id: None)
+
+    async def scenario():
+        leader = asyncio.ensure_future(rag_service._get_vector_store(9001))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(rag_service._get_vector_store(9001))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await asyncio.wait_for(follower, timeout=1)
+        assert leader.cancelled()
+        return result
+
+    assert asyncio.run(scenario()) is sentinel
+    assert loads == [9001]
+    assert 9001 not in rag_service._loading
+
+
+def test_failed_load_propagates_to_every_caller(monkeypatch):
+    async def failing_load(startup_id):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("corrupt store")
+
+    monkeypatch.setattr(rag_service, "_load_vector_store", failing_load)
+
+    async def scenario():
+        return await asyncio.gather(
+            rag_service._get_vector_store(9002),
+            rag_service._get_vector_store(9002),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert [str(r) for r in results] == ["corrupt store", "corrupt store"]
+    assert 9002 not in rag_service._loading
+
+
+def test_delete_legacy_document_matches_chunks_by_filename():
+    legacy_text = "Our legacy pitch deck describes the seed round and the founding team in detail."
+    current_text = "A newer financial model with revenue projections and hiring plans for next year."
+
+    async def scenario():
+        # Uploaded before chunks carried a document_id (Document.vector_ids is None)
+        await rag_service.add_documents(9100, [legacy_text], [{"filename": "deck.pdf"}])
+        await rag_service.add_documents(9100, [current_text], [{"filename": "deck.pdf", "document_id": 5}])
+
+        without_filename = await rag_service.delete_document(9100, 4, None)
+        removed = await rag_service.delete_document(9100, 4, None, legacy_filename="deck.pdf")
+        remaining = await rag_service.search(9100, "seed round founding team", 5)
+        return without_filename, removed, remaining
+
+    without_filename, removed, remaining = asyncio.run(scenario())
+    assert without_filename == 0
+    assert removed == 1
+    assert [r["metadata"].get("document_id") for r in remaining] == [5]
+
+
+def test_compaction_remeasures_resident_bytes(monkeypatch):
+    monkeypatch.setattr(settings, "SEGMENT_COMPACTION_THRESHOLD", 2)
+    texts = [f"Update {i}: the company signed {i} new enterprise customers this quarter." for i in range(3)]
+
+    async def scenario():
+        for i, text in enumerate(texts):
+            await rag_service.add_documents(9200, [text], [{"filename": f"update_{i}.pdf", "document_id": i}])
+        while 9200 in rag_service._compacting:
+            await asyncio.sleep(0.01)
+        return rag_service.vector_stores[9200]
+
+    store = asyncio.run(scenario())
+    assert store.segment_count == 1
+    assert rag_service._store_bytes[9200] == store.nbytes()
+
+
+def test_deleting_documents_compacts_away_tombstones():
+    texts = [f"Section {i} of the board deck covers churn, pricing and the sales pipeline." for i in range(10)]
+    metadatas = [{"filename": "deck.pdf", "document_id": 1 if i < 4 else 2} for i in range(10)]
+
+    async def scenario():
+        await rag_service.add_documents(9300, texts, metadatas)
+        removed = await rag_service.delete_document(9300, 1)
+        while 9300 in rag_service._compacting:
+            await asyncio.sleep(0.01)
+        return removed, rag_service.vector_stores[9300]
+
+    removed, store = asyncio.run(scenario())
+    assert removed == 4
+    assert store.segment_count == 1
+    assert store.max_deleted_fraction == 0.0
+    assert store.ntotal == 6
+    assert rag_service._store_bytes[9300] == store.nbytes()
+    assert rag_service.portfolio._counts[9300] == 6
+
+
+def test_portfolio_search_probes_the_nearest_startups():
+    topics = {
+        9401: "Solar panel installers financing rooftop photovoltaic systems for homeowners.",
+        9402: "Veterinary telehealth app connecting pet owners with licensed animal doctors.",
+        9403: "Freight brokerage software matching trucking capacity with shipper loads.",
+    }
+
+    async def scenario():
+        for startup_id, text in topics.items():
+            await rag_service.add_documents(startup_id, [text], [{"filename": "deck.pdf", "document_id": startup_id}])
+        return await rag_service.portfolio_search("telehealth for pet owners and animal doctors", k=2)
+
+    results = asyncio.run(scenario())
+    assert results[0]["startup_id"] == 9402
+    assert len(results) == 2
+    assert results[0]["similarity"] >= results[1]["similarity"]
+    assert results[0]["chunks"][0]["similarity"] == results[0]["similarity"]
+    assert rag_service.portfolio.get_stats()["chunks"] >= 3
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from app.services.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+class QuotaError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+def test_parse_retry_after_formats():
+    assert parse_retry_after(QuotaError("429", retry_after=12)) == 12.0
+    assert parse_retry_after(Exception("429 Resource exhausted. Please retry in 37.5s")) == 37.5
+    assert parse_retry_after(Exception("quota exceeded retry_delay { seconds: 21 }")) == 21.0
+    assert parse_retry_after(Exception("HTTP 429 Retry-After: 4")) == 4.0
+    assert parse_retry_after(Exception("429 Too Many Requests")) is None
+
+
+def test_quota_error_halves_rate_down_to_the_floor():
+    limiter = AdaptiveRateLimiter(rpm=120, tpm=100000, min_rpm=20, decrease_factor=0.5)
+    limiter.on_rate_limited()
+    assert limiter.rpm == 60
+    assert limiter.tpm == 50000
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.rpm == 20
+    assert limiter.rate_limited == 3
+
+
+def test_success_recovers_rate_additively_up_to_the_ceiling():
+    limiter = AdaptiveRateLimiter(rpm=100, tpm=100000, increase_rpm=15)
+    limiter.on_rate_limited()
+    limiter.on_success()
+    assert limiter.rpm == 65
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.rpm == 100
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = AdaptiveRateLimiter(rpm=6000, tpm=10 ** 9)
+
+    async def scenario():
+        limiter.on_rate_limited(retry_after=0.2)
+        start = time.monotonic()
+
+        async def call():
+            await limiter.acquire(10)
+            return time.monotonic() - start
+
+        return await asyncio.gather(call(), call())
+
+    assert min(asyncio.run(scenario())) >= 0.19
+    assert limiter.acquired == 2
+    assert limiter.throttled >= 1
+
+
+def test_request_bucket_spaces_out_a_burst():
+    # 600 RPM: a bucket of 10 requests, refilled at one request per 0.1s
+    limiter = AdaptiveRateLimiter(rpm=600, tpm=10 ** 9)
+
+    async def scenario():
+        start = time.monotonic()
+        for _ in range(12):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) >= 0.18
+    assert limiter.throttled >= 1
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.vector_store import MmapVectorStore, SegmentedVectorStore, is_native_store, open_store
+
+
+def _open_concurrently(path, workers=8):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda _: open_store(path), range(workers)))
+
+
+def test_concurrent_open_migrates_legacy_store_once(tmp_path, make_legacy_store):
+    for trial in range(5):
+        path = str(tmp_path / f"startup_{trial}")
+        make_legacy_store(path, 30)
+
+        stores = _open_concurrently(path)
+
+        assert is_native_store(path)
+        assert all(store.ntotal == 30 for store in stores)
+        assert sorted(os.listdir(path)) == ["manifest.json", "seg_000001"]
+
+
+def test_concurrent_open_upgrades_single_store_once(tmp_path):
+    for trial in range(5):
+        path = str(tmp_path / f"startup_{trial}")
+        vectors = np.random.default_rng(trial).standard_normal((20, 8)).astype(np.float32)
+        MmapVectorStore.create(vectors, [f"t{i}" for i in range(20)], [{} for _ in range(20)]).save(path)
+
+        stores = _open_concurrently(path)
+
+        assert all(store.ntotal == 20 for store in stores)
+        assert sorted(os.listdir(path)) == ["manifest.json", "seg_000001"]
+        assert stores[0].get_chunk(3)[0] == "t3"
+
+
+def _segmented_store(path, n=200, dim=16, index_type="flat"):
+    from app.config import settings
+    from app.services.vector_store import SegmentedVectorStore
+
+    settings.VECTOR_INDEX_TYPE = index_type
+    try:
+        vectors = np.random.default_rng(1).standard_normal((n, dim)).astype(np.float32)
+        store = SegmentedVectorStore(path)
+        store.add_segment(vectors, [f"t{i}" for i in range(n)], [{} for _ in range(n)])
+    finally:
+        settings.VECTOR_INDEX_TYPE = "flat"
+    return store, vectors
+
+
+def test_deleted_chunks_are_filtered_from_reloaded_mmapped_index(tmp_path):
+    from app.services.vector_store import SegmentedVectorStore
+
+    for index_type in ("flat", "sq8"):
+        path = str(tmp_path / index_type)
+        store, vectors = _segmented_store(path, index_type=index_type)
+        _, before = store.search(vectors[:5], 3)
+        deleted = before[:, 0]
+        assert store.remove_ids(deleted.tolist()) == 5
+
+        reloaded = SegmentedVectorStore.load(path)
+        assert reloaded.ntotal == 195
+        for current in (store, reloaded):
+            _, after = current.search(vectors[:5], 3)
+            assert not np.isin(after, deleted).any()
+            assert (after != -1).all()
+
+
+def _add(store, start, n=5, dim=8):
+    vectors = np.random.default_rng(start).standard_normal((n, dim)).astype(np.float32)
+    ids = np.arange(start, start + n, dtype=np.int64)
+    store.add_segment(vectors, [f"t{i}" for i in ids], [{} for _ in ids], ids)
+
+
+def test_append_through_reloaded_instance_survives_concurrent_compaction(tmp_path, monkeypatch):
+    from app.services import vector_store as vs
+
+    path = str(tmp_path / "startup_1")
+    evicted = vs.SegmentedVectorStore(path)
+    for start in (0, 10, 20):
+        _add(evicted, start)
+    # Evicted from the LRU while compacting; requests reload a second instance
+    reloaded = vs.SegmentedVectorStore.load(path)
+
+    merge = vs.MmapVectorStore.merge
+
+    def merge_while_appending(segments, index_type=None):
+        _add(reloaded, 100)
+        return merge(segments, index_type)
+
+    monkeypatch.setattr(vs.MmapVectorStore, "merge", staticmethod(merge_while_appending))
+    assert evicted.compact() == 3
+    monkeypatch.setattr(vs.MmapVectorStore, "merge", staticmethod(merge))
+
+    _add(reloaded, 200)
+    assert reloaded.remove_ids([0]) == 1
+
+    on_disk = vs.SegmentedVectorStore.load(path)
+    live = np.sort(np.concatenate([np.asarray(s.ids)[s.live_mask()] for s in on_disk.segments]))
+    expected = [i for start in (0, 10, 20, 100, 200) for i in range(start, start + 5) if i != 0]
+    assert live.tolist() == expected
+    assert on_disk.segment_count == 3
+
+
+def test_compaction_is_dropped_if_another_instance_compacted_first(tmp_path):
+    from app.services import vector_store as vs
+
+    path = str(tmp_path / "startup_1")
+    first = vs.SegmentedVectorStore(path)
+    for start in (0, 10, 20):
+        _add(first, start)
+    second = vs.SegmentedVectorStore.load(path)
+
+    assert second.compact() == 3
+    assert first.compact() == 0
+    on_disk = vs.SegmentedVectorStore.load(path)
+    assert on_disk.segment_count == 1 and on_disk.ntotal == 15
+    assert sorted(os.listdir(path)) == ["manifest.json", on_disk.segment_names[0]]
+
+
+def test_segment_size_is_measured_once(tmp_path, monkeypatch):
+    import app.services.vector_store as vector_store_module
+
+    vectors = np.random.default_rng(0).standard_normal((50, 8)).astype(np.float32)
+    metadatas = [{"filename": "deck.pdf", "page": i, "title": "Überblick"} for i in range(50)]
+    built = MmapVectorStore.create(vectors, [f"chunk {i}" for i in range(50)], metadatas)
+    path = str(tmp_path / "segment")
+    built.save(path)
+    loaded = MmapVectorStore.load(path)
+
+    def no_serialization(*args, **kwargs):
+        raise AssertionError("nbytes re-serialized the chunk metadata")
+
+    monkeypatch.setattr(vector_store_module.json, "dumps", no_serialization)
+    assert built.nbytes() == loaded.nbytes()
+    assert loaded.without(np.asarray(loaded.ids[:5])).nbytes() == loaded.nbytes()
+
+
+def test_compaction_purges_tombstones_of_a_single_segment(tmp_path):
+    path = str(tmp_path / "startup")
+    vectors = np.random.default_rng(3).standard_normal((40, 8)).astype(np.float32)
+    store = SegmentedVectorStore(path)
+    ids = store.add_segment(vectors, [f"t{i}" for i in range(40)], [{} for _ in range(40)])
+    store.remove_ids(np.asarray(ids[:10]))
+    assert store.max_deleted_fraction == 0.25
+
+    assert store.compact() == 1
+    reloaded = open_store(path)
+    assert reloaded.segment_count == 1
+    assert reloaded.max_deleted_fraction == 0.0
+    assert reloaded.ntotal == 30
+    _, found = reloaded.search(vectors[10:11], 1)
+    assert found[0][0] == ids[10]
+    assert store.compact() == 0